@@ -0,0 +1,193 @@
+"""On-demand request profiling for ``POST /admin/profile``.
+
+An admin starts a :class:`ProfileSession` for the next N seconds and/or the
+next N requests on selected routes; :class:`ProfilingMiddleware` admits
+matching requests into it and the session ends when either limit is reached.
+
+- ``sample`` mode: a background thread snapshots every thread's Python stack
+  (``sys._current_frames``) every few milliseconds while a selected request
+  is in flight, skipping threads that sit idle in the event loop or a worker
+  queue. The result is collapsed stacks (``thread;outer;...;inner count``),
+  which flamegraph.pl, speedscope and inferno read directly. Requests that
+  share the event loop with the profiled ones show up too; the selected
+  routes decide *when* the process is sampled, not which coroutine.
+- ``cprofile`` mode: deterministic cProfile on the event loop thread while a
+  selected request is in flight, returned as a ``.prof`` file for
+  ``python -m pstats``, snakeviz or flameprof. Plain ``def`` routes run in
+  the threadpool and only appear in ``sample`` mode.
+
+One session runs at a time and only in the process that received the
+request; with several workers, profile the one whose ``pid`` you are after.
+"""
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PROFILE_MODES = ("sample", "cprofile")
+MAX_PROFILE_SECONDS = 300
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# Requests to the profiling endpoint itself are never profiled
+PROFILE_PATH = "/admin/profile"
+# A stack whose innermost Python frame is here is waiting, not working
+_IDLE_MODULES = {"selectors.py", "threading.py", "queue.py"}
+
+
+def _route_path(scope: Scope) -> str:
+    """Request path relative to the app (``/admin/metrics`` also when mounted at ``/api``)"""
+    path, root = scope["path"], scope.get("root_path", "")
+    return path[len(root):] if root and path.startswith(root) else path
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # Collapsed stacks use ';' between frames and ' ' before the count
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class ProfileSession:
+    """One profiling run: which requests it covers, when it ends and what it collected."""
+
+    def __init__(
+        self,
+        mode: str = "sample",
+        seconds: float = 10.0,
+        max_requests: Optional[int] = None,
+        routes: Sequence[str] = (),
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.seconds = seconds
+        self.max_requests = max_requests
+        self.routes = tuple(route.rstrip("/") or "/" for route in routes)
+        self.interval = interval
+        self.requests = 0
+        self.started = self.elapsed = 0.0
+        self.samples: Counter = Counter()
+        self.done = threading.Event()
+        self._in_flight = 0
+        self._finished = 0
+        self._lock = threading.Lock()
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._sampler: Optional[threading.Thread] = None
+
+    def selects(self, path: str) -> bool:
+        if path == PROFILE_PATH:
+            return False
+        if not self.routes:
+            return True
+        return any(path == route or path.startswith(route.rstrip("/") + "/") for route in self.routes)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def wait(self) -> None:
+        """Block until the request budget is used up or the time is over, then stop collecting"""
+        self.done.wait(self.seconds)
+        self.done.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def request_started(self) -> bool:
+        """Admit a request; False once the session is over or has all the requests it wants"""
+        with self._lock:
+            if self.done.is_set() or (self.max_requests is not None and self.requests >= self.max_requests):
+                return False
+            self.requests += 1
+            self._in_flight += 1
+            first = self._in_flight == 1
+        # Event loop thread: enabled and disabled around the same requests
+        if first and self._profile is not None:
+            self._profile.enable()
+        return True
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._finished += 1
+            last = self._in_flight == 0
+            if self.max_requests is not None and self._finished >= self.max_requests:
+                self.done.set()
+        if last and self._profile is not None:
+            self._profile.disable()
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        while not self.done.wait(self.interval):
+            if not self._in_flight:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}").replace(";", ":").replace(" ", "_"))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def result(self) -> Tuple[bytes, str, str]:
+        """(body, media type, file name) of what was collected"""
+        if self._profile is not None:
+            self._profile.create_stats()
+            # The format pstats.Stats.dump_stats writes
+            return marshal.dumps(self._profile.stats), "application/octet-stream", "profile.prof"
+        lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+        body = "\n".join(lines) + "\n" if lines else ""
+        return body.encode(), "text/plain; charset=utf-8", "profile.folded"
+
+
+class Profiler:
+    """Holds the running session, if any; one at a time per process."""
+
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+        self._lock = threading.Lock()
+
+    def run(self, session: ProfileSession) -> ProfileSession:
+        """Profile until the session ends and return it; RuntimeError if one is already running"""
+        with self._lock:
+            if self.session is not None:
+                raise RuntimeError("A profiling session is already running")
+            self.session = session
+        try:
+            session.start()
+            session.wait()
+        finally:
+            self.session = None
+        return session
+
+
+PROFILER = Profiler()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware admitting selected requests into the running profiling session."""
+
+    def __init__(self, app: ASGIApp, profiler: Optional[Profiler] = None):
+        self.app = app
+        self.profiler = profiler or PROFILER
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        session = self.profiler.session
+        if (scope["type"] != "http" or session is None or not session.selects(_route_path(scope))
+                or not session.request_started()):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.request_finished()
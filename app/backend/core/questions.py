@@ -1,117 +1,282 @@
-"""Single source of truth for survey questions (id, English & Arabic text)."""
+"""Single source of truth for survey questions (id, English & Arabic text).
+
+``questions.csv`` is read once into an immutable, indexed :class:`QuestionBank`
+shared by the whole process. :func:`get_question_bank` stats the file on each
+call and atomically swaps in a new bank when its content has changed, so edits
+to the CSV are picked up without a restart.
+"""
 
 import csv
+import hashlib
+import io
 import os
-from typing import List, Dict, Any, Optional
+import re
+import threading
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 
-def parse_questions_from_csv() -> List[Dict[str, Any]]:
-    """Parse the comprehensive questions.csv file"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    filename = os.path.join(script_dir, "questions.csv")
+from .telemetry import TELEMETRY
+
+QUESTIONS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions.csv")
+
+# Question ids referenced by a "Skips & Triggers" rule, e.g. "show if Q27.3 is yes"
+_QUESTION_REF = re.compile(r'\bQ\d+(?:\.\d+)*')
+
+def parse_max_score(answers: str) -> int:
+    """Parse the maximum score from possible answers"""
+    if not answers:
+        return 1
     
-    questions = []
-    questions_dict = {}  # Use dict to handle duplicates - last one wins
+    # Look for numbers in parentheses like (2), (1), (0)
+    scores = re.findall(r'\((\d+)\)', answers)
+    if scores:
+        return max(int(s) for s in scores)
     
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                # Skip empty rows or rows without question numbers
-                if not row.get('Quet.Nr') or row.get('Quet.Nr').strip() in ['', 'Quet.Nr']:
-                    continue
-                
-                question_id = row.get('Quet.Nr', '').strip()
-                if not question_id.startswith('Q'):
-                    continue
-                
-                # Skip rows marked for deletion
-                changes_made = row.get('Changes made', '').strip().lower()
-                if 'to be deleted' in changes_made:
-                    continue
-                    
-                # Parse answer format to determine question type
-                possible_answers = row.get('Possible Answers', '').strip()
-                question_type = 'rating'  # default
-                answer_options = []
-                max_score = 5
-                
-                # Check for various Yes/No patterns
-                is_yes_no = False
-                yes_score = 1
-                no_score = 0
-                
-                # Look for Yes/No patterns with different scores
-                if ('Yes (' in possible_answers and 'No (' in possible_answers) or \
-                   ('نعم (' in possible_answers and 'لا (' in possible_answers):
-                    # Extract the scores for Yes and No
-                    import re
-                    yes_match = re.search(r'(?:Yes|نعم)\s*\((\d+)\)', possible_answers)
-                    no_match = re.search(r'(?:No|لا)\s*\((\d+)\)', possible_answers)
-                    
-                    if yes_match and no_match:
-                        yes_score = int(yes_match.group(1))
-                        no_score = int(no_match.group(1))
-                        is_yes_no = True
-                
-                if is_yes_no:
-                    question_type = 'yes_no'
-                    answer_options = [
-                        {'value': yes_score, 'label_en': 'Yes', 'label_ar': 'نعم'},
-                        {'value': no_score, 'label_en': 'No', 'label_ar': 'لا'}
-                    ]
-                    max_score = max(yes_score, no_score)
-                elif '(3)' in possible_answers or '(2)' in possible_answers or '(1)' in possible_answers:
-                    # Multi-option questions - parse the options
-                    question_type = 'multiple_choice'
-                    lines = possible_answers.split('\n')
-                    for line in lines:
-                        if '(' in line and ')' in line:
-                            # Extract score and text
-                            start = line.find('(')
-                            end = line.find(')')
-                            if start != -1 and end != -1:
-                                try:
-                                    score = int(line[start+1:end])
-                                    text = line[:start].strip()
-                                    if text:
-                                        answer_options.append({
-                                            'value': score,
-                                            'label_en': text,
-                                            'label_ar': text  # Would need translation
-                                        })
-                                        max_score = max(max_score, score)
-                                except ValueError:
-                                    continue
-                
-                # Skip questions with complex conditional logic for now
-                skips_triggers = row.get('Skips & Triggers', '').strip()
-                has_conditions = bool(skips_triggers and skips_triggers not in ['', 'N/A'])
-                
-                questions_dict[question_id] = {
-                    'id': question_id,
-                    'text_en': row.get('Question', '').strip(),
-                    'text_ar': row.get('السؤال', '').strip(),
-                    'elaboration_en': row.get('Elaboration on Question', '').strip(),
-                    'category': row.get('Criteria', '').strip(),
-                    'question_type': question_type,
-                    'answer_options': answer_options,
-                    'max_score': max_score,
-                    'has_conditions': has_conditions,
-                    'conditions': skips_triggers,
-                    'visit_type': row.get('Type of visit', '').strip()
-                }
+    # Count options (simple fallback)
+    lines = [line.strip() for line in answers.split('\n') if line.strip()]
+    return len(lines) if lines else 1
+
+def parse_question_row(row: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+    """Build the survey form entry for one CSV row, or None for rows that are not shown"""
+    # Skip empty rows or rows without question numbers
+    if not row.get('Quet.Nr') or row.get('Quet.Nr').strip() in ['', 'Quet.Nr']:
+        return None
+    
+    question_id = row.get('Quet.Nr', '').strip()
+    if not question_id.startswith('Q'):
+        return None
+    
+    # Skip rows marked for deletion
+    changes_made = (row.get('Changes made') or '').strip().lower()
+    if 'to be deleted' in changes_made:
+        return None
+        
+    # Parse answer format to determine question type
+    possible_answers = (row.get('Possible Answers') or '').strip()
+    question_type = 'rating'  # default
+    answer_options = []
+    max_score = 5
+    
+    # Check for various Yes/No patterns
+    is_yes_no = False
+    yes_score = 1
+    no_score = 0
+    
+    # Look for Yes/No patterns with different scores
+    if ('Yes (' in possible_answers and 'No (' in possible_answers) or \
+       ('نعم (' in possible_answers and 'لا (' in possible_answers):
+        # Extract the scores for Yes and No
+        yes_match = re.search(r'(?:Yes|نعم)\s*\((\d+)\)', possible_answers)
+        no_match = re.search(r'(?:No|لا)\s*\((\d+)\)', possible_answers)
+        
+        if yes_match and no_match:
+            yes_score = int(yes_match.group(1))
+            no_score = int(no_match.group(1))
+            is_yes_no = True
     
+    if is_yes_no:
+        question_type = 'yes_no'
+        answer_options = [
+            {'value': yes_score, 'label_en': 'Yes', 'label_ar': 'نعم'},
+            {'value': no_score, 'label_en': 'No', 'label_ar': 'لا'}
+        ]
+        max_score = max(yes_score, no_score)
+    elif '(3)' in possible_answers or '(2)' in possible_answers or '(1)' in possible_answers:
+        # Multi-option questions - parse the options
+        question_type = 'multiple_choice'
+        lines = possible_answers.split('\n')
+        for line in lines:
+            if '(' in line and ')' in line:
+                # Extract score and text
+                start = line.find('(')
+                end = line.find(')')
+                if start != -1 and end != -1:
+                    try:
+                        score = int(line[start+1:end])
+                        text = line[:start].strip()
+                        if text:
+                            answer_options.append({
+                                'value': score,
+                                'label_en': text,
+                                'label_ar': text  # Would need translation
+                            })
+                            max_score = max(max_score, score)
+                    except ValueError:
+                        continue
+    
+    # Skip questions with complex conditional logic for now
+    skips_triggers = (row.get('Skips & Triggers') or '').strip()
+    has_conditions = bool(skips_triggers and skips_triggers not in ['', 'N/A'])
+    
+    return {
+        'id': question_id,
+        'text_en': (row.get('Question') or '').strip(),
+        'text_ar': (row.get('السؤال') or '').strip(),
+        'elaboration_en': (row.get('Elaboration on Question') or '').strip(),
+        'category': (row.get('Criteria') or '').strip(),
+        'question_type': question_type,
+        'answer_options': answer_options,
+        'max_score': max_score,
+        'has_conditions': has_conditions,
+        'conditions': skips_triggers,
+        'visit_type': (row.get('Type of visit') or '').strip()
+    }
+
+def _freeze(question: Dict[str, Any]) -> Mapping[str, Any]:
+    frozen = dict(question)
+    frozen['answer_options'] = tuple(MappingProxyType(dict(o)) for o in question.get('answer_options', []))
+    return MappingProxyType(frozen)
+
+def _thaw(question: Mapping[str, Any]) -> Dict[str, Any]:
+    thawed = dict(question)
+    thawed['answer_options'] = [dict(o) for o in question['answer_options']]
+    return thawed
+
+def _visit_types(value: str) -> List[str]:
+    """'Enquiry/ Transaction' -> ['Enquiry', 'Transaction']"""
+    return [part.strip() for part in value.split('/') if part.strip()]
+
+class QuestionBank:
+    """Immutable, indexed view of questions.csv built in a single pass.
+
+    ``questions`` are the survey form entries in display order (rows marked for
+    deletion are dropped; a repeated id keeps its last row). ``max_scores`` and
+    ``sections`` are the scoring maps and cover every numbered row. ``rows``
+    keeps the raw CSV rows for the diagnostics utilities.
+    """
+
+    __slots__ = ("version", "rows", "questions", "by_id", "by_category",
+                 "by_visit_type", "by_condition", "max_scores", "sections")
+
+    def __init__(self, rows: List[Dict[str, str]], version: str,
+                 questions: Optional[List[Dict[str, Any]]] = None):
+        self.version = version
+        self.rows: Tuple[Mapping[str, str], ...] = tuple(MappingProxyType(dict(row)) for row in rows)
+
+        max_scores: Dict[str, int] = {}
+        sections: Dict[str, str] = {}
+        parsed: Dict[str, Dict[str, Any]] = {}  # last one wins for duplicate ids
+        for row in rows:
+            question_id = (row.get('Quet.Nr') or '').strip()
+            answers = (row.get('Possible Answers') or '').strip()
+            criteria = (row.get('Criteria') or '').strip()
+            if question_id and answers:
+                max_scores[question_id] = parse_max_score(answers)
+            if question_id and criteria:
+                sections[question_id] = criteria
+            if questions is None:
+                question = parse_question_row(row)
+                if question is not None:
+                    parsed[question['id']] = question
+        if questions is None:
+            questions = list(parsed.values())
+
+        by_id: Dict[str, Mapping[str, Any]] = {}
+        by_category: Dict[str, List[Mapping[str, Any]]] = {}
+        by_visit_type: Dict[str, List[Mapping[str, Any]]] = {}
+        by_condition: Dict[str, List[Mapping[str, Any]]] = {}
+        frozen_questions = []
+        for display_number, question in enumerate(questions, 1):
+            question = _freeze(dict(question, display_number=display_number))
+            frozen_questions.append(question)
+            by_id[question['id']] = question
+            by_category.setdefault(question.get('category', 'Other'), []).append(question)
+            for visit_type in _visit_types(question.get('visit_type', '')):
+                by_visit_type.setdefault(visit_type, []).append(question)
+            if question.get('has_conditions'):
+                for trigger in dict.fromkeys(_QUESTION_REF.findall(question.get('conditions', ''))):
+                    by_condition.setdefault(trigger, []).append(question)
+
+        self.questions: Tuple[Mapping[str, Any], ...] = tuple(frozen_questions)
+        self.by_id: Mapping[str, Mapping[str, Any]] = MappingProxyType(by_id)
+        self.by_category = MappingProxyType({k: tuple(v) for k, v in by_category.items()})
+        self.by_visit_type = MappingProxyType({k: tuple(v) for k, v in by_visit_type.items()})
+        self.by_condition = MappingProxyType({k: tuple(v) for k, v in by_condition.items()})
+        self.max_scores: Mapping[str, int] = MappingProxyType(max_scores)
+        self.sections: Mapping[str, str] = MappingProxyType(sections)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, name):
+            raise AttributeError(f"QuestionBank is immutable ({name})")
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "QuestionBank":
+        # Universal newlines, like the text-mode reads this replaces
+        reader = csv.DictReader(io.StringIO(raw.decode("utf-8"), newline=None))
+        return cls(list(reader), hashlib.sha1(raw).hexdigest()[:12])
+
+    @classmethod
+    def from_csv(cls, filename: str = QUESTIONS_CSV) -> "QuestionBank":
+        with open(filename, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    @classmethod
+    def fallback(cls) -> "QuestionBank":
+        return cls([], "fallback", questions=get_fallback_questions())
+
+    def get(self, question_id: str) -> Optional[Mapping[str, Any]]:
+        return self.by_id.get(question_id)
+
+    def in_category(self, category: str) -> Tuple[Mapping[str, Any], ...]:
+        return self.by_category.get(category, ())
+
+    def for_visit_type(self, visit_type: str) -> Tuple[Mapping[str, Any], ...]:
+        """Questions asked on a visit type; 'Enquiry/ Transaction' rows match both"""
+        return self.by_visit_type.get(visit_type, ())
+
+    def triggered_by(self, question_id: str) -> Tuple[Mapping[str, Any], ...]:
+        """Conditional questions whose show/hide rule references ``question_id``"""
+        return self.by_condition.get(question_id, ())
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """Fresh, mutable copies of the questions (safe to modify or serialize)"""
+        return [_thaw(q) for q in self.questions]
+
+_BANK: Optional[QuestionBank] = None
+_BANK_STAMP: Optional[Tuple[str, int, int]] = None  # (path, mtime_ns, size) the bank was checked against
+_BANK_LOCK = threading.Lock()
+
+def _load_question_bank(filename: str, current: Optional[QuestionBank]) -> QuestionBank:
+    """Build a bank for ``filename``, reusing ``current`` when the content is unchanged.
+
+    On a read or parse error the current bank is kept (fallback questions if none).
+    """
+    try:
+        with open(filename, "rb") as f:
+            raw = f.read()
+        if current is not None and current.version == hashlib.sha1(raw).hexdigest()[:12]:
+            return current
+        return QuestionBank.from_bytes(raw)
     except FileNotFoundError:
         print(f"Warning: questions.csv not found at {filename}")
-        return get_fallback_questions()
     except Exception as e:
         print(f"Error parsing questions.csv: {e}")
-        return get_fallback_questions()
-    
-    # Convert dict to list, preserving order by question ID
-    questions = list(questions_dict.values())
-    return questions
+    return current if current is not None else QuestionBank.fallback()
+
+def get_question_bank() -> QuestionBank:
+    """The process-wide question bank, rebuilt when questions.csv changes on disk"""
+    global _BANK, _BANK_STAMP
+    filename = QUESTIONS_CSV
+    try:
+        stat = os.stat(filename)
+        stamp = (filename, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = (filename, 0, -1)
+    bank = _BANK
+    if bank is not None and stamp == _BANK_STAMP:
+        TELEMETRY.cache("question_bank", hit=True)
+        return bank
+    TELEMETRY.cache("question_bank", hit=False)
+    with _BANK_LOCK:
+        if _BANK is None or stamp != _BANK_STAMP:
+            _BANK = _load_question_bank(filename, _BANK)
+            _BANK_STAMP = stamp
+        return _BANK
+
+def parse_questions_from_csv() -> List[Dict[str, Any]]:
+    """Parse the comprehensive questions.csv file (bypasses the cached bank)"""
+    return _load_question_bank(QUESTIONS_CSV, None).as_dicts()
 
 def get_fallback_questions() -> List[Dict[str, Any]]:
     """Fallback questions if CSV parsing fails"""
@@ -140,21 +305,11 @@ def get_fallback_questions() -> List[Dict[str, Any]]:
 
 def get_questions():
     """Returns all parsed questions from CSV"""
-    return parse_questions_from_csv()
+    return get_question_bank().as_dicts()
 
 def get_questions_by_category():
     """Group questions by category for better organization"""
-    questions = get_questions()
-    categories = {}
-    
-    # Add sequential display numbers to all questions
-    for i, q in enumerate(questions, 1):
-        q['display_number'] = i
-    
-    for q in questions:
-        category = q.get('category', 'Other')
-        if category not in categories:
-            categories[category] = []
-        categories[category].append(q)
-    
-    return categories
+    return {
+        category: [_thaw(q) for q in questions]
+        for category, questions in get_question_bank().by_category.items()
+    }
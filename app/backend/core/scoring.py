@@ -0,0 +1,101 @@
+"""Precompiled scoring rules.
+
+A :class:`ScoringPlan` is built once from the question bank (question -> section,
+question -> max score) and the main-section weights. Scoring a submission is
+then a single pass over its answers into per-section accumulators instead of
+re-grouping the whole question bank for every submission.
+"""
+import hashlib
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+
+class ScoringPlan:
+    """Question-to-main-section index with precomputed section maxima."""
+
+    __slots__ = ("sections", "weights", "section_max", "section_counts", "question_index", "version")
+
+    def __init__(self, section_weights: Mapping[str, Mapping[str, Any]],
+                 question_sections: Mapping[str, str],
+                 question_max_scores: Mapping[str, int]):
+        self.sections: List[str] = []
+        self.weights: List[float] = []
+        self.section_max: List[int] = []
+        self.section_counts: List[int] = []
+        self.question_index: Dict[str, int] = {}
+
+        # Questions of each criteria section, in question bank order
+        by_section: Dict[str, List[str]] = {}
+        for question_id, section in question_sections.items():
+            by_section.setdefault(section, []).append(question_id)
+
+        for main_section, config in section_weights.items():
+            question_ids = [
+                question_id
+                for section_name in config['sections']
+                for question_id in by_section.get(section_name, [])
+            ]
+            if not question_ids:
+                continue
+            index = len(self.sections)
+            self.sections.append(main_section)
+            self.weights.append(config['weight'])
+            self.section_max.append(sum(question_max_scores.get(q, 1) for q in question_ids))
+            self.section_counts.append(len(question_ids))
+            for question_id in question_ids:
+                self.question_index[question_id] = index
+
+        # Stamped on stored scores so they can be recomputed when the rules change
+        fingerprint = repr((self.sections, self.weights, self.section_max, sorted(self.question_index.items())))
+        self.version: str = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+    def score(self, scores: Iterable[Any]) -> Dict[str, Any]:
+        """Score answers (objects with ``question_id`` and ``score``).
+
+        Unanswered questions count as 0; when a question is answered more than
+        once only the first answer counts.
+        """
+        return self.score_answers((item.question_id, item.score) for item in scores)
+
+    def score_answers(self, answers: Iterable[Tuple[str, int]]) -> Dict[str, Any]:
+        """Like :meth:`score`, for ``(question_id, score)`` pairs."""
+        totals = [0] * len(self.sections)
+        question_index = self.question_index
+        seen = set()
+        for question_id, score in answers:
+            index = question_index.get(question_id)
+            if index is None or question_id in seen:
+                continue
+            seen.add(question_id)
+            totals[index] += score
+        return self.summarize(totals)
+
+    def summarize(self, totals: List[int]) -> Dict[str, Any]:
+        """Build the section/overall breakdown from per-section raw totals."""
+        section_scores = {}
+        total_weighted_score = 0
+        total_weight = 0
+        for index, main_section in enumerate(self.sections):
+            section_max = self.section_max[index]
+            if section_max <= 0:
+                continue
+            section_percentage = totals[index] / section_max
+            weight = self.weights[index]
+            weighted_score = round(section_percentage * weight, 4)
+            section_scores[main_section] = {
+                'score': round(section_percentage, 4),
+                'weight': weight,
+                'weighted_score': weighted_score,
+                'questions_count': self.section_counts[index],
+                'raw_total': totals[index],
+                'raw_max': section_max
+            }
+            total_weighted_score += weighted_score
+            total_weight += weight
+
+        overall_score = total_weighted_score / total_weight if total_weight > 0 else 0
+        return {
+            'section_scores': section_scores,
+            'overall_score': round(overall_score, 4),
+            'total_weighted_score': round(total_weighted_score, 4),
+            'total_weight_used': round(total_weight, 4)
+        }
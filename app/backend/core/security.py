@@ -14,11 +14,14 @@ ALLOWED_TAGS: list[str] = []  # no HTML allowed in text fields
 
 _ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,50}$")
 _CHANNEL_PATTERN = re.compile(r"^[A-Z_]{2,30}$")
+# Text bleach would return unchanged: no markup/entity characters, no control characters
+_PLAIN_TEXT = re.compile(r"[^<>&\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]*\Z")
 
 def sanitize_text(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
-    cleaned = bleach.clean(value, tags=ALLOWED_TAGS, strip=True)
+    # Identifiers and most comments are plain text; skip the HTML parser for them
+    cleaned = value if _PLAIN_TEXT.match(value) else bleach.clean(value, tags=ALLOWED_TAGS, strip=True)
     cleaned = re.sub(r"\s+", " ", cleaned).strip()
     return cleaned[:500]
 
@@ -0,0 +1,214 @@
+"""Prometheus text-format telemetry, without a client library.
+
+:class:`PrometheusMiddleware` records every API request under its route
+template (``/admin/submissions/{submission_id}``, never the raw path),
+method and status code, with a latency histogram per route. Unmatched
+paths share one ``unmatched`` label and unusual methods ``OTHER``, so the
+number of series stays bounded whatever clients send.
+
+Services add their own measurements to :data:`TELEMETRY` (scoring time,
+submissions saved, cache hits and misses); point-in-time gauges such as the
+number of stored submissions are collected when ``/admin/prometheus`` is
+scraped. Values are per process: with several workers each scrape sees the
+worker that answered it.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PREFIX = "mystery_shopper_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency (seconds); the survey SLO sits around 100-250 ms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Scoring one submission with the compiled plan takes tens of microseconds
+SCORING_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+# Help text of the counters services increment with Telemetry.count
+COUNTER_HELP = {
+    "submissions_saved_total": "Submissions stored (single and batch).",
+    "submissions_rejected_total": "Submissions rejected by validation.",
+    "aggregate_rebuilds_total": "Full rebuilds of the dashboard aggregates from the store.",
+    "idempotent_replays_total": "Retried submissions answered with the originally stored one.",
+}
+
+# (label name, value) pairs
+Labels = Tuple[Tuple[str, str], ...]
+# (name, help, type, [(labels, value)]) for one metric family
+Family = Tuple[str, str, str, List[Tuple[Labels, float]]]
+
+
+class Histogram:
+    """Bucketed observations (the buckets are upper bounds; +Inf is implicit)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: Labels) -> List[Tuple[str, Labels, float]]:
+        out = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            out.append((name + "_bucket", labels + (("le", _format_value(bound)),), cumulative))
+        out.append((name + "_sum", labels, self.sum))
+        out.append((name + "_count", labels, self.count))
+        return out
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Telemetry:
+    """Process-wide counters and histograms (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests: Dict[Tuple[str, str, str], int] = {}
+            self.latency: Dict[Tuple[str, str], Histogram] = {}
+            self.in_flight = 0
+            self.scoring = Histogram(SCORING_BUCKETS)
+            self.counters: Dict[str, int] = {}
+            # cache name -> [hits, misses]
+            self.caches: Dict[str, List[int]] = {}
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get((method, route))
+            if histogram is None:
+                histogram = self.latency[(method, route)] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_scoring(self, seconds: float) -> None:
+        with self._lock:
+            self.scoring.observe(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def cache(self, name: str, hit: bool) -> None:
+        with self._lock:
+            totals = self.caches.setdefault(name, [0, 0])
+            totals[0 if hit else 1] += 1
+
+    def families(self) -> List[Family]:
+        # Copied under the lock, rendered without it
+        with self._lock:
+            requests = [((("method", m), ("route", r), ("status", s)), n) for (m, r, s), n in sorted(self.requests.items())]
+            latency = [((("method", m), ("route", r)), _copy(h)) for (m, r), h in sorted(self.latency.items())]
+            scoring = _copy(self.scoring)
+            in_flight = self.in_flight
+            counters = sorted(self.counters.items())
+            caches = [(name, list(totals)) for name, totals in sorted(self.caches.items())]
+        families: List[Family] = [
+            ("http_requests_total", "API requests by method, route template and status code.", "counter", requests),
+            ("http_request_duration_seconds", "API request latency by method and route template.", "histogram", latency),
+            ("http_requests_in_flight", "API requests being served.", "gauge", [((), in_flight)]),
+            ("scoring_duration_seconds", "Time to score one submission with the compiled scoring plan.", "histogram",
+             [((), scoring)]),
+            ("cache_requests_total", "Cache lookups by cache and result.", "counter",
+             [((("cache", name), ("result", result)), totals[index])
+              for name, totals in caches for index, result in ((0, "hit"), (1, "miss"))]),
+            ("process_start_time_seconds", "Start time of the process since the Unix epoch.", "gauge",
+             [((), self.started_at)]),
+        ]
+        families.extend((name, COUNTER_HELP.get(name, "Events counted by the service."), "counter", [((), value)])
+                        for name, value in counters)
+        return families
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    clone = Histogram(histogram.buckets)
+    clone.counts = list(histogram.counts)
+    clone.sum = histogram.sum
+    clone.count = histogram.count
+    return clone
+
+
+def render(families: Iterable[Family]) -> str:
+    """Prometheus text exposition (format 0.0.4) for metric families."""
+    lines = []
+    for name, help_text, kind, samples in families:
+        name = PREFIX + name
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if isinstance(value, Histogram):
+                for sample_name, sample_labels, sample_value in value.samples(name, labels):
+                    lines.append(f"{sample_name}{_format_labels(sample_labels)} {_format_value(sample_value)}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+TELEMETRY = Telemetry()
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording request counts, status codes and latency per route template."""
+
+    def __init__(self, app: ASGIApp, telemetry: Optional[Telemetry] = None):
+        self.app = app
+        self.telemetry = telemetry or TELEMETRY
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500  # unless the app starts a response
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.telemetry.request_started()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope on the way in
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+            self.telemetry.request_finished(method, route, status, time.perf_counter() - started)
@@ -0,0 +1,142 @@
+"""Per-request span timings: ``Server-Timing`` header and slow-request log.
+
+:class:`ServerTimingMiddleware` starts a :class:`RequestTimings` for every
+API request; code along the submission pipeline wraps its steps in
+:func:`span` (validate, sanitize, questions, score, store, aggregate). Spans
+record self time: a span nested in another (sanitize runs inside pydantic
+validation) is subtracted from its parent, and repeated spans (one score per
+batch item) add up. Outside a request :func:`span` does nothing.
+
+The spans go out as ``Server-Timing: validate;dur=0.41, sanitize;dur=0.08,
+..., total;dur=2.3`` (milliseconds; browser dev tools show them), and
+requests slower than ``MYSTERY_SHOPPER_SLOW_REQUEST_MS`` are kept, with
+their spans, in a ring buffer that ``GET /admin/slow-requests`` returns.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SLOW_REQUEST_MS_ENV = "MYSTERY_SHOPPER_SLOW_REQUEST_MS"
+DEFAULT_SLOW_REQUEST_MS = 250.0
+DEFAULT_SLOW_LOG_SIZE = 100
+
+
+class RequestTimings:
+    """Span self times (ms) of one request, in first-seen order."""
+
+    __slots__ = ("started", "spans", "_children")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        # Time spent in child spans of each open span, innermost last
+        self._children: List[float] = []
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self) -> str:
+        entries = [f"{name};dur={ms:.2f}" for name, ms in self.spans.items()]
+        entries.append(f"total;dur={self.elapsed_ms():.2f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a step of the current request (no-op outside one)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    # Listed in the order spans start, so an inner span follows its parent
+    timings.spans.setdefault(name, 0.0)
+    children = timings._children
+    children.append(0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        nested = children.pop()
+        timings.spans[name] += elapsed - nested
+        if children:
+            children[-1] += elapsed
+
+
+class SlowRequestLog:
+    """Ring buffer of the most recent requests slower than ``threshold_ms``."""
+
+    def __init__(self, threshold_ms: Optional[float] = None, size: int = DEFAULT_SLOW_LOG_SIZE):
+        if threshold_ms is None:
+            threshold_ms = float(os.environ.get(SLOW_REQUEST_MS_ENV, DEFAULT_SLOW_REQUEST_MS))
+        self.threshold_ms = threshold_ms
+        self._entries: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        if entry["duration_ms"] < self.threshold_ms:
+            return
+        with self._lock:
+            self._entries.append(entry)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest first."""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+SLOW_REQUESTS = SlowRequestLog()
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding a ``Server-Timing`` header and logging slow requests."""
+
+    def __init__(self, app: ASGIApp, slow_log: Optional[SlowRequestLog] = None):
+        self.app = app
+        self.slow_log = slow_log or SLOW_REQUESTS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500  # unless the app starts a response
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", timings.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.slow_log.record({
+                "at": datetime.now(timezone.utc).isoformat(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status,
+                "duration_ms": round(timings.elapsed_ms(), 2),
+                "spans_ms": {name: round(ms, 2) for name, ms in timings.spans.items()},
+            })
@@ -0,0 +1 @@
+"""Persistence package (SQLAlchemy models, engine setup and repositories)."""
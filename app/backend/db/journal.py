@@ -0,0 +1,419 @@
+"""Append-only submission journal.
+
+The ``journal`` store keeps submissions in memory exactly like the ``memory``
+backend and makes them durable by appending every change to a journal file
+before acknowledging it:
+
+- entries are JSON objects framed as ``<length:u32><crc32:u32><body>`` (big
+  endian), each carrying a monotonically increasing ``seq``
+- ``add`` entries hold one submission, ``add_many`` entries a batch stored
+  all or nothing, ``scores`` entries a batch of re-stamped score breakdowns;
+  a submission stored with an idempotency key carries it as ``idempotency``
+- group commit: a writer appends its entry, then waits until it is fsynced.
+  The first waiter leads a commit, sleeps for the commit window so concurrent
+  writers can join, and issues a single fsync for all of them
+- on open the latest snapshot is loaded and the journal entries after it are
+  replayed; a torn tail left by a crash mid-append is cut off
+- every ``snapshot_every`` entries the whole store is written to a new
+  snapshot (temp file + rename) and the journal entries it covers are cut
+  off, so restart time stays bounded by the snapshot size instead of the
+  write history. Writers only wait while the record list is copied and while
+  the journal file is swapped, not while the snapshot is written
+
+Configuration (environment):
+
+- ``MYSTERY_SHOPPER_JOURNAL_DIR``: directory holding ``snapshot.bin`` and
+  ``journal.bin`` (default ``mystery_shopper_journal`` in the working directory)
+- ``MYSTERY_SHOPPER_JOURNAL_COMMIT_MS``: group commit window in milliseconds
+  (default 2; 0 syncs immediately)
+- ``MYSTERY_SHOPPER_JOURNAL_SNAPSHOT_EVERY``: journal entries between
+  snapshots (default 10000)
+"""
+import json
+import logging
+import os
+import shutil
+import struct
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..core.telemetry import Family
+from ..schemas.survey import LatencySample, QuestionScore, ScoredSubmission, SurveySubmissionIn
+from .records import QUESTION_ORDINALS, SubmissionRecord
+from .repository import (
+    IdempotencyClaim, InMemorySubmissionRepository, NewSubmission, ScoreUpdate, _build_scored_submission
+)
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR_ENV = "MYSTERY_SHOPPER_JOURNAL_DIR"
+COMMIT_MS_ENV = "MYSTERY_SHOPPER_JOURNAL_COMMIT_MS"
+SNAPSHOT_EVERY_ENV = "MYSTERY_SHOPPER_JOURNAL_SNAPSHOT_EVERY"
+DEFAULT_JOURNAL_DIR = "mystery_shopper_journal"
+DEFAULT_COMMIT_MS = 2.0
+DEFAULT_SNAPSHOT_EVERY = 10_000
+# Records encoded per read lock hold while writing a snapshot
+SNAPSHOT_SLICE = 1000
+
+JOURNAL_FILE = "journal.bin"
+SNAPSHOT_FILE = "snapshot.bin"
+
+# Entry header: body length, CRC32 of the body
+_HEADER = struct.Struct(">II")
+
+
+def encode_entry(entry: Dict[str, Any]) -> bytes:
+    """Frame one journal entry."""
+    body = json.dumps(entry, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def iter_entries(f: BinaryIO) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """``(entry, end offset)`` for each intact entry; stops at the first torn or corrupt one."""
+    offset = f.tell()
+    while True:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        length, crc = _HEADER.unpack(header)
+        body = f.read(length)
+        if len(body) < length or zlib.crc32(body) != crc:
+            return
+        offset += _HEADER.size + length
+        yield json.loads(body), offset
+
+
+def _record_entry(record: SubmissionRecord, idempotency: Optional[IdempotencyClaim] = None) -> Dict[str, Any]:
+    ids = QUESTION_ORDINALS.ids
+    comments = record.comments or {}
+    entry = {
+        "op": "add",
+        "id": record.id,
+        "created_at": record.created_at.isoformat(),
+        "channel": record.channel,
+        "location_code": record.location_code,
+        "shopper_id": record.shopper_id,
+        "visit_datetime": record.visit_datetime.isoformat(),
+        "scores": [[question_id, score, comments.get(position)]
+                   for position, (question_id, score) in enumerate(record.answers())],
+        "latency": [[ids[ordinal], ms] for ordinal, ms in zip(record.latency_ordinals, record.latency_ms)],
+        "score_data": record.score_data(),
+        "scoring_version": record.scoring_version,
+    }
+    if idempotency is not None:
+        entry["idempotency"] = list(idempotency)
+    return entry
+
+
+def _entry_claim(entry: Dict[str, Any]) -> Optional[IdempotencyClaim]:
+    claim = entry.get("idempotency")
+    return tuple(claim) if claim is not None else None
+
+
+def _entry_record(entry: Dict[str, Any]) -> SubmissionRecord:
+    # Journaled payloads were validated and sanitized when first saved
+    payload = SurveySubmissionIn.model_construct(
+        channel=entry["channel"],
+        location_code=entry["location_code"],
+        shopper_id=entry["shopper_id"],
+        visit_datetime=datetime.fromisoformat(entry["visit_datetime"]),
+        scores=[QuestionScore.model_construct(question_id=q, score=s, comment=c) for q, s, c in entry["scores"]],
+        latency_samples=[LatencySample.model_construct(question_id=q, ms=ms) for q, ms in entry["latency"]],
+    )
+    return SubmissionRecord(entry["id"], datetime.fromisoformat(entry["created_at"]), payload,
+                            entry["score_data"], entry["scoring_version"])
+
+
+def _fsync_directory(directory: str) -> None:
+    """Make a rename or file creation in ``directory`` durable (not supported on Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JournalWriter:
+    """Appends entries to the journal file and makes them durable with group commit."""
+
+    def __init__(self, path: str, commit_window: float = DEFAULT_COMMIT_MS / 1000, seq: int = 0):
+        self.path = path
+        self.commit_window = commit_window
+        self._file = open(path, "ab")
+        self._cond = threading.Condition()
+        self._committing = False
+        self._durable = seq
+        # Last appended sequence number
+        self.seq = seq
+        # Entries appended since the journal was last emptied
+        self.entries = 0
+        # fsyncs issued, for monitoring group commit efficiency
+        self.commits = 0
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """Buffer ``entry`` and return its sequence number (not durable until :meth:`commit`)."""
+        with self._cond:
+            self.seq += 1
+            entry["seq"] = self.seq
+            self._file.write(encode_entry(entry))
+            self.entries += 1
+            return self.seq
+
+    def commit(self, seq: int) -> None:
+        """Block until entry ``seq`` is on disk, sharing one fsync with concurrent writers."""
+        with self._cond:
+            while self._durable < seq:
+                if self._committing:
+                    self._cond.wait()
+                    continue
+                self._committing = True
+                try:
+                    if self.commit_window > 0:
+                        # Nobody notifies while we lead, so this sleeps with the lock released
+                        self._cond.wait(self.commit_window)
+                    target = self.seq
+                    self._file.flush()
+                    fd = self._file.fileno()
+                    self._cond.release()
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        self._cond.acquire()
+                    self._durable = max(self._durable, target)
+                    self.commits += 1
+                finally:
+                    self._committing = False
+                    self._cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        """Entries appended but not yet fsynced (the group commit queue)."""
+        with self._cond:
+            return self.seq - self._durable
+
+    def position(self) -> Tuple[int, int, int]:
+        """``(seq, byte offset, entries)`` at the end of the journal, once it is all on disk."""
+        with self._cond:
+            self.commit(self.seq)
+            return self.seq, self._file.tell(), self.entries
+
+    def cut(self, offset: int, entries: int) -> None:
+        """Drop the first ``offset`` bytes (``entries`` entries) once a snapshot covers them.
+
+        Entries appended since are copied to a new file that replaces the
+        journal, so they stay in it and are durable afterwards.
+        """
+        with self._cond:
+            # The leader of a group commit fsyncs the current file without holding the lock
+            while self._committing:
+                self._cond.wait()
+            self._file.flush()
+            temp_path = self.path + ".tmp"
+            with open(self.path, "rb") as source, open(temp_path, "wb") as target:
+                source.seek(offset)
+                shutil.copyfileobj(source, target)
+                target.flush()
+                os.fsync(target.fileno())
+            self._file.close()
+            os.replace(temp_path, self.path)
+            _fsync_directory(os.path.dirname(self.path))
+            self._file = open(self.path, "ab")
+            self._durable = self.seq
+            self.entries -= entries
+
+    def close(self) -> None:
+        with self._cond:
+            if self._file.closed:
+                return
+            self.commit(self.seq)
+            self._file.close()
+
+
+class JournalSubmissionRepository(InMemorySubmissionRepository):
+    """In-memory store persisted through an append-only journal (see module docstring)."""
+
+    backend = "journal"
+
+    def __init__(self, directory: str = None, commit_window: Optional[float] = None,
+                 snapshot_every: Optional[int] = None):
+        super().__init__()
+        self.directory = os.path.abspath(directory or os.environ.get(JOURNAL_DIR_ENV) or DEFAULT_JOURNAL_DIR)
+        if commit_window is None:
+            commit_window = float(os.environ.get(COMMIT_MS_ENV, DEFAULT_COMMIT_MS)) / 1000
+        self.snapshot_every = snapshot_every or int(os.environ.get(SNAPSHOT_EVERY_ENV, DEFAULT_SNAPSHOT_EVERY))
+        self.snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(self.directory, JOURNAL_FILE)
+        # One snapshot at a time; taken before the store lock, never while holding it
+        self._compact_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+        seq = self._load_snapshot()
+        seq, replayed = self._replay_journal(seq)
+        self._journal = JournalWriter(self.journal_path, commit_window, seq)
+        self._journal.entries = replayed
+        _fsync_directory(self.directory)
+        self._maybe_compact()
+
+    def _load_snapshot(self) -> int:
+        """Load the snapshot, if any, and return the last sequence number it covers."""
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, "rb") as f:
+            entries = iter_entries(f)
+            header = next(entries, (None, 0))[0]
+            if header is None or header.get("op") != "snapshot":
+                raise RuntimeError(f"Corrupt journal snapshot: {self.snapshot_path}")
+            loaded = 0
+            for entry, _ in entries:
+                self._insert(_entry_record(entry), _entry_claim(entry))
+                loaded += 1
+        # Snapshots are renamed into place complete, so a short one is damage, not a crash
+        if loaded != header["count"]:
+            raise RuntimeError(f"Corrupt journal snapshot: {self.snapshot_path} "
+                               f"({loaded} of {header['count']} submissions readable)")
+        self._next_id = header["next_id"]
+        return header["seq"]
+
+    def _replay_journal(self, seq: int) -> Tuple[int, int]:
+        """Apply journal entries newer than ``seq``; returns (last seq, entries applied)."""
+        if not os.path.exists(self.journal_path):
+            return seq, 0
+        replayed = 0
+        valid_size = 0
+        with open(self.journal_path, "rb") as f:
+            for entry, valid_size in iter_entries(f):
+                # Entries at or below the snapshot's seq survived a crash before truncation
+                if entry["seq"] <= seq:
+                    continue
+                self._apply(entry)
+                seq = entry["seq"]
+                replayed += 1
+            size = f.seek(0, os.SEEK_END)
+        if valid_size < size:
+            logger.warning("Discarding %d bytes of torn journal tail in %s", size - valid_size, self.journal_path)
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valid_size)
+                os.fsync(f.fileno())
+        return seq, replayed
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        op = entry["op"]
+        if op == "add":
+            self._insert(_entry_record(entry), _entry_claim(entry))
+        elif op == "add_many":
+            for submission in entry["submissions"]:
+                self._insert(_entry_record(submission), _entry_claim(submission))
+        elif op == "scores":
+            super().update_scores(entry["updates"], entry["version"])
+        else:
+            raise RuntimeError(f"Unknown journal entry: {op}")
+
+    def add(self, payload: SurveySubmissionIn, created_at: datetime, score_data: Dict[str, Any],
+            scoring_version: str, idempotency: Optional[IdempotencyClaim] = None) -> ScoredSubmission:
+        with self._lock.write():
+            self._check_keys([idempotency])
+            record = SubmissionRecord(self._allocate_ids(1), created_at, payload, score_data, scoring_version)
+            seq = self._journal.append(_record_entry(record, idempotency))
+            self._insert(record, idempotency)
+        self._journal.commit(seq)
+        self._maybe_compact()
+        return _build_scored_submission(record.id, created_at, payload, score_data, scoring_version)
+
+    def add_many(self, items: Iterable[NewSubmission],
+                 idempotency: Optional[Sequence[Optional[IdempotencyClaim]]] = None) -> List[ScoredSubmission]:
+        items = list(items)
+        if not items:
+            return []
+        claims = idempotency or [None] * len(items)
+        with self._lock.write():
+            self._check_keys(claims)
+            first_id = self._allocate_ids(len(items))
+            records = [
+                SubmissionRecord(first_id + index, created_at, payload, score_data, scoring_version)
+                for index, (payload, created_at, score_data, scoring_version) in enumerate(items)
+            ]
+            # One entry, so a crash keeps either the whole batch or none of it
+            seq = self._journal.append({"op": "add_many", "submissions": [
+                _record_entry(record, claim) for record, claim in zip(records, claims)
+            ]})
+            for record, claim in zip(records, claims):
+                self._insert(record, claim)
+        self._journal.commit(seq)
+        self._maybe_compact()
+        return [
+            _build_scored_submission(record.id, created_at, payload, score_data, scoring_version)
+            for record, (payload, created_at, score_data, scoring_version) in zip(records, items)
+        ]
+
+    def update_scores(self, updates: Iterable[ScoreUpdate], scoring_version: str) -> None:
+        updates = [[submission_id, score_data] for submission_id, score_data in updates]
+        if not updates:
+            return
+        with self._lock.write():
+            seq = self._journal.append({"op": "scores", "version": scoring_version, "updates": updates})
+            super().update_scores(updates, scoring_version)
+        self._journal.commit(seq)
+        self._maybe_compact()
+
+    def clear(self) -> None:
+        with self._compact_lock, self._lock.write():
+            super().clear()
+            self._compact()
+
+    def _maybe_compact(self) -> None:
+        # A writer arriving while a snapshot is being written leaves it to that one
+        if self._journal.entries >= self.snapshot_every and self._compact_lock.acquire(blocking=False):
+            try:
+                if self._journal.entries >= self.snapshot_every:
+                    self._compact()
+            finally:
+                self._compact_lock.release()
+
+    def compact(self) -> None:
+        """Snapshot every stored submission and cut the covered entries off the journal."""
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        with self._lock.write():
+            seq, offset, entries = self._journal.position()
+            records = list(self._items)
+            claims = self._claims_by_id()
+            next_id = self._next_id
+
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(encode_entry({"op": "snapshot", "seq": seq, "count": len(records), "next_id": next_id}))
+            for start in range(0, len(records), SNAPSHOT_SLICE):
+                # Read lock: update_scores may be re-stamping these records; its entry is after seq
+                with self._lock.read():
+                    data = b"".join(encode_entry(_record_entry(record, claims.get(record.id)))
+                                    for record in records[start:start + SNAPSHOT_SLICE])
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        _fsync_directory(self.directory)
+        # A crash before this point replays the journal over the new snapshot; seq skips the overlap
+        with self._lock.write():
+            self._journal.cut(offset, entries)
+
+    def telemetry(self) -> List[Family]:
+        journal = self._journal
+        return [
+            ("journal_pending_entries", "Journal entries waiting for a group commit fsync.", "gauge",
+             [((), journal.pending)]),
+            ("journal_entries", "Journal entries since the last snapshot.", "gauge", [((), journal.entries)]),
+            ("journal_commits_total", "Journal fsyncs; fewer than entries when commits are grouped.", "counter",
+             [((), journal.commits)]),
+        ]
+
+    def close(self) -> None:
+        self._journal.close()
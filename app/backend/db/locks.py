@@ -0,0 +1,67 @@
+"""Reader/writer lock for the process-local submission stores.
+
+Many dashboard reads can run at once; a writer (id allocation, appends,
+score updates, clear) waits for the readers in progress and runs alone.
+Waiting writers block new readers, so a steady stream of dashboard reads
+cannot starve survey submissions.
+
+The write side is reentrant, and a thread holding it may also read. Read
+sections must not nest (a waiting writer would block the inner read).
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class ReadWriteLock:
+    """Writer-preferring reader/writer lock (see module docstring)."""
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writers_waiting = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                # Reading under our own write lock
+                shared = False
+            else:
+                while self._writer is not None or self._writers_waiting:
+                    self._condition.wait()
+                self._readers += 1
+                shared = True
+        try:
+            yield
+        finally:
+            if shared:
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._condition.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._condition.notify_all()
@@ -0,0 +1,103 @@
+"""SQLAlchemy table definitions for stored survey submissions.
+
+Submissions are normalized into three tables:
+- ``submission``: one row per visit (indexed on the columns the admin views filter
+  by), including the score breakdown computed when it was saved
+- ``submission_score``: one row per answered question
+- ``latency_sample``: one row per captured voice latency sample
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import JSON, DateTime, Engine, Float, ForeignKey, Integer, SmallInteger, String, Text, inspect, text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Submission(Base):
+    __tablename__ = "submission"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    channel: Mapped[str] = mapped_column(String(30), index=True)
+    location_code: Mapped[str] = mapped_column(String(50), index=True)
+    shopper_id: Mapped[str] = mapped_column(String(50), index=True)
+    # Stored as naive UTC so range filters compare correctly; the original
+    # offset (seconds, NULL for naive input) is kept to rebuild the value.
+    visit_datetime: Mapped[datetime] = mapped_column(DateTime, index=True)
+    visit_utc_offset: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+    # Score breakdown computed at write time, stamped with the ScoringPlan
+    # version; nullable so rows written before it existed can be re-stamped.
+    overall_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)
+    total_weighted_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    total_weight_used: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    section_scores: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    scoring_version: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+
+    # Client retry key (Idempotency-Key) and a hash of the body stored under it;
+    # unique, so concurrent retries reaching different workers store one row.
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, unique=True, index=True)
+    idempotency_fingerprint: Mapped[Optional[str]] = mapped_column(String(40), nullable=True)
+
+    scores: Mapped[List["SubmissionScore"]] = relationship(
+        back_populates="submission",
+        cascade="all, delete-orphan",
+        order_by="SubmissionScore.id",
+    )
+    latency_samples: Mapped[List["SubmissionLatencySample"]] = relationship(
+        back_populates="submission",
+        cascade="all, delete-orphan",
+        order_by="SubmissionLatencySample.id",
+    )
+
+
+class SubmissionScore(Base):
+    __tablename__ = "submission_score"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    submission_id: Mapped[int] = mapped_column(
+        ForeignKey("submission.id", ondelete="CASCADE"), index=True
+    )
+    question_id: Mapped[str] = mapped_column(String(20))
+    score: Mapped[int] = mapped_column(SmallInteger)
+    comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    submission: Mapped[Submission] = relationship(back_populates="scores")
+
+
+class SubmissionLatencySample(Base):
+    __tablename__ = "latency_sample"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    submission_id: Mapped[int] = mapped_column(
+        ForeignKey("submission.id", ondelete="CASCADE"), index=True
+    )
+    question_id: Mapped[str] = mapped_column(String(20))
+    ms: Mapped[float] = mapped_column(Float)
+
+    submission: Mapped[Submission] = relationship(back_populates="latency_samples")
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Create missing tables and add columns introduced after a database was created.
+
+    Only additive, nullable changes are handled here; anything else needs a
+    proper Alembic migration.
+    """
+    Base.metadata.create_all(engine)
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            continue
+        with engine.begin() as conn:
+            for column in missing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
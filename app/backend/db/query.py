@@ -0,0 +1,112 @@
+"""Filtering, sorting and keyset (cursor) pagination for submission listings.
+
+A cursor encodes the sort key of the last row on a page plus its id, so the
+next page is fetched with ``(sort_key, id) > cursor`` (or ``<`` when sorting
+descending) instead of an ever-growing OFFSET. Datetimes are compared as naive
+UTC, the same form the SQL store keeps them in.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+
+from ..schemas.survey import ScoredSubmission
+
+SORTABLE_FIELDS = ("created_at", "visit_datetime", "overall_score", "id")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    if value.utcoffset() is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class SubmissionQuery:
+    """Filters (all optional, ranges inclusive), sort order and page position.
+
+    With ``load_answers=False`` stores may skip loading per-question scores and
+    latency samples; the returned submissions then carry empty lists for both.
+    """
+    channel: Optional[str] = None
+    location_code: Optional[str] = None
+    shopper_id: Optional[str] = None
+    visit_from: Optional[datetime] = None
+    visit_to: Optional[datetime] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    sort: str = "created_at"
+    descending: bool = True
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+    load_answers: bool = True
+
+    def __post_init__(self):
+        if self.sort not in SORTABLE_FIELDS:
+            raise ValueError(f"Unsupported sort field: {self.sort}")
+        if self.visit_from is not None:
+            self.visit_from = to_naive_utc(self.visit_from)
+        if self.visit_to is not None:
+            self.visit_to = to_naive_utc(self.visit_to)
+
+    def after(self) -> Optional[Tuple[Any, int]]:
+        """Decoded ``(sort value, id)`` position, or ``None`` for the first page."""
+        if not self.cursor:
+            return None
+        try:
+            sort, descending, value, submission_id = json.loads(base64.urlsafe_b64decode(self.cursor.encode("ascii")))
+        except (ValueError, TypeError, binascii.Error):
+            raise ValueError("Invalid cursor")
+        if sort != self.sort or descending != self.descending:
+            raise ValueError("Cursor does not match the requested sort order")
+        if sort in ("created_at", "visit_datetime"):
+            value = datetime.fromisoformat(value)
+        return value, int(submission_id)
+
+    def encode_cursor(self, submission: ScoredSubmission) -> str:
+        value = sort_value(submission, self.sort)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([self.sort, self.descending, value, submission.id])
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def matches(self, submission: ScoredSubmission) -> bool:
+        """In-Python filter, used by stores without a query engine."""
+        if self.channel is not None and submission.channel != self.channel:
+            return False
+        if self.location_code is not None and submission.location_code != self.location_code:
+            return False
+        if self.shopper_id is not None and submission.shopper_id != self.shopper_id:
+            return False
+        if self.visit_from is not None or self.visit_to is not None:
+            visit = to_naive_utc(submission.visit_datetime)
+            if self.visit_from is not None and visit < self.visit_from:
+                return False
+            if self.visit_to is not None and visit > self.visit_to:
+                return False
+        if self.min_score is not None or self.max_score is not None:
+            score = submission.overall_score
+            if score is None:
+                return False
+            if self.min_score is not None and score < self.min_score:
+                return False
+            if self.max_score is not None and score > self.max_score:
+                return False
+        return True
+
+
+@dataclass
+class SubmissionPage:
+    items: List[ScoredSubmission] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def sort_value(submission: ScoredSubmission, sort: str) -> Any:
+    value = getattr(submission, sort)
+    if isinstance(value, datetime):
+        return to_naive_utc(value)
+    return value
@@ -0,0 +1,154 @@
+"""Compact in-process representation of a stored submission.
+
+A :class:`SubmissionRecord` replaces the pydantic object graph (a
+``ScoredSubmission`` holding one ``QuestionScore`` / ``LatencySample`` model per
+answer and a dict per section) inside the in-memory store:
+
+- answers are parallel ``array('h')`` buffers of question ordinals and scores;
+  latency samples are question ordinals plus ``array('f')`` milliseconds
+- question ids are interned process-wide as small integer ordinals
+- the section breakdown is one ``array('d')`` with a shared tuple of names
+- comments are kept only when an answer has one
+
+Records are converted to pydantic models only at the API boundary
+(:meth:`SubmissionRecord.to_model`).
+"""
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..schemas.survey import LatencySample, QuestionScore, ScoredSubmission, SurveySubmissionIn
+
+# Numeric fields of one section entry, in section_values order
+SECTION_FIELDS = ("score", "weight", "weighted_score", "questions_count", "raw_total", "raw_max")
+_INTEGER_FIELDS = {"questions_count", "raw_total", "raw_max"}
+
+
+class QuestionOrdinals:
+    """Append-only question id <-> ordinal table shared by every record."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.ordinals: Dict[str, int] = {}
+
+    def ordinal(self, question_id: str) -> int:
+        ordinal = self.ordinals.get(question_id)
+        if ordinal is None:
+            # Ordinals must fit the signed 16-bit answer buffers
+            if len(self.ids) >= 32767:
+                raise OverflowError("Too many distinct question ids")
+            ordinal = self.ordinals[question_id] = len(self.ids)
+            self.ids.append(sys.intern(question_id))
+        return ordinal
+
+
+QUESTION_ORDINALS = QuestionOrdinals()
+
+# Section name tuples are identical across submissions scored by the same rules
+_SECTION_NAMES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _shared_names(names: Tuple[str, ...]) -> Tuple[str, ...]:
+    return _SECTION_NAMES.setdefault(names, names)
+
+
+class SubmissionRecord:
+    """One stored submission in a few flat buffers (see module docstring)."""
+
+    __slots__ = (
+        "id", "created_at", "channel", "location_code", "shopper_id", "visit_datetime",
+        "question_ordinals", "scores", "comments", "latency_ordinals", "latency_ms",
+        "overall_score", "total_weighted_score", "total_weight_used",
+        "section_names", "section_values", "scoring_version",
+    )
+
+    def __init__(self, submission_id: int, created_at: datetime, payload: SurveySubmissionIn,
+                 score_data: Dict[str, Any], scoring_version: str):
+        ordinal = QUESTION_ORDINALS.ordinal
+        self.id = submission_id
+        self.created_at = created_at
+        self.channel = sys.intern(payload.channel)
+        self.location_code = sys.intern(payload.location_code)
+        self.shopper_id = sys.intern(payload.shopper_id)
+        self.visit_datetime = payload.visit_datetime
+        self.question_ordinals = array("h", [ordinal(s.question_id) for s in payload.scores])
+        self.scores = array("h", [s.score for s in payload.scores])
+        # Answer position -> comment, only for answers that have one
+        self.comments: Optional[Dict[int, str]] = {
+            position: s.comment for position, s in enumerate(payload.scores) if s.comment is not None
+        } or None
+        samples = payload.latency_samples or []
+        self.latency_ordinals = array("h", [ordinal(ls.question_id) for ls in samples])
+        self.latency_ms = array("f", [ls.ms for ls in samples])
+        self.set_score_data(score_data, scoring_version)
+
+    def set_score_data(self, score_data: Dict[str, Any], scoring_version: Optional[str]) -> None:
+        section_scores = score_data.get('section_scores')
+        if section_scores is None:
+            self.section_names = None
+            self.section_values = None
+        else:
+            self.section_names = _shared_names(tuple(section_scores))
+            self.section_values = array("d", [
+                section[field] for section in section_scores.values() for field in SECTION_FIELDS
+            ])
+        self.overall_score = score_data.get('overall_score')
+        self.total_weighted_score = score_data.get('total_weighted_score')
+        self.total_weight_used = score_data.get('total_weight_used')
+        self.scoring_version = scoring_version
+
+    def section_scores(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        if self.section_names is None:
+            return None
+        values = self.section_values
+        width = len(SECTION_FIELDS)
+        return {
+            name: {
+                field: int(values[index * width + offset]) if field in _INTEGER_FIELDS else values[index * width + offset]
+                for offset, field in enumerate(SECTION_FIELDS)
+            }
+            for index, name in enumerate(self.section_names)
+        }
+
+    def score_data(self) -> Dict[str, Any]:
+        return {
+            'section_scores': self.section_scores(),
+            'overall_score': self.overall_score,
+            'total_weighted_score': self.total_weighted_score,
+            'total_weight_used': self.total_weight_used
+        }
+
+    def answers(self) -> Iterator[Tuple[str, int]]:
+        """``(question_id, score)`` pairs in answer order."""
+        ids = QUESTION_ORDINALS.ids
+        return ((ids[ordinal], score) for ordinal, score in zip(self.question_ordinals, self.scores))
+
+    def to_model(self, load_answers: bool = True) -> ScoredSubmission:
+        """The pydantic representation served by the API."""
+        scores: List[QuestionScore] = []
+        latency_samples: List[LatencySample] = []
+        if load_answers:
+            ids = QUESTION_ORDINALS.ids
+            comments = self.comments or {}
+            scores = [
+                QuestionScore.model_construct(question_id=ids[ordinal], score=score, comment=comments.get(position))
+                for position, (ordinal, score) in enumerate(zip(self.question_ordinals, self.scores))
+            ]
+            # float32 storage: round back to microsecond resolution
+            latency_samples = [
+                LatencySample.model_construct(question_id=ids[ordinal], ms=round(ms, 3))
+                for ordinal, ms in zip(self.latency_ordinals, self.latency_ms)
+            ]
+        return ScoredSubmission.model_construct(
+            id=self.id,
+            created_at=self.created_at,
+            channel=self.channel,
+            location_code=self.location_code,
+            shopper_id=self.shopper_id,
+            visit_datetime=self.visit_datetime,
+            scores=scores,
+            latency_samples=latency_samples,
+            scoring_version=self.scoring_version,
+            **self.score_data(),
+        )
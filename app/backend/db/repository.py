@@ -0,0 +1,585 @@
+"""Submission repositories.
+
+``get_repository()`` returns the process-wide repository used by the survey
+service and admin routes. The backend is chosen with ``MYSTERY_SHOPPER_STORE``:
+
+- ``sql`` (default): SQLAlchemy-backed store, SQLite/WAL unless
+  ``MYSTERY_SHOPPER_DB_URL`` points elsewhere
+- ``memory``: process-local compact records (see :mod:`.records`), lost on restart
+- ``journal``: the memory store made durable by an append-only journal
+  (see :mod:`.journal`)
+
+Every repository is safe to share between threads. The SQL store lets the
+database allocate ids, so several server processes can share one database;
+the memory and journal stores allocate ids under their reader/writer lock
+and hold one process's data, so they need a single server process.
+
+A submission can be stored with an idempotency key (see
+:mod:`app.backend.services.idempotency`). Every store accepts a key once,
+checked in the same write as the insert (a unique column in SQL), and
+:meth:`SubmissionRepository.find_idempotency_keys` looks stored keys up.
+"""
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from ..core.telemetry import Family
+from ..schemas.survey import LatencySample, QuestionScore, ScoredSubmission, SurveySubmissionIn
+from .models import Submission, SubmissionLatencySample, SubmissionScore, ensure_schema
+from .locks import ReadWriteLock
+from .records import SubmissionRecord
+from .query import SubmissionPage, SubmissionQuery, sort_value
+from .session import DB_URL_ENV, _is_sqlite_memory, create_db_engine, create_session_factory, get_database_url
+
+STORE_ENV = "MYSTERY_SHOPPER_STORE"
+DEFAULT_STORE = "sql"
+# Server processes sharing the store (set by run_app.py --workers)
+WORKERS_ENV = "MYSTERY_SHOPPER_WORKERS"
+# Backends whose data lives in one process
+PROCESS_LOCAL_STORES = ("memory", "journal")
+
+# (submission id, score breakdown) pairs for SubmissionRepository.update_scores
+ScoreUpdate = Tuple[int, Dict[str, Any]]
+# (payload, created_at, score breakdown, scoring version) for SubmissionRepository.add_many
+NewSubmission = Tuple[SurveySubmissionIn, datetime, Dict[str, Any], str]
+# (idempotency key, fingerprint of the submission body) stored with a submission
+IdempotencyClaim = Tuple[str, str]
+
+
+class DuplicateIdempotencyKey(RuntimeError):
+    """A submission with one of the idempotency keys is already stored; nothing was written."""
+
+
+def _check_claims(claims: Sequence[Optional[IdempotencyClaim]]) -> None:
+    keys = [claim[0] for claim in claims if claim is not None]
+    if len(set(keys)) < len(keys):
+        raise DuplicateIdempotencyKey("Idempotency key repeated within one write")
+
+
+def _build_scored_submission(submission_id: int, created_at: datetime, payload: SurveySubmissionIn,
+                             score_data: Dict[str, Any], scoring_version: str) -> ScoredSubmission:
+    """Build the stored representation of an already validated payload."""
+    return ScoredSubmission.model_construct(
+        id=submission_id,
+        created_at=created_at,
+        channel=payload.channel,
+        location_code=payload.location_code,
+        shopper_id=payload.shopper_id,
+        visit_datetime=payload.visit_datetime,
+        scores=[s.model_copy() for s in payload.scores],
+        latency_samples=[ls.model_copy() for ls in payload.latency_samples or []],
+        scoring_version=scoring_version,
+        **score_data,
+    )
+
+
+def _split_datetime(value: datetime) -> Tuple[datetime, Optional[int]]:
+    """Normalize to naive UTC, returning the original UTC offset in seconds."""
+    offset = value.utcoffset()
+    if offset is None:
+        return value, None
+    return value.astimezone(timezone.utc).replace(tzinfo=None), int(offset.total_seconds())
+
+
+def _join_datetime(value: datetime, offset: Optional[int]) -> datetime:
+    if offset is None:
+        return value
+    return value.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(seconds=offset)))
+
+
+class SubmissionRepository:
+    """Storage interface for survey submissions."""
+
+    backend = "abstract"
+
+    def add(self, payload: SurveySubmissionIn, created_at: datetime, score_data: Dict[str, Any],
+            scoring_version: str, idempotency: Optional[IdempotencyClaim] = None) -> ScoredSubmission:
+        """Persist a validated payload with its score breakdown and return it with its assigned id.
+
+        Raises DuplicateIdempotencyKey if the ``idempotency`` key is already stored.
+        """
+        raise NotImplementedError
+
+    def add_many(self, items: Iterable[NewSubmission],
+                 idempotency: Optional[Sequence[Optional[IdempotencyClaim]]] = None) -> List[ScoredSubmission]:
+        """Persist several validated payloads in one write (all or nothing), in order.
+
+        ``idempotency`` has one claim (or None) per item; if any key is
+        already stored nothing is written and DuplicateIdempotencyKey is raised.
+        """
+        items = list(items)
+        claims = idempotency or [None] * len(items)
+        return [self.add(*item, claim) for item, claim in zip(items, claims)]
+
+    def find_idempotency_keys(self, keys: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+        """``key -> (submission id, fingerprint)`` for the stored ones among ``keys``."""
+        raise NotImplementedError
+
+    def get(self, submission_id: int) -> Optional[ScoredSubmission]:
+        raise NotImplementedError
+
+    def get_many(self, submission_ids: Iterable[int], load_answers: bool = True) -> Dict[int, ScoredSubmission]:
+        """Submissions by id (unknown ids are left out), in one round trip."""
+        raise NotImplementedError
+
+    def list_all(self) -> List[ScoredSubmission]:
+        """All submissions in insertion (id) order."""
+        raise NotImplementedError
+
+    def list_since(self, after_id: int) -> List[ScoredSubmission]:
+        """Submissions with an id above ``after_id``, in id order."""
+        return [s for s in self.list_all() if s.id > after_id]
+
+    def query(self, query: SubmissionQuery) -> SubmissionPage:
+        """One page of filtered, sorted submissions (see :mod:`.query`)."""
+        raise NotImplementedError
+
+    def update_scores(self, updates: Iterable[ScoreUpdate], scoring_version: str) -> None:
+        """Replace stored score breakdowns, e.g. after the scoring rules changed."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def telemetry(self) -> List[Family]:
+        """Backend-specific Prometheus metric families (see :mod:`app.backend.core.telemetry`)."""
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySubmissionRepository(SubmissionRepository):
+    """Process-local store; everything is lost on restart.
+
+    Submissions are kept as compact :class:`SubmissionRecord` objects and
+    only turned into pydantic models when they are read.
+    """
+
+    backend = "memory"
+
+    def __init__(self):
+        self._items: List[SubmissionRecord] = []
+        # Primary-key index over _items
+        self._by_id: Dict[int, SubmissionRecord] = {}
+        # Idempotency key -> (submission id, fingerprint)
+        self._by_key: Dict[str, Tuple[int, str]] = {}
+        self._next_id = 1
+        # Writers (id allocation, appends, score updates) run alone; readers share
+        self._lock = ReadWriteLock()
+
+    def _allocate_ids(self, count: int) -> int:
+        """Reserve ``count`` consecutive ids and return the first; hold the write lock."""
+        first = self._next_id
+        self._next_id += count
+        return first
+
+    def _insert(self, record: SubmissionRecord, idempotency: Optional[IdempotencyClaim] = None) -> None:
+        self._items.append(record)
+        self._by_id[record.id] = record
+        if idempotency is not None:
+            key, fingerprint = idempotency
+            self._by_key[key] = (record.id, fingerprint)
+        self._next_id = max(self._next_id, record.id + 1)
+
+    def _check_keys(self, claims: Sequence[Optional[IdempotencyClaim]]) -> None:
+        """Raise DuplicateIdempotencyKey unless every key is new; hold the write lock."""
+        _check_claims(claims)
+        if any(claim is not None and claim[0] in self._by_key for claim in claims):
+            raise DuplicateIdempotencyKey("Idempotency key already stored")
+
+    def _claims_by_id(self) -> Dict[int, IdempotencyClaim]:
+        return {submission_id: (key, fingerprint) for key, (submission_id, fingerprint) in self._by_key.items()}
+
+    def add(self, payload: SurveySubmissionIn, created_at: datetime, score_data: Dict[str, Any],
+            scoring_version: str, idempotency: Optional[IdempotencyClaim] = None) -> ScoredSubmission:
+        with self._lock.write():
+            self._check_keys([idempotency])
+            record = SubmissionRecord(self._allocate_ids(1), created_at, payload, score_data, scoring_version)
+            self._insert(record, idempotency)
+        return _build_scored_submission(record.id, created_at, payload, score_data, scoring_version)
+
+    def add_many(self, items: Iterable[NewSubmission],
+                 idempotency: Optional[Sequence[Optional[IdempotencyClaim]]] = None) -> List[ScoredSubmission]:
+        items = list(items)
+        claims = idempotency or [None] * len(items)
+        with self._lock.write():
+            self._check_keys(claims)
+            first_id = self._allocate_ids(len(items))
+            records = [
+                SubmissionRecord(first_id + index, created_at, payload, score_data, scoring_version)
+                for index, (payload, created_at, score_data, scoring_version) in enumerate(items)
+            ]
+            for record, claim in zip(records, claims):
+                self._insert(record, claim)
+        return [
+            _build_scored_submission(record.id, created_at, payload, score_data, scoring_version)
+            for record, (payload, created_at, score_data, scoring_version) in zip(records, items)
+        ]
+
+    def find_idempotency_keys(self, keys: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+        with self._lock.read():
+            return {key: self._by_key[key] for key in keys if key in self._by_key}
+
+    def get(self, submission_id: int) -> Optional[ScoredSubmission]:
+        with self._lock.read():
+            record = self._by_id.get(submission_id)
+            return record.to_model() if record is not None else None
+
+    def get_many(self, submission_ids: Iterable[int], load_answers: bool = True) -> Dict[int, ScoredSubmission]:
+        with self._lock.read():
+            return {i: self._by_id[i].to_model(load_answers) for i in submission_ids if i in self._by_id}
+
+    def list_all(self) -> List[ScoredSubmission]:
+        with self._lock.read():
+            return [record.to_model() for record in self._items]
+
+    def query(self, query: SubmissionQuery) -> SubmissionPage:
+        after = query.after()
+
+        # Records expose the filtered / sorted attributes under the same names
+        def key(record):
+            value = sort_value(record, query.sort)
+            return (-1.0 if value is None else value), record.id
+
+        with self._lock.read():
+            rows = sorted((r for r in self._items if query.matches(r)), key=key, reverse=query.descending)
+            if after is not None:
+                if query.descending:
+                    rows = [r for r in rows if key(r) < after]
+                else:
+                    rows = [r for r in rows if key(r) > after]
+            page = SubmissionPage(items=[r.to_model(query.load_answers) for r in rows[:query.limit]])
+        if len(rows) > query.limit:
+            page.next_cursor = query.encode_cursor(page.items[-1])
+        return page
+
+    def update_scores(self, updates: Iterable[ScoreUpdate], scoring_version: str) -> None:
+        with self._lock.write():
+            for submission_id, score_data in updates:
+                record = self._by_id.get(submission_id)
+                if record is not None:
+                    record.set_score_data(score_data, scoring_version)
+
+    def count(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> None:
+        with self._lock.write():
+            self._items.clear()
+            self._by_id.clear()
+            self._by_key.clear()
+            self._next_id = 1
+
+
+class SqlSubmissionRepository(SubmissionRepository):
+    """SQLAlchemy-backed store over the normalized submission tables."""
+
+    backend = "sql"
+
+    def __init__(self, url: str = None):
+        self.engine = create_db_engine(url)
+        ensure_schema(self.engine)
+        self._sessions = create_session_factory(self.engine)
+
+    @staticmethod
+    def _to_out(row: Submission, load_answers: bool = True) -> ScoredSubmission:
+        scores = []
+        latency_samples = []
+        if load_answers:
+            scores = [
+                QuestionScore.model_construct(question_id=s.question_id, score=s.score, comment=s.comment)
+                for s in row.scores
+            ]
+            latency_samples = [
+                LatencySample.model_construct(question_id=ls.question_id, ms=ls.ms)
+                for ls in row.latency_samples
+            ]
+        return ScoredSubmission.model_construct(
+            id=row.id,
+            created_at=row.created_at,
+            channel=row.channel,
+            location_code=row.location_code,
+            shopper_id=row.shopper_id,
+            visit_datetime=_join_datetime(row.visit_datetime, row.visit_utc_offset),
+            scores=scores,
+            latency_samples=latency_samples,
+            overall_score=row.overall_score,
+            section_scores=row.section_scores,
+            total_weighted_score=row.total_weighted_score,
+            total_weight_used=row.total_weight_used,
+            scoring_version=row.scoring_version,
+        )
+
+    def _select_full(self):
+        return select(Submission).options(
+            selectinload(Submission.scores),
+            selectinload(Submission.latency_samples),
+        )
+
+    @staticmethod
+    def _submission_values(payload: SurveySubmissionIn, created_at: datetime, score_data: Dict[str, Any],
+                           scoring_version: str, idempotency: Optional[IdempotencyClaim] = None) -> Dict[str, Any]:
+        """Column values of the ``submission`` row (answers are child rows)."""
+        visit_datetime, visit_offset = _split_datetime(payload.visit_datetime)
+        key, fingerprint = idempotency or (None, None)
+        return {
+            'channel': payload.channel,
+            'location_code': payload.location_code,
+            'shopper_id': payload.shopper_id,
+            'visit_datetime': visit_datetime,
+            'visit_utc_offset': visit_offset,
+            'created_at': created_at,
+            'overall_score': score_data['overall_score'],
+            'section_scores': score_data['section_scores'],
+            'total_weighted_score': score_data['total_weighted_score'],
+            'total_weight_used': score_data['total_weight_used'],
+            'scoring_version': scoring_version,
+            'idempotency_key': key,
+            'idempotency_fingerprint': fingerprint,
+        }
+
+    def _to_row(self, payload: SurveySubmissionIn, created_at: datetime, score_data: Dict[str, Any],
+                scoring_version: str, idempotency: Optional[IdempotencyClaim] = None) -> Submission:
+        return Submission(
+            **self._submission_values(payload, created_at, score_data, scoring_version, idempotency),
+            scores=[
+                SubmissionScore(question_id=s.question_id, score=s.score, comment=s.comment)
+                for s in payload.scores
+            ],
+            latency_samples=[
+                SubmissionLatencySample(question_id=ls.question_id, ms=ls.ms)
+                for ls in payload.latency_samples or []
+            ],
+        )
+
+    def add(self, payload: SurveySubmissionIn, created_at: datetime, score_data: Dict[str, Any],
+            scoring_version: str, idempotency: Optional[IdempotencyClaim] = None) -> ScoredSubmission:
+        row = self._to_row(payload, created_at, score_data, scoring_version, idempotency)
+        with self._unique_keys(idempotency is not None), self._sessions.begin() as session:
+            session.add(row)
+            session.flush()
+            submission_id = row.id
+        return _build_scored_submission(submission_id, created_at, payload, score_data, scoring_version)
+
+    @contextmanager
+    def _unique_keys(self, claimed: bool):
+        """Report a write rejected by the unique idempotency key index as DuplicateIdempotencyKey"""
+        try:
+            yield
+        except IntegrityError as e:
+            if claimed:
+                raise DuplicateIdempotencyKey("Idempotency key already stored") from e
+            raise
+
+    def add_many(self, items: Iterable[NewSubmission],
+                 idempotency: Optional[Sequence[Optional[IdempotencyClaim]]] = None) -> List[ScoredSubmission]:
+        items = list(items)
+        if not items:
+            return []
+        claims = idempotency or [None] * len(items)
+        _check_claims(claims)
+        claimed = any(claim is not None for claim in claims)
+        if not self.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+            rows = [self._to_row(*item, claim) for item, claim in zip(items, claims)]
+            with self._unique_keys(claimed), self._sessions.begin() as session:
+                session.add_all(rows)
+                session.flush()
+                submission_ids = [row.id for row in rows]
+        else:
+            # Core executemany: no ORM object per answer, ids returned in parameter order
+            submissions = [self._submission_values(*item, claim) for item, claim in zip(items, claims)]
+            with self._unique_keys(claimed), self._sessions.begin() as session:
+                submission_ids = session.scalars(
+                    insert(Submission).returning(Submission.id, sort_by_parameter_order=True), submissions
+                ).all()
+                scores = [
+                    {'submission_id': submission_id, 'question_id': s.question_id, 'score': s.score, 'comment': s.comment}
+                    for submission_id, (payload, *_) in zip(submission_ids, items) for s in payload.scores
+                ]
+                samples = [
+                    {'submission_id': submission_id, 'question_id': ls.question_id, 'ms': ls.ms}
+                    for submission_id, (payload, *_) in zip(submission_ids, items) for ls in payload.latency_samples or []
+                ]
+                if scores:
+                    session.execute(insert(SubmissionScore), scores)
+                if samples:
+                    session.execute(insert(SubmissionLatencySample), samples)
+        return [
+            _build_scored_submission(submission_id, created_at, payload, score_data, scoring_version)
+            for submission_id, (payload, created_at, score_data, scoring_version) in zip(submission_ids, items)
+        ]
+
+    def find_idempotency_keys(self, keys: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        statement = select(Submission.idempotency_key, Submission.id, Submission.idempotency_fingerprint).where(
+            Submission.idempotency_key.in_(keys))
+        with self._sessions() as session:
+            return {key: (submission_id, fingerprint) for key, submission_id, fingerprint in session.execute(statement)}
+
+    def get(self, submission_id: int) -> Optional[ScoredSubmission]:
+        with self._sessions() as session:
+            row = session.scalars(self._select_full().where(Submission.id == submission_id)).first()
+            return self._to_out(row) if row is not None else None
+
+    def get_many(self, submission_ids: Iterable[int], load_answers: bool = True) -> Dict[int, ScoredSubmission]:
+        submission_ids = list(set(submission_ids))
+        if not submission_ids:
+            return {}
+        statement = self._select_full() if load_answers else select(Submission)
+        with self._sessions() as session:
+            rows = session.scalars(statement.where(Submission.id.in_(submission_ids))).all()
+            return {row.id: self._to_out(row, load_answers) for row in rows}
+
+    def list_all(self) -> List[ScoredSubmission]:
+        with self._sessions() as session:
+            rows = session.scalars(self._select_full().order_by(Submission.id)).all()
+            return [self._to_out(row) for row in rows]
+
+    def list_since(self, after_id: int) -> List[ScoredSubmission]:
+        statement = self._select_full().where(Submission.id > after_id).order_by(Submission.id)
+        with self._sessions() as session:
+            return [self._to_out(row) for row in session.scalars(statement).all()]
+
+    def query(self, query: SubmissionQuery) -> SubmissionPage:
+        after = query.after()
+        # Summary listings skip the per-question child rows entirely
+        statement = self._select_full() if query.load_answers else select(Submission)
+        for column, value in (
+            (Submission.channel, query.channel),
+            (Submission.location_code, query.location_code),
+            (Submission.shopper_id, query.shopper_id),
+        ):
+            if value is not None:
+                statement = statement.where(column == value)
+        if query.visit_from is not None:
+            statement = statement.where(Submission.visit_datetime >= query.visit_from)
+        if query.visit_to is not None:
+            statement = statement.where(Submission.visit_datetime <= query.visit_to)
+        if query.min_score is not None:
+            statement = statement.where(Submission.overall_score >= query.min_score)
+        if query.max_score is not None:
+            statement = statement.where(Submission.overall_score <= query.max_score)
+
+        sort_column = getattr(Submission, query.sort)
+        if after is not None:
+            value, submission_id = after
+            if query.sort == "id":
+                statement = statement.where(Submission.id < submission_id if query.descending
+                                            else Submission.id > submission_id)
+            elif query.descending:
+                statement = statement.where(or_(sort_column < value,
+                                                and_(sort_column == value, Submission.id < submission_id)))
+            else:
+                statement = statement.where(or_(sort_column > value,
+                                                and_(sort_column == value, Submission.id > submission_id)))
+        if query.descending:
+            statement = statement.order_by(sort_column.desc(), Submission.id.desc())
+        else:
+            statement = statement.order_by(sort_column.asc(), Submission.id.asc())
+        # One extra row tells us whether there is a next page
+        statement = statement.limit(query.limit + 1)
+
+        with self._sessions() as session:
+            rows = session.scalars(statement).all()
+            page = SubmissionPage(items=[self._to_out(row, query.load_answers) for row in rows[:query.limit]])
+        if len(rows) > query.limit:
+            page.next_cursor = query.encode_cursor(page.items[-1])
+        return page
+
+    def update_scores(self, updates: Iterable[ScoreUpdate], scoring_version: str) -> None:
+        rows = [
+            {
+                'id': submission_id,
+                'overall_score': score_data['overall_score'],
+                'section_scores': score_data['section_scores'],
+                'total_weighted_score': score_data['total_weighted_score'],
+                'total_weight_used': score_data['total_weight_used'],
+                'scoring_version': scoring_version,
+            }
+            for submission_id, score_data in updates
+        ]
+        if not rows:
+            return
+        with self._sessions.begin() as session:
+            session.execute(update(Submission), rows)
+
+    def count(self) -> int:
+        with self._sessions() as session:
+            return session.scalar(select(func.count()).select_from(Submission))
+
+    def clear(self) -> None:
+        with self._sessions.begin() as session:
+            session.execute(delete(SubmissionScore))
+            session.execute(delete(SubmissionLatencySample))
+            session.execute(delete(Submission))
+
+    def telemetry(self) -> List[Family]:
+        pool = self.engine.pool
+        if not hasattr(pool, "checkedout"):
+            return []
+        return [("db_connections_in_use", "Database connections checked out of the pool.", "gauge",
+                 [((), pool.checkedout())])]
+
+    def close(self) -> None:
+        self.engine.dispose()
+
+
+def create_repository(backend: str = None, url: str = None) -> SubmissionRepository:
+    """Create a repository for ``backend`` (defaults to ``MYSTERY_SHOPPER_STORE``)."""
+    backend = (backend or os.environ.get(STORE_ENV) or DEFAULT_STORE).lower()
+    if backend == "memory":
+        return InMemorySubmissionRepository()
+    if backend == "sql":
+        return SqlSubmissionRepository(url)
+    if backend == "journal":
+        from .journal import JournalSubmissionRepository
+        return JournalSubmissionRepository()
+    raise ValueError(f"Unknown submission store backend: {backend}")
+
+
+def server_workers() -> int:
+    return int(os.environ.get(WORKERS_ENV) or 1)
+
+
+def check_shared_store(workers: int = None, backend: str = None, url: str = None) -> None:
+    """Raise RuntimeError when ``workers`` server processes cannot share the configured store."""
+    workers = server_workers() if workers is None else workers
+    if workers <= 1:
+        return
+    backend = (backend or os.environ.get(STORE_ENV) or DEFAULT_STORE).lower()
+    if backend in PROCESS_LOCAL_STORES:
+        raise RuntimeError(f"{STORE_ENV}={backend} keeps submissions inside one process; "
+                           f"{workers} workers need the shared sql store")
+    if backend == "sql" and _is_sqlite_memory(url or get_database_url()):
+        raise RuntimeError(f"An in-memory SQLite database cannot be shared by {workers} workers; "
+                           f"point {DB_URL_ENV} at a file or server database")
+
+
+_repository: Optional[SubmissionRepository] = None
+
+
+def get_repository() -> SubmissionRepository:
+    """Process-wide repository, created on first use."""
+    global _repository
+    if _repository is None:
+        _repository = create_repository()
+    return _repository
+
+
+def set_repository(repository: Optional[SubmissionRepository]) -> None:
+    """Replace the process-wide repository (``None`` recreates it from the environment)."""
+    global _repository
+    if _repository is not None and _repository is not repository:
+        _repository.close()
+    _repository = repository
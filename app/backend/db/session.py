@@ -0,0 +1,53 @@
+"""Database engine configuration.
+
+The database URL is read from ``MYSTERY_SHOPPER_DB_URL``; when unset a local
+SQLite file (``mystery_shopper.db`` in the working directory) is used. SQLite
+connections are switched to WAL journaling so dashboard reads do not block
+survey submissions.
+"""
+import os
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+DB_URL_ENV = "MYSTERY_SHOPPER_DB_URL"
+DEFAULT_DB_FILE = "mystery_shopper.db"
+
+
+def get_database_url() -> str:
+    url = os.environ.get(DB_URL_ENV)
+    if url:
+        return url
+    return f"sqlite:///{os.path.abspath(DEFAULT_DB_FILE)}"
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:")
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_db_engine(url: str = None) -> Engine:
+    """Create an engine for ``url`` (defaults to :func:`get_database_url`)."""
+    url = url or get_database_url()
+    kwargs = {}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if _is_sqlite_memory(url):
+            # A single shared connection, otherwise every checkout sees an empty database
+            kwargs["poolclass"] = StaticPool
+    engine = create_engine(url, **kwargs)
+    if url.startswith("sqlite"):
+        event.listen(engine, "connect", _configure_sqlite)
+    return engine
+
+
+def create_session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(bind=engine, expire_on_commit=False)
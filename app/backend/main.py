@@ -1,8 +1,37 @@
+from contextlib import asynccontextmanager
+from typing import List
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import survey, admin
+from .routes import survey, admin, health
+from .core.questions import get_question_bank
+from .core.telemetry import PrometheusMiddleware
+from .core.timing import ServerTimingMiddleware
+from .core.profiling import ProfilingMiddleware
+from .db.repository import check_shared_store
+from .services.lifecycle import WarmupStage, shutdown, warm_up
+from .services.survey_service import rebuild_metrics, sync_question_bank
 
-app = FastAPI(title="Mystery Shopper Automation API", version="0.1.0")
+def api_warmup_stages() -> List[WarmupStage]:
+    """What the first requests would otherwise pay for, cheapest failure first"""
+    return [
+        # Refuse to start workers that would each see a different dataset
+        ("store", check_shared_store),
+        ("question_bank", get_question_bank),
+        # Scoring rules are rebuilt here if questions.csv changed since import
+        ("scoring_plan", sync_question_bank),
+        ("schemas", app.openapi),
+        # Dashboard aggregates from the persisted store
+        ("aggregates", rebuild_metrics),
+    ]
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    warm_up(api_warmup_stages())
+    yield
+    # Runs after uvicorn has drained in-flight requests: flush the journal / close the database
+    shutdown()
+
+app = FastAPI(title="Mystery Shopper Automation API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,9 +40,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(ProfilingMiddleware)
+# Added last, so outermost: request counts and latency include CORS handling and errors
+app.add_middleware(PrometheusMiddleware)
 
 app.include_router(survey.router, prefix="/survey", tags=["survey"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(health.router, tags=["health"])
 
 @app.get("/")
 async def root():
@@ -1,53 +1,250 @@
-from fastapi import APIRouter, Depends
-from ..services.survey_service import list_submissions, basic_metrics, calculate_section_scores
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from ..db.query import SubmissionQuery, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..schemas.survey import ScoredSubmission
+from ..services.survey_service import (
+    query_submissions, get_submission, get_score_data, get_submission_scores_batch,
+    basic_metrics, reload_scoring_rules, analytics_breakdown, question_statistics, export_submissions_csv,
+    telemetry_families
+)
+from ..services.analytics import BREAKDOWN_COLUMNS
+from ..services.importer import import_upload
+from ..services.lifecycle import request_shutdown, supervisor_pid
 from ..core.security import get_admin_auth
+from ..core.telemetry import CONTENT_TYPE, TELEMETRY, render
+from ..core.timing import SLOW_REQUESTS
+from ..core.profiling import MAX_PROFILE_SECONDS, PROFILE_MODES, PROFILER, ProfileSession
 from ..utils.question_validation import get_questions_diagnostics, validate_questions_data
 from ..utils.scoring_analysis import analyze_questions_structure, get_q51_dependencies
 
 router = APIRouter()
 
+# Fields of the admin submission representation, cheapest first
+ADMIN_FIELDS = (
+    "id", "channel", "location_code", "shopper_id", "visit_datetime", "created_at",
+    "overall_score", "scoring_version", "section_scores", "scores", "latency_samples"
+)
+# Compact default for list views: no per-question arrays or section breakdown
+SUMMARY_FIELDS = ADMIN_FIELDS[:7]
+ANSWER_FIELDS = {"scores", "latency_samples"}
+
+def _parse_fields(fields: Optional[str], default: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Parse a comma-separated ``fields=`` projection ("all" selects every field)"""
+    if not fields:
+        return default
+    if fields.strip() == "all":
+        return ADMIN_FIELDS
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in ADMIN_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned so rows can be fetched in full later
+    return tuple(dict.fromkeys(["id"] + requested))
+
+def _admin_submission(submission: ScoredSubmission, fields: Tuple[str, ...] = ADMIN_FIELDS) -> dict:
+    """Admin dashboard representation (only ``fields``), using the scores stored at write time"""
+    # Without loaded answers the stored breakdown is all there is to serve
+    answers_loaded = bool(ANSWER_FIELDS.intersection(fields))
+    score_data = get_score_data(submission) if answers_loaded else submission.score_data()
+    builders = {
+        "id": lambda: submission.id,
+        "channel": lambda: submission.channel,
+        "location_code": lambda: submission.location_code,
+        "shopper_id": lambda: submission.shopper_id,
+        "visit_datetime": lambda: submission.visit_datetime.isoformat(),
+        "created_at": lambda: submission.created_at.isoformat(),
+        "overall_score": lambda: score_data['overall_score'],
+        "scoring_version": lambda: submission.scoring_version,
+        "section_scores": lambda: score_data['section_scores'],
+        "scores": lambda: [{"question_id": s.question_id, "score": s.score, "comment": s.comment} for s in submission.scores],
+        "latency_samples": lambda: [{"question_id": ls.question_id, "ms": ls.ms} for ls in submission.latency_samples] if submission.latency_samples else [],
+    }
+    return {name: builders[name]() for name in fields}
+
+# Plain def: the page is read from the store (SQLAlchemy is synchronous)
 @router.get("/submissions")
-async def get_submissions(_: bool = Depends(get_admin_auth)):
-    """Get all submissions with calculated scores for admin dashboard"""
-    from ..services.survey_service import _DB, calculate_section_scores
+def get_submissions(
+    channel: Optional[str] = None,
+    location_code: Optional[str] = None,
+    shopper_id: Optional[str] = None,
+    visit_from: Optional[datetime] = None,
+    visit_to: Optional[datetime] = None,
+    min_score: Optional[float] = Query(None, ge=0, le=1),
+    max_score: Optional[float] = Query(None, ge=0, le=1),
+    sort: str = Query("-created_at", pattern=r"^-?(created_at|visit_datetime|overall_score|id)$",
+                      description="Sort field, prefix with '-' for descending"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or 'all' (default: summary)"),
+    _: bool = Depends(get_admin_auth)
+):
+    """Get one page of submissions with their stored scores for admin dashboard"""
+    selected = _parse_fields(fields, SUMMARY_FIELDS)
+    try:
+        query = SubmissionQuery(
+            channel=channel.upper() if channel else None,
+            location_code=location_code,
+            shopper_id=shopper_id,
+            visit_from=visit_from,
+            visit_to=visit_to,
+            min_score=min_score,
+            max_score=max_score,
+            sort=sort.lstrip("-"),
+            descending=sort.startswith("-"),
+            limit=limit,
+            cursor=cursor,
+            load_answers=bool(ANSWER_FIELDS.intersection(selected)),
+        )
+        page = query_submissions(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Convert raw submissions to admin format with calculated scores
-    admin_submissions = []
-    for submission in _DB:
-        score_data = calculate_section_scores(submission)
-        admin_submission = {
-            "id": submission.id,
-            "channel": submission.channel,
-            "location_code": submission.location_code,
-            "shopper_id": submission.shopper_id,
-            "visit_datetime": submission.visit_datetime.isoformat(),
-            "created_at": submission.created_at.isoformat(),
-            "overall_score": score_data['overall_score'],
-            "scores": [{"question_id": s.question_id, "score": s.score, "comment": s.comment} for s in submission.scores],
-            "latency_samples": [{"question_id": ls.question_id, "ms": ls.ms} for ls in submission.latency_samples] if submission.latency_samples else [],
-            "section_scores": score_data['section_scores']
-        }
-        admin_submissions.append(admin_submission)
-    
-    # Sort by most recent first
-    admin_submissions.sort(key=lambda x: x["created_at"], reverse=True)
-    return admin_submissions
+    return {
+        "items": [_admin_submission(submission, selected) for submission in page.items],
+        "next_cursor": page.next_cursor,
+        "limit": limit
+    }
 
+# Plain def: stale aggregates are rebuilt or caught up from the store first
 @router.get("/metrics")
-async def get_metrics(_: bool = Depends(get_admin_auth)):
+def get_metrics(_: bool = Depends(get_admin_auth)):
     return basic_metrics()
 
+# Plain def: counting stored submissions may query the database
+@router.get("/prometheus")
+def prometheus_metrics(_: bool = Depends(get_admin_auth)):
+    """Request, scoring, cache and store metrics in the Prometheus text format"""
+    return Response(render(TELEMETRY.families() + telemetry_families()), media_type=CONTENT_TYPE)
+
+@router.get("/slow-requests")
+async def slow_requests(
+    limit: Optional[int] = Query(None, ge=1, description="Most recent entries to return"),
+    _: bool = Depends(get_admin_auth)
+):
+    """Recent requests slower than the threshold, newest first, with their Server-Timing spans"""
+    return {"threshold_ms": SLOW_REQUESTS.threshold_ms, "requests": SLOW_REQUESTS.recent(limit)}
+
+# Plain def: waits in the threadpool while the requests being profiled run on the event loop
+@router.post("/profile")
+def profile_requests(
+    seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS, description="Longest time to profile"),
+    requests: Optional[int] = Query(None, ge=1, description="Stop after this many selected requests"),
+    routes: Optional[str] = Query(None, description="Comma-separated route prefixes, e.g. /admin/metrics (default: all)"),
+    mode: str = Query("sample", pattern=f"^({'|'.join(PROFILE_MODES)})$"),
+    _: bool = Depends(get_admin_auth)
+):
+    """Profile the next requests of this process; collapsed stacks (sample) or a .prof file (cprofile)"""
+    selected = [route.strip() for route in (routes or "").split(",") if route.strip()]
+    try:
+        session = PROFILER.run(ProfileSession(mode, seconds, requests, selected))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    body, media_type, filename = session.result()
+    return Response(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Profile-Requests": str(session.requests),
+        "X-Profile-Seconds": f"{session.elapsed:.3f}",
+        "X-Profile-Samples": str(sum(session.samples.values())),
+    })
+
+# Plain def: the rebuild reads every stored submission
+@router.post("/metrics/rebuild")
+def rebuild_metrics_endpoint(_: bool = Depends(get_admin_auth)):
+    """Reload scoring rules (e.g. after a weight change) and rebuild metrics from the store"""
+    reload_scoring_rules()
+    return basic_metrics()
+
+@router.post("/shutdown", status_code=202)
+async def shutdown_server(_: bool = Depends(get_admin_auth)):
+    """Drain and stop the server: no new connections, in-flight requests finish, the store is flushed"""
+    requested = request_shutdown()
+    return {"status": "draining", "pid": supervisor_pid(), "already_requested": not requested}
+
+# Plain def: see get_metrics
+@router.get("/analytics/breakdown")
+def get_analytics_breakdown(
+    by: str = Query("channel", pattern=f"^({'|'.join(BREAKDOWN_COLUMNS)})$"),
+    visit_from: Optional[datetime] = None,
+    visit_to: Optional[datetime] = None,
+    _: bool = Depends(get_admin_auth)
+):
+    """Submission count, average overall score and section averages per channel, location or shopper"""
+    return {"by": by, "groups": analytics_breakdown(by, visit_from, visit_to)}
+
+# Plain def: see get_metrics
+@router.get("/analytics/questions")
+def get_question_statistics(_: bool = Depends(get_admin_auth)):
+    """Answer count and average score per question"""
+    return question_statistics()
+
+# Plain def: see get_metrics; the CSV rows are then streamed from the threadpool too
+@router.get("/export.csv")
+def export_submissions(_: bool = Depends(get_admin_auth)):
+    """Every submission as CSV, one column per question (streamed)"""
+    return StreamingResponse(
+        export_submissions_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="submissions.csv"'}
+    )
+
+# Plain def: a large import runs in the threadpool instead of blocking the event loop
+@router.post("/import")
+def import_submissions_endpoint(
+    file: UploadFile = File(..., description="MS Forms / Excel export (.csv or .xlsx)"),
+    channel: Optional[str] = Query(None, description="Channel for exports without a channel column"),
+    _: bool = Depends(get_admin_auth)
+):
+    """Bulk import historical visits; uploading the same file again resumes an interrupted import"""
+    try:
+        return import_upload(file.file, file.filename or "", default_channel=channel)
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Declared before /submissions/{submission_id} so "scores" is not parsed as an id.
+# Plain def here and below: submissions are read from the store
+@router.get("/submissions/scores")
+def get_submission_scores_batch_endpoint(
+    ids: str = Query(..., description=f"Comma-separated submission ids (at most {MAX_PAGE_SIZE})"),
+    _: bool = Depends(get_admin_auth)
+):
+    """Get section scores for many submissions in one call"""
+    try:
+        submission_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(submission_ids) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} ids per request")
+    
+    scores = get_submission_scores_batch(submission_ids)
+    return {
+        "items": [{"id": i, **scores[i]} for i in submission_ids if i in scores],
+        "missing": [i for i in submission_ids if i not in scores]
+    }
+
+@router.get("/submissions/{submission_id}")
+def get_submission_detail(
+    submission_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    _: bool = Depends(get_admin_auth)
+):
+    """Get one submission (answers, latency samples and section scores) for the details view"""
+    selected = _parse_fields(fields, ADMIN_FIELDS)
+    submission = get_submission(submission_id)
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    
+    return _admin_submission(submission, selected)
+
 @router.get("/submissions/{submission_id}/scores")
-async def get_submission_scores(submission_id: int, _: bool = Depends(get_admin_auth)):
+def get_submission_scores(submission_id: int, _: bool = Depends(get_admin_auth)):
     """Get detailed section scores for a specific submission"""
-    from ..services.survey_service import _DB
-    
-    submission = next((s for s in _DB if s.id == submission_id), None)
+    submission = get_submission(submission_id)
     if not submission:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Submission not found")
     
-    return calculate_section_scores(submission)
+    return get_score_data(submission)
 
 @router.get("/questions/diagnostics")
 async def get_questions_diagnostics_endpoint(_: bool = Depends(get_admin_auth)):
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..services.lifecycle import readiness
+
+router = APIRouter()
+
+# Probes for load balancers / process managers; no API key so they work unconfigured
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: 200 once warmup completed, 503 while warming up or draining"""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["status"] == "ready" else 503)
@@ -1,13 +1,67 @@
-from fastapi import APIRouter, HTTPException
-from ..schemas.survey import SurveySubmissionIn, SurveySubmissionOut
-from ..services.survey_service import save_submission
+from typing import Dict, Optional, Union
+
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import ValidationError
+from ..schemas.survey import (
+    ScoredSubmission,
+    SurveyBatchIn,
+    SurveyBatchItemResult,
+    SurveyBatchOut,
+    SurveySubmissionIn,
+    SurveySubmissionOut,
+)
+from ..services import survey_service
+from ..services.idempotency import IdempotencyConflict
+from ..services.survey_service import describe_error, save_submission, save_submissions
 
 router = APIRouter()
 
+# Plain def: runs in the threadpool, so a store waiting on a journal group commit
+# does not block the event loop and concurrent submissions can share one fsync
 @router.post("/submit", response_model=SurveySubmissionOut)
-async def submit_survey(payload: SurveySubmissionIn):
+def submit_survey(
+    payload: SurveySubmissionIn,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key",
+                                            description="Client-generated key (e.g. a UUID per visit); retries return the original submission")
+):
     try:
-        submission = save_submission(payload)
+        submission = save_submission(payload, idempotency_key)
         return submission
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/submit/batch", response_model=SurveyBatchOut)
+def submit_survey_batch(batch: SurveyBatchIn):
+    """Validate and store many submissions in one request, with a result per item"""
+    if len(batch.submissions) > survey_service.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {survey_service.MAX_BATCH_SIZE} submissions per request"
+        )
+    results: Dict[int, Union[ScoredSubmission, ValueError]] = {}
+    valid = []
+    for index, item in enumerate(batch.submissions):
+        key = item.get("idempotency_key")
+        if key is not None and not isinstance(key, str):
+            results[index] = ValueError("idempotency_key must be a string")
+            continue
+        try:
+            valid.append((index, SurveySubmissionIn.model_validate(item), key))
+        except ValidationError as e:
+            results[index] = e
+    # Every valid item is stored in one transaction / journal entry
+    stored = save_submissions([payload for _, payload, _ in valid], [key for _, _, key in valid])
+    for (index, _, _), result in zip(valid, stored):
+        results[index] = result
+
+    items = []
+    for index in range(len(batch.submissions)):
+        result = results[index]
+        if isinstance(result, ValueError):
+            items.append(SurveyBatchItemResult(index=index, status="error", error=describe_error(result)))
+        else:
+            items.append(SurveyBatchItemResult(index=index, status="created", submission=result))
+    accepted = sum(1 for item in items if item.status == "created")
+    return SurveyBatchOut(accepted=accepted, rejected=len(items) - accepted, results=items)
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
+
+from ..core.timing import span
 
 
 class LatencySample(BaseModel):
@@ -39,22 +41,66 @@ class SurveySubmissionIn(BaseModel):
     def sanitize(self):
         # Late import to avoid circular dependencies
         from ..core.security import sanitize_text, validate_identifier, validate_channel
-        self.channel = validate_channel(self.channel)
-        self.location_code = validate_identifier(sanitize_text(self.location_code), 'location_code')
-        self.shopper_id = validate_identifier(sanitize_text(self.shopper_id), 'shopper_id')
-        # Comments sanitized
-        for s in self.scores:
-            if s.comment:
-                from ..core.security import sanitize_text as _st
-                s.comment = _st(s.comment)
-        # Validate latency sample question ids exist in provided scores (best effort)
-        if self.latency_samples:
-            score_ids = {s.question_id for s in self.scores}
-            for ls in self.latency_samples:
-                if ls.question_id not in score_ids:
-                    raise ValueError(f"Latency sample question_id not in scores: {ls.question_id}")
+        with span("sanitize"):
+            self.channel = validate_channel(self.channel)
+            self.location_code = validate_identifier(sanitize_text(self.location_code), 'location_code')
+            self.shopper_id = validate_identifier(sanitize_text(self.shopper_id), 'shopper_id')
+            # Comments sanitized
+            for s in self.scores:
+                if s.comment:
+                    from ..core.security import sanitize_text as _st
+                    s.comment = _st(s.comment)
+            # Validate latency sample question ids exist in provided scores (best effort)
+            if self.latency_samples:
+                score_ids = {s.question_id for s in self.scores}
+                for ls in self.latency_samples:
+                    if ls.question_id not in score_ids:
+                        raise ValueError(f"Latency sample question_id not in scores: {ls.question_id}")
         return self
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def timed(cls, data, handler):
+        # Defined last so it wraps field validation and sanitize (reported apart);
+        # also times the stored and response models built from this one
+        with span("validate"):
+            return handler(data)
+
 class SurveySubmissionOut(SurveySubmissionIn):
     id: int
     created_at: datetime
+
+class SurveyBatchIn(BaseModel):
+    """Submissions validated one by one, so a bad item does not reject the batch."""
+    submissions: List[Dict[str, Any]] = Field(min_length=1)
+
+class SurveyBatchItemResult(BaseModel):
+    index: int
+    status: str  # "created" or "error"
+    submission: Optional[SurveySubmissionOut] = None
+    error: Optional[str] = None
+
+class SurveyBatchOut(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[SurveyBatchItemResult]
+
+class ScoredSubmission(SurveySubmissionOut):
+    """Stored submission with the section breakdown computed when it was saved.
+
+    ``scoring_version`` is the ScoringPlan version the breakdown was computed
+    with; ``None`` means it was stored before scores were persisted.
+    """
+    overall_score: Optional[float] = None
+    section_scores: Optional[Dict[str, Dict[str, Any]]] = None
+    total_weighted_score: Optional[float] = None
+    total_weight_used: Optional[float] = None
+    scoring_version: Optional[str] = None
+
+    def score_data(self) -> Dict[str, Any]:
+        return {
+            'section_scores': self.section_scores,
+            'overall_score': self.overall_score,
+            'total_weighted_score': self.total_weighted_score,
+            'total_weight_used': self.total_weight_used
+        }
@@ -0,0 +1,215 @@
+"""Columnar in-memory copy of the stored submissions for analytics.
+
+Breakdowns and exports scan a handful of typed ``array`` columns instead of
+lists of pydantic submissions holding per-answer models:
+
+- ``ids``, ``created_at``, ``visit_datetime`` (naive UTC epoch seconds) and
+  ``overall`` as 8-byte columns
+- ``channel``, ``location`` and ``shopper`` dictionary-encoded as 4-byte codes
+- ``scores``: a row-major submissions x questions ``int8`` matrix keyed by
+  question index, ``-1`` where a question was not answered
+- ``section_scores``: a row-major submissions x main sections matrix of the
+  stored section percentages, NaN where a section was not scored
+
+A visit costs a couple of hundred bytes here. Like the metrics aggregator it
+is fed by ``save_submission`` and rebuilt from the repository on first use and
+whenever the scoring rules change.
+"""
+import csv
+import io
+import math
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..db.query import to_naive_utc
+from ..schemas.survey import SurveySubmissionOut
+
+UNANSWERED = -1
+BREAKDOWN_COLUMNS = ("channel", "location_code", "shopper_id")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(value: datetime) -> float:
+    return (to_naive_utc(value) - _EPOCH).total_seconds()
+
+
+class StringDictionary:
+    """Dictionary encoding: each distinct string is stored once and referenced by code."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarSubmissionStore:
+    """Typed-array columns for every stored submission, one row per submission."""
+
+    def __init__(self, question_ids: Sequence[str] = (), sections: Sequence[str] = ()):
+        self.question_ids = list(question_ids)
+        self.question_index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        self.sections = list(sections)
+        self.reset()
+
+    def reset(self) -> None:
+        self.built = False
+        self.ids = array("q")
+        self.created_at = array("d")
+        self.visit_datetime = array("d")
+        self.overall = array("d")
+        self.channel = array("I")
+        self.location = array("I")
+        self.shopper = array("I")
+        self.scores = array("b")
+        self.section_scores = array("d")
+        self.dictionaries = {
+            "channel": StringDictionary(),
+            "location_code": StringDictionary(),
+            "shopper_id": StringDictionary(),
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, submission: SurveySubmissionOut, score_data: Dict[str, Any]) -> None:
+        """Append one submission with its score breakdown."""
+        self.ids.append(submission.id)
+        self.created_at.append(_epoch_seconds(submission.created_at))
+        self.visit_datetime.append(_epoch_seconds(submission.visit_datetime))
+        self.overall.append(score_data['overall_score'])
+        self.channel.append(self.dictionaries["channel"].encode(submission.channel))
+        self.location.append(self.dictionaries["location_code"].encode(submission.location_code))
+        self.shopper.append(self.dictionaries["shopper_id"].encode(submission.shopper_id))
+
+        row = array("b", [UNANSWERED]) * len(self.question_ids)
+        question_index = self.question_index
+        for item in submission.scores:
+            index = question_index.get(item.question_id)
+            # First answer wins, as in scoring
+            if index is not None and row[index] == UNANSWERED:
+                row[index] = item.score
+        self.scores.extend(row)
+
+        section_scores = score_data['section_scores']
+        self.section_scores.extend(
+            section_scores[name]['score'] if name in section_scores else math.nan
+            for name in self.sections
+        )
+
+    def rebuild(self, scored: Iterable[Tuple[SurveySubmissionOut, Dict[str, Any]]]) -> None:
+        """Recompute every column from ``(submission, score_data)`` pairs."""
+        self.reset()
+        for submission, score_data in scored:
+            self.add(submission, score_data)
+        self.built = True
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the column buffers (dictionaries excluded)."""
+        columns = (self.ids, self.created_at, self.visit_datetime, self.overall, self.channel,
+                   self.location, self.shopper, self.scores, self.section_scores)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def _in_range(self, visit_from: Optional[datetime], visit_to: Optional[datetime]) -> Optional[List[bool]]:
+        if visit_from is None and visit_to is None:
+            return None
+        low = _epoch_seconds(visit_from) if visit_from is not None else -math.inf
+        high = _epoch_seconds(visit_to) if visit_to is not None else math.inf
+        return [low <= value <= high for value in self.visit_datetime]
+
+    def breakdown(self, by: str, visit_from: Optional[datetime] = None,
+                  visit_to: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """Count, average overall score and average section scores per channel, location or shopper."""
+        if by not in BREAKDOWN_COLUMNS:
+            raise ValueError(f"Unsupported breakdown: {by}")
+        codes = {"channel": self.channel, "location_code": self.location, "shopper_id": self.shopper}[by]
+        values = self.dictionaries[by].values
+        selected = self._in_range(visit_from, visit_to)
+
+        groups = len(values)
+        section_count = len(self.sections)
+        counts = [0] * groups
+        score_sums = [0.0] * groups
+        section_counts = [[0] * section_count for _ in range(groups)]
+        section_sums = [[0.0] * section_count for _ in range(groups)]
+        section_scores = self.section_scores
+        for row, (code, overall) in enumerate(zip(codes, self.overall)):
+            if selected is not None and not selected[row]:
+                continue
+            counts[code] += 1
+            score_sums[code] += overall
+            base = row * section_count
+            for index in range(section_count):
+                value = section_scores[base + index]
+                if value == value:  # skip NaN (section not scored)
+                    section_counts[code][index] += 1
+                    section_sums[code][index] += value
+
+        return {
+            values[code]: {
+                "count": counts[code],
+                "avg_score": round(score_sums[code] / counts[code], 4),
+                "section_scores": {
+                    name: round(section_sums[code][index] / section_counts[code][index], 4)
+                    for index, name in enumerate(self.sections)
+                    if section_counts[code][index]
+                }
+            }
+            for code in range(groups)
+            if counts[code]
+        }
+
+    def question_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Answer count and average score per question."""
+        question_count = len(self.question_ids)
+        answered = [0] * question_count
+        totals = [0] * question_count
+        scores = self.scores
+        for base in range(0, len(scores), question_count or 1):
+            for index in range(question_count):
+                value = scores[base + index]
+                if value != UNANSWERED:
+                    answered[index] += 1
+                    totals[index] += value
+        return {
+            question_id: {
+                "answered": answered[index],
+                "avg_score": round(totals[index] / answered[index], 4) if answered[index] else None
+            }
+            for index, question_id in enumerate(self.question_ids)
+        }
+
+    def export_csv(self, chunk_rows: int = 1000) -> Iterator[str]:
+        """CSV export (one row per submission, one column per question), in chunks."""
+        count = len(self.ids)  # rows appended while exporting are left out
+        question_count = len(self.question_ids)
+        decode = {name: dictionary.values for name, dictionary in self.dictionaries.items()}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["id", "created_at", "visit_datetime", "channel", "location_code",
+                         "shopper_id", "overall_score"] + self.question_ids)
+        for row in range(count):
+            base = row * question_count
+            writer.writerow([
+                self.ids[row],
+                datetime.utcfromtimestamp(self.created_at[row]).isoformat(),
+                datetime.utcfromtimestamp(self.visit_datetime[row]).isoformat(),
+                decode["channel"][self.channel[row]],
+                decode["location_code"][self.location[row]],
+                decode["shopper_id"][self.shopper[row]],
+                self.overall[row],
+            ] + ["" if value == UNANSWERED else value for value in self.scores[base:base + question_count]])
+            if row % chunk_rows == chunk_rows - 1:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
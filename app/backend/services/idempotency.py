@@ -0,0 +1,40 @@
+"""Idempotency keys for survey submissions.
+
+Mobile and voice clients retry submissions over flaky connections. A client
+sends the same ``Idempotency-Key`` (e.g. a UUID generated per visit) with
+every attempt; the first attempt stores the key, with a fingerprint of the
+body, alongside the submission, so a retry gets the original submission
+back instead of a duplicate visit.
+
+The key lives in the submission store (a unique column in SQL), not in the
+server process, so the guarantee holds with several workers sharing one
+database and across restarts:
+
+- a key reused with a different submission body is rejected
+  (:class:`IdempotencyConflict`)
+- the store accepts a key once, in the same write as the submission; an
+  attempt that loses a race with a concurrent one looks the key up again
+  and returns the submission the other stored
+
+Keys do not expire: one is kept for as long as its submission, so a client
+that comes back online days later, or an import resumed after a crash (its
+rows carry ``import:`` keys), still finds the original. The cost is one key
+and a 40-character fingerprint per keyed submission: a unique index in SQL,
+and a dict entry in the in-memory and journal stores (written into every
+journal snapshot). Growth is bounded by the number of stored submissions,
+and a lookup is an index or dict probe per key, not a scan; deleting
+submissions (``clear``) drops their keys with them.
+"""
+from typing import Optional
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(ValueError):
+    """The key was already used for a different submission."""
+
+
+def check_key(key: Optional[str]) -> None:
+    """Raise ValueError unless ``key`` can be stored."""
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"Idempotency key must be 1-{MAX_KEY_LENGTH} characters")
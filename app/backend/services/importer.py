@@ -0,0 +1,394 @@
+"""Streaming bulk import of legacy MS Forms / Excel exports.
+
+Exports are wide: a header row, then one row per visit with one column per
+question. Header cells are mapped to ``Quet.Nr`` question ids through the
+QuestionBank, either by a leading id (``Q12``, ``Q12. Was the ...``) or by the
+question text in English or Arabic; ``Q12 comment`` columns carry comments.
+Visit fields are recognized by the aliases in ``FIELD_ALIASES``.
+
+Rows are read lazily (``csv`` or openpyxl's read-only mode) and handed out in
+chunks to a process pool that builds and validates ``SurveySubmissionIn``
+payloads (one process per CPU for the CLI; uploads to the admin endpoint are
+validated in the server process unless ``MYSTERY_SHOPPER_IMPORT_WORKERS``
+opts in to a small pool). Results come back in file order and each chunk is stored with one
+``save_submissions`` call, so memory stays bounded by the number of chunks in
+flight whatever the file size.
+
+After every stored chunk a checkpoint records how many rows are done. It is
+keyed by the file's SHA-1, so running the same file again resumes after the
+last stored chunk, and a finished import is not repeated. Each row is stored
+with the idempotency key ``import:<SHA-1>:<row number>``: a chunk stored just
+before a crash, but not yet checkpointed, is replayed on resume instead of
+being stored twice.
+"""
+import csv
+import hashlib
+import itertools
+import json
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..core.questions import QuestionBank, get_question_bank
+from ..schemas.survey import SurveySubmissionIn
+from .survey_service import describe_error, save_submissions
+
+IMPORT_FORMATS = ("csv", "xlsx")
+CHUNK_ROWS = 500
+# Rejected rows listed in the summary (all are counted)
+MAX_REPORTED_ERRORS = 100
+# Validation processes for uploads to the admin endpoint (default: none)
+WORKERS_ENV = "MYSTERY_SHOPPER_IMPORT_WORKERS"
+MAX_UPLOAD_WORKERS = 2
+# Staged uploads and their checkpoints (admin endpoint)
+IMPORT_DIR_ENV = "MYSTERY_SHOPPER_IMPORT_DIR"
+IMPORT_KEY_PREFIX = "import"
+
+FIELD_ALIASES = {
+    "channel": ("channel", "visit channel"),
+    "location_code": ("location_code", "location code", "location", "service center", "center", "branch"),
+    "shopper_id": ("shopper_id", "shopper id", "shopper", "respondent id"),
+    "visit_datetime": ("visit_datetime", "visit date", "date of visit", "completion time", "start time"),
+}
+REQUIRED_FIELDS = ("location_code", "shopper_id", "visit_datetime")
+
+# MS Forms / Excel date formats tried after ISO 8601
+DATETIME_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%y %H:%M:%S", "%m/%d/%y %H:%M", "%m/%d/%Y")
+NOT_ANSWERED = {"", "n/a", "na", "-", "لا ينطبق"}
+
+_QUESTION_HEADER = re.compile(r"^(Q\d+(?:\.\d+)*)(?![\d.]*\d)\W*(.*)$", re.IGNORECASE)
+_COMMENT_SUFFIXES = {"comment", "comments", "remarks"}
+_TRAILING_SCORE = re.compile(r"\((-?\d+)\)\s*$")
+_LEADING_SCORE = re.compile(r"^(-?\d+)\b")
+
+
+def _normalize(value: Any) -> str:
+    return re.sub(r"[\W_]+", " ", str(value or "")).strip().lower()
+
+
+@dataclass
+class ColumnMapping:
+    """Header column indexes for visit fields, question scores and comments."""
+
+    fields: Dict[str, int] = field(default_factory=dict)
+    questions: Dict[str, int] = field(default_factory=dict)
+    comments: Dict[str, int] = field(default_factory=dict)
+    # Question id -> normalized answer label -> score, for exports holding answer text
+    answers: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    unmapped: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_header(cls, header: Sequence[Any], bank: QuestionBank) -> "ColumnMapping":
+        mapping = cls()
+        by_text = {}
+        for question in bank.questions:
+            for key in ("text_ar", "text_en"):
+                if question[key]:
+                    by_text.setdefault(_normalize(question[key]), question["id"])
+        aliases = {_normalize(alias): (name, rank)
+                   for name, names in FIELD_ALIASES.items() for rank, alias in enumerate(names)}
+        field_ranks: Dict[str, int] = {}
+
+        for index, cell in enumerate(header):
+            title = str(cell or "").strip()
+            normalized = _normalize(title)
+            if normalized in aliases:
+                name, rank = aliases[normalized]
+                # Earlier aliases win, e.g. "Visit date" over "Completion time"
+                if rank < field_ranks.get(name, len(FIELD_ALIASES[name])):
+                    mapping.fields[name] = index
+                    field_ranks[name] = rank
+                continue
+            match = _QUESTION_HEADER.match(title)
+            question_id = match.group(1).upper() if match else None
+            if question_id is not None and bank.get(question_id) is not None:
+                if _normalize(match.group(2)) in _COMMENT_SUFFIXES:
+                    mapping.comments.setdefault(question_id, index)
+                else:
+                    mapping.questions.setdefault(question_id, index)
+            elif normalized in by_text:
+                mapping.questions.setdefault(by_text[normalized], index)
+            elif title:
+                mapping.unmapped.append(title)
+
+        for question_id in mapping.questions:
+            mapping.answers[question_id] = {
+                _normalize(option[key]): option["value"]
+                for option in bank.get(question_id)["answer_options"]
+                for key in ("label_en", "label_ar")
+            }
+        return mapping
+
+    def missing_fields(self, default_channel: Optional[str] = None) -> List[str]:
+        required = REQUIRED_FIELDS if default_channel else ("channel",) + REQUIRED_FIELDS
+        return [name for name in required if name not in self.fields]
+
+
+def _cell(row: Sequence[Any], index: int) -> Any:
+    value = row[index] if index < len(row) else None
+    return value.strip() if isinstance(value, str) else value
+
+
+def parse_datetime(value: Any) -> Any:
+    """Datetime for an export cell; unparseable values are returned for pydantic to reject."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return value
+
+
+def parse_answer(value: Any, labels: Dict[str, int]) -> Any:
+    """Score for an answer cell: a number, ``Yes (1)`` style text or an answer label."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if not isinstance(value, str):
+        return value
+    for pattern in (_TRAILING_SCORE, _LEADING_SCORE):
+        match = pattern.search(value)
+        if match:
+            return int(match.group(1))
+    return labels.get(_normalize(value), value)
+
+
+def row_payload(mapping: ColumnMapping, row: Sequence[Any], default_channel: Optional[str] = None) -> Dict[str, Any]:
+    """Raw ``SurveySubmissionIn`` data for one export row."""
+    fields = {name: _cell(row, index) for name, index in mapping.fields.items()}
+    scores = []
+    for question_id, index in mapping.questions.items():
+        value = _cell(row, index)
+        if value is None or (isinstance(value, str) and value.lower() in NOT_ANSWERED):
+            continue
+        comment = _cell(row, mapping.comments[question_id]) if question_id in mapping.comments else None
+        scores.append({
+            "question_id": question_id,
+            "score": parse_answer(value, mapping.answers.get(question_id, {})),
+            "comment": str(comment) if comment not in (None, "") else None,
+        })
+    return {
+        "channel": fields.get("channel") or default_channel,
+        "location_code": None if fields.get("location_code") is None else str(fields["location_code"]),
+        "shopper_id": None if fields.get("shopper_id") is None else str(fields["shopper_id"]),
+        "visit_datetime": parse_datetime(fields.get("visit_datetime")),
+        "scores": scores,
+    }
+
+
+RowResult = Tuple[int, Optional[SurveySubmissionIn], Optional[str]]
+
+
+def validate_rows(mapping: ColumnMapping, rows: List[Tuple[int, Sequence[Any]]],
+                  default_channel: Optional[str] = None) -> List[RowResult]:
+    """``(row number, payload, error)`` per row; runs in the import worker processes."""
+    results = []
+    for row_number, row in rows:
+        try:
+            payload = SurveySubmissionIn.model_validate(row_payload(mapping, row, default_channel))
+        except ValueError as e:
+            results.append((row_number, None, describe_error(e)))
+        else:
+            results.append((row_number, payload, None))
+    return results
+
+
+def detect_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".xlsx", ".xlsm"):
+        return "xlsx"
+    raise ValueError(f"Unsupported import file type: {extension or filename} (expected .csv or .xlsx)")
+
+
+def iter_rows(path: str, fmt: str) -> Iterator[List[Any]]:
+    """Rows of the first sheet / the CSV file, header included, read lazily."""
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+    elif fmt == "xlsx":
+        # Imported here so CSV-only imports do not load it
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def file_fingerprint(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ImportCheckpoint:
+    """Progress of one import file, saved after every stored chunk."""
+
+    fingerprint: str
+    rows_done: int = 0
+    imported: int = 0
+    rejected: int = 0
+    complete: bool = False
+
+    @classmethod
+    def load(cls, path: Optional[str], fingerprint: str) -> "ImportCheckpoint":
+        """The saved progress for this file, or a fresh checkpoint (different or no file)."""
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("fingerprint") == fingerprint:
+                return cls(**data)
+        return cls(fingerprint)
+
+    def save(self, path: Optional[str]) -> None:
+        if not path:
+            return
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+        os.replace(temp_path, path)
+
+
+def _chunks(rows: Iterable[Tuple[int, List[Any]]], size: int) -> Iterator[List[Tuple[int, List[Any]]]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _validated_chunks(chunks: Iterator[List[Tuple[int, List[Any]]]], mapping: ColumnMapping,
+                      default_channel: Optional[str], workers: int) -> Iterator[List[RowResult]]:
+    """Validated chunks in file order, at most ``2 * workers`` in flight."""
+    if workers <= 0:
+        for chunk in chunks:
+            yield validate_rows(mapping, chunk, default_channel)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(validate_rows, mapping, chunk, default_channel))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def default_workers() -> int:
+    """Validation processes for ``import_file``: one per CPU."""
+    return os.cpu_count() or 1
+
+
+def upload_workers() -> int:
+    """Validation processes for ``import_upload``; the server's own CPUs are not handed to a pool by default."""
+    value = os.environ.get(WORKERS_ENV)
+    return min(int(value), MAX_UPLOAD_WORKERS) if value else 0
+
+
+def import_directory() -> str:
+    return os.environ.get(IMPORT_DIR_ENV) or os.path.join(tempfile.gettempdir(), "mystery_shopper_imports")
+
+
+def import_upload(stream: BinaryIO, filename: str, **kwargs) -> Dict[str, Any]:
+    """Stage an uploaded export on disk and import it; re-uploading the same file resumes it."""
+    kwargs.setdefault("workers", upload_workers())
+    fmt = detect_format(filename)
+    directory = import_directory()
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha1()
+    fd, staged_path = tempfile.mkstemp(suffix=f".{fmt}", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as staged:
+            for block in iter(lambda: stream.read(1 << 20), b""):
+                digest.update(block)
+                staged.write(block)
+        fingerprint = digest.hexdigest()
+        return import_file(staged_path, fmt, checkpoint_path=os.path.join(directory, f"{fingerprint}.json"),
+                           fingerprint=fingerprint, **kwargs)
+    finally:
+        os.remove(staged_path)
+
+
+def import_file(path: str, fmt: Optional[str] = None, checkpoint_path: Optional[str] = None,
+                default_channel: Optional[str] = None, workers: Optional[int] = None,
+                chunk_rows: int = CHUNK_ROWS, fingerprint: Optional[str] = None) -> Dict[str, Any]:
+    """Import a CSV / XLSX export, resuming from ``checkpoint_path`` when it matches the file.
+
+    Raises ValueError when the header cannot be mapped. Returns a summary with
+    row counts for the whole file and the first ``MAX_REPORTED_ERRORS`` rows
+    rejected in this run (row numbers as shown in a spreadsheet, header = row 1).
+    """
+    fmt = fmt or detect_format(path)
+    workers = default_workers() if workers is None else workers
+    checkpoint = ImportCheckpoint.load(checkpoint_path, fingerprint or file_fingerprint(path))
+    already_complete = checkpoint.complete
+    resumed_from = 0 if already_complete else checkpoint.rows_done
+
+    rows = iter_rows(path, fmt)
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("Import file is empty")
+        mapping = ColumnMapping.from_header(header, get_question_bank())
+        if not mapping.questions:
+            raise ValueError("No question columns found in the header")
+        missing = mapping.missing_fields(default_channel)
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+        errors: List[Dict[str, Any]] = []
+        if not checkpoint.complete:
+            numbered = itertools.islice(enumerate(rows, start=2), checkpoint.rows_done, None)
+            # Blank rows (trailing Excel rows, separators) are skipped, not rejected
+            numbered = ((n, row) for n, row in numbered if any(cell not in (None, "") for cell in row))
+            for results in _validated_chunks(_chunks(numbered, chunk_rows), mapping, default_channel, workers):
+                valid = [(row_number, payload) for row_number, payload, _ in results if payload is not None]
+                keys = [f"{IMPORT_KEY_PREFIX}:{checkpoint.fingerprint}:{row_number}" for row_number, _ in valid]
+                stored = iter(save_submissions([payload for _, payload in valid], keys))
+                for row_number, payload, error in results:
+                    if payload is not None:
+                        outcome = next(stored)
+                        error = describe_error(outcome) if isinstance(outcome, ValueError) else None
+                    if error is None:
+                        checkpoint.imported += 1
+                    else:
+                        checkpoint.rejected += 1
+                        if len(errors) < MAX_REPORTED_ERRORS:
+                            errors.append({"row": row_number, "error": error})
+                checkpoint.rows_done = results[-1][0] - 1
+                checkpoint.save(checkpoint_path)
+            checkpoint.complete = True
+            checkpoint.save(checkpoint_path)
+    finally:
+        rows.close()
+
+    return {
+        "format": fmt,
+        "rows": checkpoint.imported + checkpoint.rejected,
+        "imported": checkpoint.imported,
+        "rejected": checkpoint.rejected,
+        "resumed_at_row": resumed_from + 2 if resumed_from else None,
+        "already_complete": already_complete,
+        "errors": errors,
+        "mapped_questions": len(mapping.questions),
+        "unmapped_columns": mapping.unmapped,
+    }
@@ -0,0 +1,104 @@
+"""Server process lifecycle: warmup, readiness and graceful shutdown (drain).
+
+The lifespan of each app runs :func:`warm_up` over named stages (question
+bank, scoring plan, schemas, templates, aggregates) before serving, logging
+how long each took; a failing stage stops startup with its name in the
+error. ``/readyz`` reports ready only once warmup completed and until a
+shutdown starts; ``/healthz`` only says the process is up.
+
+``POST /admin/shutdown`` calls :func:`request_shutdown`, which signals the
+server process the way Ctrl+C / ``kill`` would. uvicorn then stops accepting
+connections, waits for in-flight requests (``--graceful-timeout``) and runs
+the lifespan shutdown, which calls :func:`shutdown` to flush and close the
+store. With ``run_app.py --workers`` the signal goes to the supervisor
+(``MYSTERY_SHOPPER_SUPERVISOR_PID``), which drains every worker; signalling
+one worker would only get it restarted.
+"""
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+from ..db.repository import set_repository
+
+# (name, callable) run in order by warm_up
+WarmupStage = Tuple[str, Callable[[], Any]]
+
+SUPERVISOR_PID_ENV = "MYSTERY_SHOPPER_SUPERVISOR_PID"
+
+logger = logging.getLogger(__name__)
+
+_draining = threading.Event()
+_warmed = threading.Event()
+# Stage name -> milliseconds of the last warmup
+_warmup_ms: Dict[str, float] = {}
+
+
+def warm_up(stages: Sequence[WarmupStage]) -> Dict[str, float]:
+    """Run the warmup stages in order, then report ready; returns each stage's duration in ms."""
+    _warmed.clear()
+    timings: Dict[str, float] = {}
+    for name, stage in stages:
+        started = time.perf_counter()
+        try:
+            stage()
+        except Exception as e:
+            raise RuntimeError(f"Warmup stage '{name}' failed: {e}") from e
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("Warmup %s: %.1f ms", name, timings[name])
+    _warmup_ms.clear()
+    _warmup_ms.update(timings)
+    _warmed.set()
+    return timings
+
+
+def readiness() -> Dict[str, Any]:
+    """``status`` is ready, warming_up or draining, with the last warmup's stage timings."""
+    if _draining.is_set():
+        status = "draining"
+    elif not _warmed.is_set():
+        status = "warming_up"
+    else:
+        status = "ready"
+    return {"status": status, "pid": os.getpid(), "warmup_ms": dict(_warmup_ms)}
+
+
+def is_draining() -> bool:
+    return _draining.is_set()
+
+
+def supervisor_pid() -> int:
+    """The process to signal for a shutdown: the run_app.py launcher, else this process."""
+    value = os.environ.get(SUPERVISOR_PID_ENV)
+    return int(value) if value else os.getpid()
+
+
+def _signal_shutdown(pid: int) -> None:
+    if sys.platform != "win32":
+        os.kill(pid, signal.SIGTERM)
+    elif pid == os.getpid():
+        # os.kill with SIGTERM would be TerminateProcess on Windows; run uvicorn's handler instead
+        signal.raise_signal(signal.SIGTERM)
+    else:
+        # How uvicorn's supervisor stops its own workers on Windows
+        os.kill(pid, signal.CTRL_BREAK_EVENT)
+
+
+def request_shutdown() -> bool:
+    """Start draining the server; False if a shutdown was already requested."""
+    if _draining.is_set():
+        return False
+    _draining.set()
+    pid = supervisor_pid()
+    logger.warning("Shutdown requested, draining server process %d", pid)
+    _signal_shutdown(pid)
+    return True
+
+
+def shutdown() -> None:
+    """Flush buffered writes and release the store (lifespan shutdown)."""
+    # Closing commits the journal's pending group and disposes database connections
+    set_repository(None)
@@ -0,0 +1,71 @@
+"""Incrementally maintained dashboard metrics.
+
+The aggregator keeps running counts and score sums per channel and per main
+section so ``/admin/metrics`` does not rescan and rescore every stored
+submission. It is updated by ``save_submission`` and rebuilt from the store on
+first use and whenever the scoring rules change.
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class MetricsAggregator:
+    """Running totals behind :func:`survey_service.basic_metrics`."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.built = False
+        self.total = 0
+        self.score_sum = 0.0
+        # name -> [count, score sum]
+        self.channels: Dict[str, List[float]] = {}
+        self.sections: Dict[str, List[float]] = {}
+
+    def add(self, channel: str, score_data: Dict[str, Any]) -> None:
+        """Fold one scored submission into the running totals."""
+        overall_score = score_data['overall_score']
+        self.total += 1
+        self.score_sum += overall_score
+
+        channel_totals = self.channels.setdefault(channel, [0, 0.0])
+        channel_totals[0] += 1
+        channel_totals[1] += overall_score
+
+        for section, data in score_data['section_scores'].items():
+            section_totals = self.sections.setdefault(section, [0, 0.0])
+            section_totals[0] += 1
+            section_totals[1] += data['score']
+
+    def rebuild(self, scored: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Recompute everything from ``(channel, score_data)`` pairs."""
+        self.reset()
+        for channel, score_data in scored:
+            self.add(channel, score_data)
+        self.built = True
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self.total:
+            return {
+                "total_submissions": 0,
+                "average_score": 0,
+                "active_channels": 0,
+                "channel_breakdown": {},
+                "section_breakdown": {}
+            }
+
+        channel_breakdown = {
+            channel: {'count': count, 'avg_score': round(total / count, 2)}
+            for channel, (count, total) in self.channels.items()
+        }
+        section_breakdown = {
+            section: round(total / count, 2)
+            for section, (count, total) in self.sections.items()
+        }
+        return {
+            "total_submissions": self.total,
+            "average_score": round(self.score_sum / self.total, 2),
+            "active_channels": len(channel_breakdown),
+            "channel_breakdown": channel_breakdown,
+            "section_breakdown": section_breakdown
+        }
@@ -1,23 +1,26 @@
+import hashlib
+import os
+import threading
+import time
 from datetime import datetime
-from ..schemas.survey import SurveySubmissionIn, SurveySubmissionOut
+from pydantic import ValidationError
+from ..schemas.survey import SurveySubmissionIn, SurveySubmissionOut, ScoredSubmission
 from ..core.security import sanitize_text
-from ..core.questions import get_questions
-from ..utils.scoring_analysis import (
-    parse_max_score, 
-    get_section_weight_mapping, 
-    calculate_weighted_section_scores
-)
-from typing import List, Dict, Any
-import csv
-import os
-
-_DB: List[SurveySubmissionOut] = []
-_COUNTER = 1
+from ..core.questions import get_question_bank
+from ..core.scoring import ScoringPlan
+from ..core.telemetry import TELEMETRY, Family
+from ..core.timing import span
+from ..db.repository import DuplicateIdempotencyKey, IdempotencyClaim, get_repository, server_workers
+from ..db.query import SubmissionQuery, SubmissionPage
+from .metrics import MetricsAggregator
+from .analytics import ColumnarSubmissionStore
+from .idempotency import IdempotencyConflict, check_key
+from ..utils.scoring_analysis import get_section_weight_mapping
+from typing import List, Dict, Any, Iterator, Optional, Union
 
 def get_questions_dict() -> Dict[str, str]:
     """Get all questions as a dictionary for validation"""
-    questions = get_questions()
-    return {q['id']: q['text_en'] for q in questions}
+    return {q['id']: q['text_en'] for q in get_question_bank().questions}
 
 def get_section_weights() -> Dict[str, Dict[str, Any]]:
     """Get section weights based on the scoring system"""
@@ -41,60 +44,34 @@ def get_section_weights() -> Dict[str, Dict[str, Any]]:
     return main_sections
 
 def get_question_max_scores() -> Dict[str, int]:
-    """Get maximum possible scores for each question by parsing CSV"""
-    max_scores = {}
-    questions_file = os.path.join(os.path.dirname(__file__), '..', 'core', 'questions.csv')
-    
-    try:
-        with open(questions_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['Quet.Nr'] and row['Possible Answers']:
-                    question_id = row['Quet.Nr'].strip()
-                    answers = row['Possible Answers'].strip()
-                    max_scores[question_id] = parse_max_score(answers)
-    except Exception as e:
-        print(f"Error loading question scores: {e}")
-    
-    return max_scores
-
-def parse_max_score(answers: str) -> int:
-    """Parse the maximum score from possible answers"""
-    if not answers:
-        return 1
-    
-    # Look for numbers in parentheses like (2), (1), (0)
-    import re
-    scores = re.findall(r'\((\d+)\)', answers)
-    if scores:
-        return max(int(s) for s in scores)
-    
-    # Count options (simple fallback)
-    lines = [line.strip() for line in answers.split('\n') if line.strip()]
-    return len(lines) if lines else 1
+    """Get maximum possible scores for each question"""
+    return dict(get_question_bank().max_scores)
 
 def get_question_sections() -> Dict[str, str]:
     """Get section mapping for each question"""
-    question_sections = {}
-    questions_file = os.path.join(os.path.dirname(__file__), '..', 'core', 'questions.csv')
-    
+    return dict(get_question_bank().sections)
+
+def load_scoring_rules() -> None:
+    """Build questions, section weights, question scoring data and the compiled scoring plan from the question bank"""
+    global QUESTION_BANK_VERSION, QUESTIONS, SECTION_WEIGHTS, QUESTION_MAX_SCORES, QUESTION_SECTIONS, SCORING_PLAN
     try:
-        with open(questions_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['Quet.Nr'] and row['Criteria']:
-                    question_id = row['Quet.Nr'].strip()
-                    section = row['Criteria'].strip()
-                    question_sections[question_id] = section
+        bank = get_question_bank()
+        questions = get_questions_dict()
+        section_weights = get_section_weights()
+        question_max_scores = get_question_max_scores()
+        question_sections = get_question_sections()
+        scoring_plan = ScoringPlan(section_weights, question_sections, question_max_scores)
     except Exception as e:
-        print(f"Error loading question sections: {e}")
-    
-    return question_sections
+        raise RuntimeError(f"Could not build the scoring rules from the question bank: {e}") from e
+    # Swapped in together, so a failed reload keeps the previous rules
+    QUESTION_BANK_VERSION = bank.version
+    QUESTIONS = questions
+    SECTION_WEIGHTS = section_weights
+    QUESTION_MAX_SCORES = question_max_scores
+    QUESTION_SECTIONS = question_sections
+    SCORING_PLAN = scoring_plan
 
-QUESTIONS = get_questions_dict()
-SECTION_WEIGHTS = get_section_weights()
-QUESTION_MAX_SCORES = get_question_max_scores()
-QUESTION_SECTIONS = get_question_sections()
+load_scoring_rules()
 
 CHANNEL_WEIGHTS = {
     "CALL_CENTER": 1.0,
@@ -105,8 +82,28 @@ CHANNEL_WEIGHTS = {
 
 ALLOWED_CHANNELS = {"CALL_CENTER","ON_SITE","WEB","MOBILE_APP"}
 
-def save_submission(payload: SurveySubmissionIn) -> SurveySubmissionOut:
-    global _COUNTER
+# Largest POST /survey/submit/batch request accepted
+MAX_BATCH_SIZE = int(os.environ.get("MYSTERY_SHOPPER_MAX_BATCH_SIZE", "100"))
+
+_METRICS = MetricsAggregator()
+_ANALYTICS = ColumnarSubmissionStore()
+# Submissions are saved from threadpool workers; aggregate updates are not atomic
+_AGGREGATE_LOCK = threading.Lock()
+# With several server processes the other workers' submissions only reach this
+# worker's aggregates through the store: reads catch up from the highest id folded in
+_SHARED_STORE = server_workers() > 1
+# Highest id in the last rebuild's snapshot (advanced by catch-ups); ids follow commit order
+_AGGREGATED_THROUGH = 0
+
+def sync_question_bank() -> bool:
+    """Reload questions and scoring rules if questions.csv changed since they were built"""
+    if get_question_bank().version == QUESTION_BANK_VERSION:
+        return False
+    reload_scoring_rules()
+    return True
+
+def validate_submission(payload: SurveySubmissionIn) -> None:
+    """Check a payload against the current question set; raises ValueError"""
     # Basic validation: ensure all question ids exist
     for qs in payload.scores:
         if qs.question_id not in QUESTIONS:
@@ -116,132 +113,299 @@ def save_submission(payload: SurveySubmissionIn) -> SurveySubmissionOut:
     # Additional sanitization safeguard (schema already sanitized identifiers)
     payload.location_code = sanitize_text(payload.location_code)
     payload.shopper_id = sanitize_text(payload.shopper_id)
-    submission = SurveySubmissionOut(
-        id=_COUNTER,
-        created_at=datetime.utcnow(),
-        **payload.model_dump()
-    )
-    _DB.append(submission)
-    _COUNTER += 1
+
+def describe_error(error: ValueError) -> str:
+    """One-line message for a rejected submission (pydantic errors as ``field.path: message``)"""
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            (".".join(str(part) for part in err["loc"]) + ": " if err["loc"] else "") + err["msg"]
+            for err in error.errors()
+        )
+    return str(error)
+
+def _update_aggregates(submission: ScoredSubmission, score_data: Dict[str, Any]) -> None:
+    if _SHARED_STORE:
+        # Folded in by the next catch-up, in id order with the other workers' submissions
+        return
+    # Until the aggregates are built the next rebuild picks this submission up
+    with _AGGREGATE_LOCK:
+        if submission.id <= _AGGREGATED_THROUGH:
+            # Committed before a rebuild's snapshot, which already counted it
+            return
+        if _METRICS.built:
+            _METRICS.add(submission.channel, score_data)
+        if _ANALYTICS.built:
+            _ANALYTICS.add(submission, score_data)
+
+def _fingerprint(payload: SurveySubmissionIn) -> str:
+    """Identity of a submission body, to tell a retry from a reused idempotency key"""
+    return hashlib.sha1(payload.model_dump_json().encode("utf-8")).hexdigest()
+
+def _score(plan: ScoringPlan, payload: SurveySubmissionIn) -> Dict[str, Any]:
+    with span("score"):
+        started = time.perf_counter()
+        score_data = plan.score(payload.scores)
+        TELEMETRY.observe_scoring(time.perf_counter() - started)
+    return score_data
+
+def _store_submission(payload: SurveySubmissionIn) -> ScoredSubmission:
+    sync_question_bank()
+    try:
+        with span("questions"):
+            validate_submission(payload)
+    except ValueError:
+        TELEMETRY.count("submissions_rejected_total")
+        raise
+    # Score once at write time; reads serve the stored breakdown
+    plan = SCORING_PLAN
+    score_data = _score(plan, payload)
+    with span("store"):
+        submission = get_repository().add(payload, datetime.utcnow(), score_data, plan.version)
+    TELEMETRY.count("submissions_saved_total")
+    with span("aggregate"):
+        _update_aggregates(submission, score_data)
     return submission
 
-def list_submissions() -> List[SurveySubmissionOut]:
-    return _DB
+def save_submission(payload: SurveySubmissionIn, idempotency_key: Optional[str] = None) -> ScoredSubmission:
+    """Validate, score and store one submission.
+
+    With an ``idempotency_key`` a retry of an already stored submission returns
+    the original without validating or storing it again (see ``services.idempotency``).
+    """
+    if idempotency_key is None:
+        return _store_submission(payload)
+    result = save_submissions([payload], [idempotency_key])[0]
+    if isinstance(result, ValueError):
+        raise result
+    return result
+
+def _store_many(payloads: List[SurveySubmissionIn], indexes: List[int], claims: Dict[int, IdempotencyClaim],
+                results: List[Any]) -> None:
+    """Validate, score and store ``payloads[indexes]`` in one write, filling in ``results``.
+
+    Raises DuplicateIdempotencyKey (nothing stored) if one of the claimed keys
+    was stored by a concurrent request since it was looked up.
+    """
+    accepted = []
+    for index in indexes:
+        try:
+            with span("questions"):
+                validate_submission(payloads[index])
+        except ValueError as e:
+            TELEMETRY.count("submissions_rejected_total")
+            results[index] = e
+            continue
+        accepted.append(index)
+
+    plan = SCORING_PLAN
+    created_at = datetime.utcnow()
+    scored = [_score(plan, payloads[index]) for index in accepted]
+    with span("store"):
+        stored = get_repository().add_many(
+            [(payloads[index], created_at, score_data, plan.version) for index, score_data in zip(accepted, scored)],
+            [claims.get(index) for index in accepted]
+        )
+    TELEMETRY.count("submissions_saved_total", len(stored))
+    with span("aggregate"):
+        for index, submission, score_data in zip(accepted, stored, scored):
+            results[index] = submission
+            _update_aggregates(submission, score_data)
+
+def save_submissions(payloads: List[SurveySubmissionIn],
+                     idempotency_keys: Optional[List[Optional[str]]] = None) -> List[Union[ScoredSubmission, ValueError]]:
+    """Validate and store many submissions with a single store write.
+
+    Returns one result per payload, in order: the stored submission, or the
+    ValueError that rejected it. Valid payloads are stored together even if
+    others in the batch are rejected. ``idempotency_keys`` (one per payload,
+    None for no key) work as in ``save_submission``; an item repeating an
+    earlier key of the same batch gets that item's result.
+    """
+    sync_question_bank()
+    keys = idempotency_keys or [None] * len(payloads)
+    results: List[Union[ScoredSubmission, ValueError, None]] = [None] * len(payloads)
+    claims: Dict[int, IdempotencyClaim] = {}  # index -> (key, fingerprint) of the item storing the key
+    first_with_key: Dict[str, int] = {}
+    repeated: Dict[int, int] = {}             # index -> index of the first item with the same key
+    for index, (payload, key) in enumerate(zip(payloads, keys)):
+        if key is None:
+            continue
+        try:
+            check_key(key)
+        except ValueError as e:
+            results[index] = e
+            continue
+        fingerprint = _fingerprint(payload)
+        first = first_with_key.get(key)
+        if first is None:
+            first_with_key[key] = index
+            claims[index] = (key, fingerprint)
+        elif claims[first][1] == fingerprint:
+            repeated[index] = first
+        else:
+            results[index] = IdempotencyConflict("Idempotency key was already used for a different submission")
+
+    pending = [index for index in range(len(payloads)) if results[index] is None and index not in repeated]
+    replayed: Dict[int, int] = {}  # index -> id stored by an earlier request
+    while True:
+        stored_keys = get_repository().find_idempotency_keys(claims[i][0] for i in pending if i in claims)
+        new = []
+        for index in pending:
+            claim = claims.get(index)
+            if claim is None or claim[0] not in stored_keys:
+                new.append(index)
+                continue
+            submission_id, fingerprint = stored_keys[claim[0]]
+            if fingerprint == claim[1]:
+                replayed[index] = submission_id
+            else:
+                results[index] = IdempotencyConflict("Idempotency key was already used for a different submission")
+        try:
+            _store_many(payloads, new, claims, results)
+            break
+        except DuplicateIdempotencyKey:
+            # A concurrent request (possibly another worker) stored one of the keys: look them up again
+            pending = [index for index in new if results[index] is None]
+
+    if replayed:
+        TELEMETRY.count("idempotent_replays_total", len(replayed))
+        originals = get_repository().get_many(replayed.values())
+        for index, submission_id in replayed.items():
+            results[index] = originals.get(submission_id) or ValueError(
+                f"Submission {submission_id} stored for this idempotency key no longer exists"
+            )
+    for index, first in repeated.items():
+        results[index] = results[first]
+    return results
+
+def list_submissions() -> List[ScoredSubmission]:
+    return get_repository().list_all()
+
+def get_submission(submission_id: int) -> Optional[ScoredSubmission]:
+    return get_repository().get(submission_id)
+
+def get_submission_scores_batch(submission_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Stored score breakdowns for many submissions in one store round trip.
+
+    Only submissions stamped with outdated scoring rules are re-read with their answers.
+    """
+    repository = get_repository()
+    submissions = repository.get_many(submission_ids, load_answers=False)
+    stale = [i for i, sub in submissions.items() if sub.scoring_version != SCORING_PLAN.version]
+    if stale:
+        submissions.update(repository.get_many(stale))
+    return {i: get_score_data(sub) for i, sub in submissions.items()}
+
+def query_submissions(query: SubmissionQuery) -> SubmissionPage:
+    """One page of submissions, filtered and sorted by the store"""
+    return get_repository().query(query)
 
 def calculate_section_scores(submission: SurveySubmissionOut) -> Dict[str, Any]:
     """Calculate weighted section scores for a submission"""
-    section_scores = {}
-    
-    # Group questions by main sections
-    main_section_questions = {}
-    for main_section, config in SECTION_WEIGHTS.items():
-        main_section_questions[main_section] = []
-        for section_name in config['sections']:
-            for question_id, question_section in QUESTION_SECTIONS.items():
-                if question_section == section_name:
-                    main_section_questions[main_section].append(question_id)
-    
-    # Calculate scores for each main section
-    for main_section, question_ids in main_section_questions.items():
-        if not question_ids:
-            continue
-            
-        section_total = 0
-        section_max = 0
-        section_count = 0
-        
-        for question_id in question_ids:
-            max_score = QUESTION_MAX_SCORES.get(question_id, 1)
-            
-            # Find actual score for this question
-            actual_score = 0
-            for score_item in submission.scores:
-                if score_item.question_id == question_id:
-                    actual_score = score_item.score
-                    break
-            
-            section_total += actual_score
-            section_max += max_score
-            section_count += 1
-        
-        # Calculate section percentage
-        if section_max > 0:
-            section_percentage = section_total / section_max
-            weight = SECTION_WEIGHTS[main_section]['weight']
-            section_scores[main_section] = {
-                'score': round(section_percentage, 4),
-                'weight': weight,
-                'weighted_score': round(section_percentage * weight, 4),
-                'questions_count': section_count,
-                'raw_total': section_total,
-                'raw_max': section_max
-            }
-    
-    # Calculate overall score
-    total_weighted_score = sum(s['weighted_score'] for s in section_scores.values())
-    total_weight = sum(s['weight'] for s in section_scores.values())
-    overall_score = total_weighted_score / total_weight if total_weight > 0 else 0
-    
-    return {
-        'section_scores': section_scores,
-        'overall_score': round(overall_score, 4),
-        'total_weighted_score': round(total_weighted_score, 4),
-        'total_weight_used': round(total_weight, 4)
-    }
+    return SCORING_PLAN.score(submission.scores)
+
+def get_score_data(submission: ScoredSubmission) -> Dict[str, Any]:
+    """Stored section scores, recomputed only if they predate the current scoring rules"""
+    if submission.scoring_version == SCORING_PLAN.version:
+        return submission.score_data()
+    return calculate_section_scores(submission)
+
+def rebuild_metrics() -> None:
+    """Rebuild the metrics aggregates and analytics columns from the store (startup, scoring rule changes).
+
+    Stored score breakdowns computed under older scoring rules are re-stamped on the way.
+    Runs under the aggregate lock: a submission saved meanwhile waits in
+    ``_update_aggregates`` and is folded in afterwards unless the snapshot
+    already holds it.
+    """
+    global _ANALYTICS, _AGGREGATED_THROUGH
+    TELEMETRY.count("aggregate_rebuilds_total")
+    version = SCORING_PLAN.version
+    with _AGGREGATE_LOCK:
+        scored = []
+        stale = []
+        for sub in list_submissions():
+            if sub.scoring_version == version:
+                score_data = sub.score_data()
+            else:
+                score_data = calculate_section_scores(sub)
+                stale.append((sub.id, score_data))
+            scored.append((sub, score_data))
+        if stale:
+            get_repository().update_scores(stale, version)
+        _METRICS.rebuild((sub.channel, score_data) for sub, score_data in scored)
+        # Column layout follows the current question set and main sections
+        analytics = ColumnarSubmissionStore(list(QUESTIONS), SCORING_PLAN.sections)
+        analytics.rebuild(scored)
+        _ANALYTICS = analytics
+        _AGGREGATED_THROUGH = max((sub.id for sub, _ in scored), default=0)
+
+def _catch_up_aggregates() -> bool:
+    """Fold submissions stored by other workers into the aggregates.
+
+    Returns False when the store no longer matches them (a submission committed
+    behind a higher id, or submissions deleted by another worker).
+    """
+    global _AGGREGATED_THROUGH
+    repository = get_repository()
+    with _AGGREGATE_LOCK:
+        # Counted first: rows committed after the count can only add to the new ones
+        stored = repository.count()
+        new = repository.list_since(_AGGREGATED_THROUGH)
+        for sub in new:
+            score_data = get_score_data(sub)
+            _METRICS.add(sub.channel, score_data)
+            _ANALYTICS.add(sub, score_data)
+            _AGGREGATED_THROUGH = sub.id
+        return stored <= _METRICS.total <= stored + len(new)
+
+def reload_scoring_rules() -> None:
+    """Re-read questions, section weights and question scoring data, then re-stamp stored scores and rebuild metrics"""
+    load_scoring_rules()
+    rebuild_metrics()
+
+def clear_submissions() -> None:
+    """Delete every stored submission and reset the metrics aggregates"""
+    global _AGGREGATED_THROUGH
+    get_repository().clear()
+    with _AGGREGATE_LOCK:
+        _METRICS.reset()
+        _ANALYTICS.reset()
+        _AGGREGATED_THROUGH = 0
+
+def _ensure_aggregates() -> None:
+    if sync_question_bank():
+        return
+    stale = not (_METRICS.built and _ANALYTICS.built) or (_SHARED_STORE and not _catch_up_aggregates())
+    TELEMETRY.cache("aggregates", hit=not stale)
+    if stale:
+        rebuild_metrics()
+
+def telemetry_families() -> List[Family]:
+    """Point-in-time store gauges for the Prometheus endpoint"""
+    repository = get_repository()
+    return [
+        ("submissions_stored", "Submissions in the store.", "gauge",
+         [((("backend", repository.backend),), repository.count())]),
+    ] + repository.telemetry()
 
 def basic_metrics() -> Dict[str, Any]:
-    """Calculate and return basic metrics for the dashboard"""
-    if not _DB:
-        return {
-            "total_submissions": 0, 
-            "average_score": 0, 
-            "active_channels": 0,
-            "channel_breakdown": {}, 
-            "section_breakdown": {}
-        }
-    
-    # Calculate individual submission scores
-    submission_scores = []
-    channel_scores: Dict[str, list] = {}
-    channel_counts: Dict[str, int] = {}
-    section_aggregates = {}
-    
-    for sub in _DB:
-        # Calculate weighted section scores
-        score_data = calculate_section_scores(sub)
-        overall_score = score_data['overall_score']
-        submission_scores.append(overall_score)
-        
-        # Group by channel
-        channel_scores.setdefault(sub.channel, []).append(overall_score)
-        channel_counts[sub.channel] = channel_counts.get(sub.channel, 0) + 1
-        
-        # Aggregate section scores
-        for section, data in score_data['section_scores'].items():
-            if section not in section_aggregates:
-                section_aggregates[section] = []
-            section_aggregates[section].append(data['score'])
-    
-    # Calculate averages
-    overall_avg = sum(submission_scores) / len(submission_scores)
-    
-    # Channel breakdown with counts and averages
-    channel_breakdown = {}
-    for channel, scores in channel_scores.items():
-        channel_breakdown[channel] = {
-            'count': channel_counts[channel],
-            'avg_score': round(sum(scores)/len(scores), 2)
-        }
-    
-    section_breakdown = {
-        section: round(sum(scores)/len(scores), 2) 
-        for section, scores in section_aggregates.items()
-    }
-    
-    return {
-        "total_submissions": len(_DB),
-        "average_score": round(overall_avg, 2),
-        "active_channels": len(channel_breakdown),
-        "channel_breakdown": channel_breakdown,
-        "section_breakdown": section_breakdown
-    }
+    """Return basic metrics for the dashboard from the running aggregates"""
+    _ensure_aggregates()
+    return _METRICS.snapshot()
+
+def analytics_breakdown(by: str, visit_from: Optional[datetime] = None,
+                        visit_to: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Per channel / location / shopper counts and average scores from the analytics columns"""
+    _ensure_aggregates()
+    return _ANALYTICS.breakdown(by, visit_from, visit_to)
+
+def question_statistics() -> Dict[str, Dict[str, Any]]:
+    """Answer count and average score per question from the analytics columns"""
+    _ensure_aggregates()
+    return _ANALYTICS.question_statistics()
+
+def export_submissions_csv() -> Iterator[str]:
+    """All submissions as CSV chunks, one column per question"""
+    _ensure_aggregates()
+    return _ANALYTICS.export_csv()
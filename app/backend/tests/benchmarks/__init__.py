@@ -0,0 +1,4 @@
+"""
+Benchmark scripts (bench_*.py) for the Mystery Shopper backend
+Not collected by pytest; run each module directly
+"""
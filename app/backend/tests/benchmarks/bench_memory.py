@@ -0,0 +1,156 @@
+"""
+Memory footprint of stored submissions: pydantic models vs. compact records
+
+Stores N synthetic submissions (default 100k) twice, as the ScoredSubmission
+object graph the in-memory store used to keep and as SubmissionRecord, and
+reports the bytes reachable from the stored objects per submission, plus the
+time to store and to rescore everything. Inputs come from a pre-built pool of
+payloads; both representations copy what they keep, so sharing the inputs
+does not flatter either one.
+
+Usage:
+    python -m app.backend.tests.benchmarks.bench_memory [--count 100000]
+"""
+
+import argparse
+import gc
+import itertools
+import random
+import sys
+import os
+import time
+import types
+from datetime import datetime, timedelta, timezone
+
+# Add the project root directory to path (go up 4 levels from benchmarks/)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+sys.path.insert(0, project_root)
+
+from app.backend.db import records
+from app.backend.db.records import SubmissionRecord
+from app.backend.db.repository import _build_scored_submission
+from app.backend.schemas.survey import LatencySample, QuestionScore, SurveySubmissionIn
+from app.backend.services import survey_service
+
+
+def make_payloads(count: int, seed: int = 42):
+    """Synthetic, distinct payloads"""
+    rng = random.Random(seed)
+    question_ids = sorted(survey_service.QUESTIONS)
+    channels = sorted(survey_service.ALLOWED_CHANNELS)
+    start = datetime(2025, 1, 1, 9, tzinfo=timezone(timedelta(hours=4)))
+    for i in range(count):
+        answered = rng.sample(question_ids, 60)
+        scores = [
+            QuestionScore.model_construct(
+                question_id=q, score=rng.randint(1, 5),
+                comment="Needs attention" if rng.random() < 0.05 else None
+            )
+            for q in answered
+        ]
+        latency = [LatencySample.model_construct(question_id=q, ms=rng.uniform(300, 3000)) for q in answered[:3]]
+        yield SurveySubmissionIn.model_construct(
+            channel=rng.choice(channels),
+            location_code=f"LOC{rng.randint(1, 50)}",
+            shopper_id=f"S{rng.randint(1, 500)}",
+            visit_datetime=start + timedelta(minutes=i),
+            scores=scores,
+            latency_samples=latency,
+        )
+
+
+def deep_sizeof(obj, shared) -> int:
+    """Bytes of every object reachable from ``obj`` that is not in ``shared`` (ids), each counted once"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        key = id(obj)
+        if key in seen or key in shared or isinstance(obj, (type, types.ModuleType, types.FunctionType)):
+            continue
+        seen.add(key)
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def reachable_ids(roots) -> set:
+    ids = set()
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) not in ids:
+            ids.add(id(obj))
+            stack.extend(gc.get_referents(obj))
+    return ids
+
+
+def measure(build, pool, count: int):
+    """(bytes per submission, store seconds, stored objects) for ``count`` submissions built with ``build``"""
+    plan = survey_service.SCORING_PLAN
+    created_at = datetime.utcnow()
+    gc.collect()
+    started = time.perf_counter()
+    stored = [
+        build(i + 1, created_at, payload, plan.score(payload.scores), plan.version)
+        for i, payload in zip(range(count), itertools.cycle(pool))
+    ]
+    store_seconds = time.perf_counter() - started
+    # Inputs, singletons and process-wide tables are shared, not part of one submission
+    shared = reachable_ids([pool, None, True, False, created_at, plan.version,
+                            records._SECTION_NAMES, records.QUESTION_ORDINALS.ids])
+    total = sum(deep_sizeof(submission, shared) for submission in stored)
+    return total / count, store_seconds, stored
+
+
+def run(count: int, pool_size: int = 1000) -> dict:
+    plan = survey_service.SCORING_PLAN
+    pool = list(make_payloads(min(pool_size, count)))
+
+    model_bytes, model_store, models = measure(_build_scored_submission, pool, count)
+    started = time.perf_counter()
+    for model in models:
+        plan.score(model.scores)
+    model_seconds = time.perf_counter() - started
+    del models
+
+    record_bytes, record_store, records = measure(SubmissionRecord, pool, count)
+    started = time.perf_counter()
+    for record in records:
+        plan.score_answers(record.answers())
+    record_seconds = time.perf_counter() - started
+    del records
+
+    return {
+        "count": count,
+        "model_bytes_per_submission": round(model_bytes),
+        "record_bytes_per_submission": round(record_bytes),
+        "reduction": round(model_bytes / record_bytes, 1),
+        "model_store_seconds": round(model_store, 3),
+        "record_store_seconds": round(record_store, 3),
+        "model_rescore_seconds": round(model_seconds, 3),
+        "record_rescore_seconds": round(record_seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stored submission memory footprint benchmark")
+    parser.add_argument("--count", type=int, default=100_000, help="Submissions to store (default: 100000)")
+    args = parser.parse_args()
+
+    result = run(args.count)
+    print(f"Submissions stored:      {result['count']:,}")
+    print(f"ScoredSubmission models: {result['model_bytes_per_submission']:,} bytes/submission "
+          f"({result['model_bytes_per_submission'] * result['count'] / 2**20:,.1f} MiB)")
+    print(f"SubmissionRecord:        {result['record_bytes_per_submission']:,} bytes/submission "
+          f"({result['record_bytes_per_submission'] * result['count'] / 2**20:,.1f} MiB)")
+    print(f"Reduction:               {result['reduction']}x")
+    print(f"Store all (models):      {result['model_store_seconds']}s")
+    print(f"Store all (records):     {result['record_store_seconds']}s")
+    print(f"Rescore all (models):    {result['model_rescore_seconds']}s")
+    print(f"Rescore all (records):   {result['record_rescore_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Benchmark suite: scoring, metrics, ingest and the admin list at 1k / 100k / 1M submissions
+
+For each dataset size the store is filled with synthetic visits through
+save_submissions (the batch ingest path, which keeps the dashboard aggregates
+up to date), then the suite times:
+
+- ingest           save_submissions in batches of 1000, for the whole dataset
+- basic_metrics    dashboard metrics from the running aggregates
+- basic_metrics_cold  the same after the aggregates are dropped (startup, scoring
+                   rule change); rebuilds from the store, skipped above
+                   --rebuild-max because the rebuild reads every submission
+                   as a pydantic model (~35 KB each at 60 answers)
+- save_submission  single submissions added on top of the dataset
+- admin_list       GET /admin/submissions (default page) through the ASGI client
+- admin_list_filtered  GET /admin/submissions?channel=WEB&sort=-overall_score&limit=100
+
+and once, since their cost does not depend on the store:
+
+- validate         SurveySubmissionIn validation of JSON payloads
+- calculate_section_scores  scoring a stored submission
+- parse_questions_from_csv  parsing questions.csv without the cached bank
+
+Every benchmark runs --repeat rounds (ingest runs once) and reports the
+minimum and median round and the median cost per operation. Results are
+written as JSON; --compare flags benchmarks whose per-operation median got
+slower than a baseline file by more than --threshold and exits with status 1.
+Only compare results from the same machine and store.
+
+Usage:
+    python -m app.backend.tests.benchmarks.bench_suite [--sizes 1k,100k,1M] [--store memory]
+        [--output results.json] [--compare baseline.json] [--threshold 0.25]
+    python -m app.backend.tests.benchmarks.bench_suite --input results.json --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Add the project root directory to path (go up 4 levels from benchmarks/)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+sys.path.insert(0, project_root)
+
+from app.backend.core.questions import parse_questions_from_csv
+from app.backend.db.repository import InMemorySubmissionRepository, SqlSubmissionRepository, set_repository
+from app.backend.schemas.survey import SurveySubmissionIn
+from app.backend.services import survey_service
+
+DEFAULT_SIZES = "1k,100k,1M"
+INGEST_BATCH = 1000
+# Distinct payloads; datasets cycle through them (the stores copy what they keep)
+POOL_SIZE = 1000
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+ADMIN_FILTERED = {"channel": "WEB", "sort": "-overall_score", "limit": 100}
+
+
+def parse_size(value: str) -> int:
+    """'1k' -> 1000, '1M' -> 1000000, '250' -> 250"""
+    value = value.strip()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:].lower(), 1)
+    return int(value[:-1] if multiplier > 1 else value) * multiplier
+
+
+def size_label(size: int) -> str:
+    if size >= 1_000_000 and size % 1_000_000 == 0:
+        return f"{size // 1_000_000}M"
+    if size >= 1_000 and size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+def make_payload_dicts(count: int, answers: int = 60, seed: int = 42):
+    """Synthetic, distinct JSON payloads as a client would post them"""
+    rng = random.Random(seed)
+    question_ids = sorted(survey_service.QUESTIONS)
+    channels = sorted(survey_service.ALLOWED_CHANNELS)
+    start = datetime(2025, 1, 1, 9, tzinfo=timezone(timedelta(hours=4)))
+    for i in range(count):
+        answered = rng.sample(question_ids, min(answers, len(question_ids)))
+        yield {
+            "channel": rng.choice(channels),
+            "location_code": f"LOC{rng.randint(1, 50)}",
+            "shopper_id": f"S{rng.randint(1, 500)}",
+            "visit_datetime": (start + timedelta(minutes=i)).isoformat(),
+            "scores": [
+                {"question_id": q, "score": rng.randint(1, 5),
+                 "comment": "Needs attention" if rng.random() < 0.05 else None}
+                for q in answered
+            ],
+            "latency_samples": [{"question_id": q, "ms": round(rng.uniform(300, 3000), 1)} for q in answered[:3]],
+        }
+
+
+def create_store(store: str, directory: str):
+    if store == "memory":
+        return InMemorySubmissionRepository()
+    if store == "sql":
+        return SqlSubmissionRepository(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    from app.backend.db.journal import JournalSubmissionRepository
+    return JournalSubmissionRepository(os.path.join(directory, "journal"))
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """Seconds taken by each of ``repeat`` calls of ``fn``"""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        rounds.append(time.perf_counter() - started)
+    return rounds
+
+
+def entry(name: str, size: Optional[int], ops: int, rounds: List[float]) -> Dict[str, Any]:
+    median = statistics.median(rounds)
+    return {
+        "name": name,
+        "size": size,
+        "ops": ops,
+        "rounds": len(rounds),
+        "min_s": round(min(rounds), 6),
+        "median_s": round(median, 6),
+        "per_op_us": round(median / ops * 1e6, 3),
+        "ops_per_s": round(ops / median, 1) if median else None,
+    }
+
+
+def bench_per_item(pool: List[dict], items: int, repeat: int) -> List[Dict[str, Any]]:
+    """Benchmarks whose cost does not depend on the size of the store"""
+    payloads = list(itertools.islice(itertools.cycle(pool), items))
+    models = [SurveySubmissionIn.model_validate(payload) for payload in pool]
+    submissions = list(itertools.islice(itertools.cycle(models), items))
+
+    def validate():
+        for payload in payloads:
+            SurveySubmissionIn.model_validate(payload)
+
+    def score():
+        for submission in submissions:
+            survey_service.calculate_section_scores(submission)
+
+    return [
+        entry("validate", None, items, timed(validate, repeat)),
+        entry("calculate_section_scores", None, items, timed(score, repeat)),
+        entry("parse_questions_from_csv", None, 1, timed(parse_questions_from_csv, repeat)),
+    ]
+
+
+def ingest(models: List[SurveySubmissionIn], size: int) -> None:
+    """Store ``size`` submissions through the batch ingest path"""
+    stream = itertools.islice(itertools.cycle(models), size)
+    while True:
+        batch = list(itertools.islice(stream, INGEST_BATCH))
+        if not batch:
+            return
+        survey_service.save_submissions([payload.model_copy() for payload in batch])
+
+
+async def _admin_rounds(params: dict, repeat: int) -> List[float]:
+    from httpx import AsyncClient, ASGITransport
+    from app.backend.main import app
+
+    rounds = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as ac:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = await ac.get("/admin/submissions", params=params, headers=ADMIN_HEADERS)
+            rounds.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return rounds
+
+
+def bench_dataset(models: List[SurveySubmissionIn], size: int, store: str, repeat: int,
+                  singles: int, rebuild_max: int) -> List[Dict[str, Any]]:
+    """Benchmarks against a store holding ``size`` submissions"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="mystery_shopper_bench_") as directory:
+        set_repository(create_store(store, directory))
+        survey_service.clear_submissions()
+        try:
+            # Built (empty) aggregates are kept up to date by the ingest
+            survey_service.basic_metrics()
+            results.append(entry("ingest", size, size, timed(lambda: ingest(models, size), 1)))
+            results.append(entry("basic_metrics", size, 1, timed(survey_service.basic_metrics, repeat)))
+
+            if size <= rebuild_max:
+                def cold_metrics():
+                    survey_service._METRICS.reset()
+                    survey_service.basic_metrics()
+                results.append(entry("basic_metrics_cold", size, 1, timed(cold_metrics, repeat)))
+
+            results.append(entry("admin_list", size, 1, asyncio.run(_admin_rounds({}, repeat))))
+            results.append(entry("admin_list_filtered", size, 1, asyncio.run(_admin_rounds(ADMIN_FILTERED, repeat))))
+
+            # Last: adds to the dataset
+            fresh = [payload.model_copy() for payload in itertools.islice(itertools.cycle(models), singles * repeat)]
+            batches = iter([fresh[i:i + singles] for i in range(0, len(fresh), singles)])
+
+            def save_singles():
+                for payload in next(batches):
+                    survey_service.save_submission(payload)
+            results.append(entry("save_submission", size, singles, timed(save_singles, repeat)))
+        finally:
+            survey_service.clear_submissions()
+            set_repository(None)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], store: str = "memory", items: int = 10_000, repeat: int = 5, singles: int = 200,
+        rebuild_max: int = 100_000, answers: int = 60) -> Dict[str, Any]:
+    pool = list(make_payload_dicts(POOL_SIZE, answers))
+    models = [SurveySubmissionIn.model_validate(payload) for payload in pool]
+    results = bench_per_item(pool, items, repeat)
+    for size in sizes:
+        print(f"Dataset {size_label(size)}...", file=sys.stderr)
+        results.extend(bench_dataset(models, size, store, repeat, singles, rebuild_max))
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "store": store,
+            "answers": answers,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25) -> List[Dict[str, Any]]:
+    """Per benchmark change of the per-operation median against ``baseline``.
+
+    ``status`` is ``regression`` when it got slower by more than ``threshold``
+    (0.25 = 25%), ``improvement`` when faster by as much, ``new`` when the
+    baseline has no such benchmark and ``ok`` otherwise.
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        base = previous.get((result["name"], result["size"]))
+        if base is None:
+            rows.append({"name": result["name"], "size": result["size"], "status": "new",
+                         "per_op_us": result["per_op_us"], "baseline_per_op_us": None, "change": None})
+            continue
+        change = result["per_op_us"] / base["per_op_us"] - 1 if base["per_op_us"] else 0.0
+        status = "regression" if change > threshold else "improvement" if change < -threshold else "ok"
+        rows.append({"name": result["name"], "size": result["size"], "status": status,
+                     "per_op_us": result["per_op_us"], "baseline_per_op_us": base["per_op_us"],
+                     "change": round(change, 4)})
+    return rows
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<26}{'size':>6}{'ops':>10}{'median s':>12}{'per op us':>14}{'ops/s':>14}")
+    for r in results:
+        size = size_label(r["size"]) if r["size"] is not None else "-"
+        print(f"{r['name']:<26}{size:>6}{r['ops']:>10,}{r['median_s']:>12.4f}{r['per_op_us']:>14,.1f}"
+              f"{r['ops_per_s'] or 0:>14,.0f}")
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<26}{'size':>6}{'baseline us':>14}{'current us':>14}{'change':>9}  status")
+    for r in rows:
+        size = size_label(r["size"]) if r["size"] is not None else "-"
+        baseline = f"{r['baseline_per_op_us']:,.1f}" if r["baseline_per_op_us"] is not None else "-"
+        change = f"{r['change']:+.0%}" if r["change"] is not None else "-"
+        print(f"{r['name']:<26}{size:>6}{baseline:>14}{r['per_op_us']:>14,.1f}{change:>9}  {r['status']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scoring, metrics, ingest and admin list benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Dataset sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--store", choices=("memory", "sql", "journal"), default="memory",
+                        help="Submission store, in a temp directory (default: memory)")
+    parser.add_argument("--items", type=int, default=10_000,
+                        help="Payloads per round for validate / calculate_section_scores (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per benchmark (default: 5)")
+    parser.add_argument("--singles", type=int, default=200, help="save_submission calls per round (default: 200)")
+    parser.add_argument("--rebuild-max", type=int, default=100_000,
+                        help="Largest dataset to time basic_metrics_cold on (default: 100000)")
+    parser.add_argument("--answers", type=int, default=60, help="Answers per synthetic visit (default: 60)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--input", help="Compare this results file instead of running the benchmarks")
+    parser.add_argument("--compare", help="Baseline results JSON to flag regressions against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Slowdown of the per-operation median counted as a regression (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+        current = run(sizes, args.store, args.items, args.repeat, args.singles, args.rebuild_max, args.answers)
+        print_results(current["results"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(current, baseline, args.threshold)
+    print()
+    print_comparison(rows)
+    regressions = [r for r in rows if r["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Shared pytest configuration.
+
+Points the default submission store at a throwaway SQLite file so test runs
+never touch the developer's local ``mystery_shopper.db``, and provides the
+store and submission payload fixtures.
+"""
+import os
+import sys
+import tempfile
+
+# Add the project root directory to path (go up 3 levels from tests/)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="mystery_shopper_tests_")
+os.environ.setdefault("MYSTERY_SHOPPER_DB_URL", "sqlite:///" + os.path.join(_TEST_DB_DIR, "test.db"))
+
+import pytest
+
+
+@pytest.fixture
+def memory_store():
+    """Run a test against an empty in-memory repository with fresh metrics."""
+    from app.backend.db.repository import InMemorySubmissionRepository, set_repository
+    from app.backend.services import survey_service
+
+    repository = InMemorySubmissionRepository()
+    set_repository(repository)
+    survey_service.clear_submissions()
+    yield repository
+    set_repository(None)
+    survey_service.clear_submissions()
+
+
+@pytest.fixture
+def sql_store(tmp_path):
+    """Run a test against a fresh SQLite (WAL) repository in a temp directory."""
+    from app.backend.db.repository import SqlSubmissionRepository, set_repository
+    from app.backend.services import survey_service
+
+    repository = SqlSubmissionRepository(f"sqlite:///{tmp_path / 'submissions.db'}")
+    set_repository(repository)
+    survey_service.clear_submissions()
+    yield repository
+    set_repository(None)
+    survey_service.clear_submissions()
+
+
+@pytest.fixture
+def journal_store(tmp_path):
+    """Run a test against a journal-backed repository in a temp directory."""
+    from app.backend.db.journal import JournalSubmissionRepository
+    from app.backend.db.repository import set_repository
+    from app.backend.services import survey_service
+
+    repository = JournalSubmissionRepository(str(tmp_path / "journal"), commit_window=0)
+    set_repository(repository)
+    survey_service.clear_submissions()
+    yield repository
+    set_repository(None)
+    survey_service.clear_submissions()
+
+
+@pytest.fixture(params=["memory", "sql", "journal"])
+def any_store(request):
+    """Parametrize a test over every repository backend."""
+    return request.getfixturevalue(f"{request.param}_store")
+
+
+@pytest.fixture
+def payload():
+    """Factory for a valid submission body (JSON-ready; ``SurveySubmissionIn(**payload())`` for a model).
+
+    Two answers (Q1 with a comment, Q3) and a latency sample for Q1; ``score``
+    sets both answers and keyword arguments replace top-level fields. Passing
+    your own ``scores`` drops the default latency sample, since it must name
+    an answered question.
+    """
+    def make(score=1, **fields):
+        data = {
+            "channel": "WEB",
+            "location_code": "LOC1",
+            "shopper_id": "S1",
+            "visit_datetime": "2025-08-17T10:00:00+04:00",
+            "scores": [
+                {"question_id": "Q1", "score": score, "comment": "ok"},
+                {"question_id": "Q3", "score": score},
+            ],
+        }
+        if "scores" not in fields:
+            data["latency_samples"] = [{"question_id": "Q1", "ms": 900.0}]
+        data.update(fields)
+        return data
+    return make
+
+
+@pytest.fixture
+def random_payload():
+    """Factory for a ``SurveySubmissionIn`` with 20 random answers drawn from ``rng``."""
+    from app.backend.schemas.survey import SurveySubmissionIn
+    from app.backend.services import survey_service
+
+    def make(rng):
+        question_ids = rng.sample(sorted(survey_service.QUESTIONS), 20)
+        return SurveySubmissionIn(
+            channel=rng.choice(sorted(survey_service.ALLOWED_CHANNELS)),
+            location_code=f"LOC{rng.randint(1, 5)}",
+            shopper_id=f"S{rng.randint(1, 9)}",
+            visit_datetime=f"2025-08-{rng.randint(10, 20)}T10:00:00Z",
+            scores=[{"question_id": q, "score": rng.randint(1, 5)} for q in question_ids],
+        )
+    return make
+
+
+@pytest.fixture
+def score_data():
+    """A stored score breakdown, for repository tests that skip scoring."""
+    return {
+        "section_scores": {"Appearance": {"score": 0.5, "weight": 0.25, "weighted_score": 0.125,
+                                          "questions_count": 2, "raw_total": 1, "raw_max": 2}},
+        "overall_score": 0.5,
+        "total_weighted_score": 0.125,
+        "total_weight_used": 0.25,
+    }
@@ -20,7 +20,7 @@ def check_admin_api():
     try:
         response = requests.get("http://127.0.0.1:8000/api/admin/submissions", headers=headers)
         if response.status_code == 200:
-            data = response.json()
+            data = response.json()["items"]
             if data:
                 print("Sample submission fields:", list(data[0].keys()))
                 print("Sample submission:", json.dumps(data[0], indent=2))
@@ -0,0 +1,148 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.services import survey_service
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+
+
+@pytest.mark.asyncio
+async def test_submission_scores_are_stored_and_served(memory_store, monkeypatch, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/survey/submit", json=payload())
+        assert r.status_code == 200
+        submission_id = r.json()["id"]
+
+        stored = memory_store.get(submission_id)
+        assert stored.scoring_version == survey_service.SCORING_PLAN.version
+
+        # Reads must not rescore submissions stamped with the current rules
+        def fail(_):
+            raise AssertionError("stored scores should be served without recomputing")
+        monkeypatch.setattr(survey_service, "calculate_section_scores", fail)
+
+        detail = (await ac.get(f"/admin/submissions/{submission_id}", headers=ADMIN_HEADERS)).json()
+        assert detail["overall_score"] == stored.overall_score
+        assert detail["section_scores"] == stored.section_scores
+        assert detail["scores"][0] == {"question_id": "Q1", "score": 1, "comment": "ok"}
+
+        scores = (await ac.get(f"/admin/submissions/{submission_id}/scores", headers=ADMIN_HEADERS)).json()
+        assert scores == stored.score_data()
+
+        listing = (await ac.get("/admin/submissions", headers=ADMIN_HEADERS)).json()
+        assert [s["id"] for s in listing["items"]] == [submission_id]
+        assert listing["next_cursor"] is None
+
+        missing = await ac.get("/admin/submissions/999", headers=ADMIN_HEADERS)
+        assert missing.status_code == 404
+
+
+async def _collect(ac, params):
+    """Follow next_cursor until the last page, returning all ids in order."""
+    ids, cursor = [], None
+    while True:
+        page_params = dict(params, **({"cursor": cursor} if cursor else {}))
+        r = await ac.get("/admin/submissions", params=page_params, headers=ADMIN_HEADERS)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        assert len(page["items"]) <= params["limit"]
+        ids.extend(s["id"] for s in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_filters_and_sorting(any_store, payload):
+    channels = ["WEB", "ON_SITE", "CALL_CENTER"]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for i in range(25):
+            body = payload(channel=channels[i % 3], location_code=f"LOC{i % 4}", shopper_id=f"S{i % 5}",
+                           visit_datetime=f"2025-08-{1 + i % 10:02d}T10:00:00+04:00", score=1 + i % 2)
+            assert (await ac.post("/survey/submit", json=body)).status_code == 200
+        everything = [s for s in any_store.list_all()]
+
+        def expected(predicate, key, reverse):
+            rows = sorted((s for s in everything if predicate(s)), key=lambda s: (key(s), s.id), reverse=reverse)
+            return [s.id for s in rows]
+
+        # Default: newest first
+        assert await _collect(ac, {"limit": 7}) == expected(lambda s: True, lambda s: s.created_at, True)
+        assert await _collect(ac, {"limit": 4, "sort": "visit_datetime"}) == expected(
+            lambda s: True, lambda s: s.visit_datetime, False)
+        assert await _collect(ac, {"limit": 3, "sort": "-overall_score", "channel": "web"}) == expected(
+            lambda s: s.channel == "WEB", lambda s: s.overall_score, True)
+
+        filtered = await _collect(ac, {
+            "limit": 5, "sort": "id", "location_code": "LOC1",
+            "visit_from": "2025-08-03T06:00:00Z", "visit_to": "2025-08-08T06:00:00Z",
+        })
+        assert filtered == expected(
+            lambda s: s.location_code == "LOC1" and "2025-08-03" <= s.visit_datetime.date().isoformat() <= "2025-08-08",
+            lambda s: s.id, False)
+
+        high = max(s.overall_score for s in everything)
+        top = await _collect(ac, {"limit": 50, "min_score": high})
+        assert sorted(top) == sorted(s.id for s in everything if s.overall_score >= high)
+
+        bad = await ac.get("/admin/submissions", params={"cursor": "not-a-cursor"}, headers=ADMIN_HEADERS)
+        assert bad.status_code == 400
+        first = (await ac.get("/admin/submissions", params={"limit": 2}, headers=ADMIN_HEADERS)).json()
+        mismatched = await ac.get("/admin/submissions", params={"cursor": first["next_cursor"], "sort": "id"},
+                                  headers=ADMIN_HEADERS)
+        assert mismatched.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_field_projection(any_store, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for _ in range(3):
+            assert (await ac.post("/survey/submit", json=payload())).status_code == 200
+
+        summary = (await ac.get("/admin/submissions", headers=ADMIN_HEADERS)).json()["items"][0]
+        assert set(summary) == {"id", "channel", "location_code", "shopper_id",
+                                "visit_datetime", "created_at", "overall_score"}
+
+        projected = (await ac.get("/admin/submissions", params={"fields": "overall_score,scores"},
+                                  headers=ADMIN_HEADERS)).json()["items"][0]
+        assert list(projected) == ["id", "overall_score", "scores"]
+        assert projected["scores"][0]["question_id"] == "Q1"
+
+        full = (await ac.get("/admin/submissions", params={"fields": "all"}, headers=ADMIN_HEADERS)).json()
+        assert full["items"][0]["latency_samples"] == [{"question_id": "Q1", "ms": 900.0}]
+        detail = (await ac.get(f"/admin/submissions/{summary['id']}", headers=ADMIN_HEADERS)).json()
+        assert detail == full["items"][0]
+
+        compact_detail = (await ac.get(f"/admin/submissions/{summary['id']}", params={"fields": "section_scores"},
+                                       headers=ADMIN_HEADERS)).json()
+        assert set(compact_detail) == {"id", "section_scores"}
+
+        bad = await ac.get("/admin/submissions", params={"fields": "id,password"}, headers=ADMIN_HEADERS)
+        assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_scores_endpoint(any_store, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        ids = []
+        for score in (1, 2, 1):
+            ids.append((await ac.post("/survey/submit", json=payload(score=score))).json()["id"])
+
+        r = await ac.get("/admin/submissions/scores", params={"ids": f"{ids[2]},999,{ids[0]},{ids[2]}"},
+                         headers=ADMIN_HEADERS)
+        assert r.status_code == 200
+        body = r.json()
+        assert [item["id"] for item in body["items"]] == [ids[2], ids[0]]
+        assert body["missing"] == [999]
+        single = (await ac.get(f"/admin/submissions/{ids[0]}/scores", headers=ADMIN_HEADERS)).json()
+        assert body["items"][1] == {"id": ids[0], **single}
+
+        # Outdated stamps are rescored from the stored answers
+        any_store.update_scores([(ids[0], dict(single, overall_score=0.0))], "outdated")
+        rescored = (await ac.get("/admin/submissions/scores", params={"ids": str(ids[0])},
+                                 headers=ADMIN_HEADERS)).json()
+        assert rescored["items"][0]["overall_score"] == single["overall_score"]
+
+        bad = await ac.get("/admin/submissions/scores", params={"ids": "1,abc"}, headers=ADMIN_HEADERS)
+        assert bad.status_code == 400
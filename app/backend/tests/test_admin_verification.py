@@ -49,7 +49,7 @@ def verify_admin_data():
         submissions_response = requests.get(f"{base_url}/api/admin/submissions", headers=headers, timeout=10)
         
         if submissions_response.status_code == 200:
-            submissions = submissions_response.json()
+            submissions = submissions_response.json()["items"]
             print(f"✅ Submissions endpoint accessible")
             print(f"   Total Submissions Retrieved: {len(submissions)}")
             
@@ -0,0 +1,71 @@
+import csv
+import io
+import random
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.services import survey_service
+from app.backend.services.survey_service import (
+    analytics_breakdown, list_submissions, question_statistics, rebuild_metrics, save_submission
+)
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+
+
+def _reference_breakdown(submissions, by):
+    groups = {}
+    for sub in submissions:
+        groups.setdefault(getattr(sub, by), []).append(sub.overall_score)
+    return {key: (len(scores), round(sum(scores) / len(scores), 4)) for key, scores in groups.items()}
+
+
+def test_breakdowns_match_object_scan(any_store, random_payload):
+    rng = random.Random(11)
+    for _ in range(30):
+        save_submission(random_payload(rng))
+
+    submissions = list_submissions()
+    for by in ("channel", "location_code", "shopper_id"):
+        incremental = analytics_breakdown(by)
+        assert {k: (v["count"], v["avg_score"]) for k, v in incremental.items()} == \
+            _reference_breakdown(submissions, by)
+        rebuild_metrics()
+        assert analytics_breakdown(by) == incremental
+
+    stats = question_statistics()
+    for question_id, entry in stats.items():
+        answers = [s.score for sub in submissions for s in sub.scores if s.question_id == question_id]
+        assert entry["answered"] == len(answers)
+        if answers:
+            assert entry["avg_score"] == round(sum(answers) / len(answers), 4)
+
+    # Columns cost a small, fixed number of bytes per visit
+    per_visit = survey_service._ANALYTICS.memory_bytes() / len(submissions)
+    assert per_visit < 8 * 8 + len(survey_service.QUESTIONS) + 8 * len(survey_service.SCORING_PLAN.sections)
+
+
+@pytest.mark.asyncio
+async def test_analytics_endpoints(memory_store, random_payload):
+    rng = random.Random(12)
+    for _ in range(5):
+        save_submission(random_payload(rng))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.get("/admin/analytics/breakdown", params={"by": "location_code"}, headers=ADMIN_HEADERS)
+        assert r.status_code == 200
+        assert sum(g["count"] for g in r.json()["groups"].values()) == 5
+
+        r = await ac.get("/admin/analytics/breakdown",
+                         params={"visit_from": "2025-08-21T00:00:00Z"}, headers=ADMIN_HEADERS)
+        assert r.json()["groups"] == {}
+        assert (await ac.get("/admin/analytics/breakdown", params={"by": "nope"},
+                             headers=ADMIN_HEADERS)).status_code == 422
+
+        r = await ac.get("/admin/export.csv", headers=ADMIN_HEADERS)
+        assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert [int(row["id"]) for row in rows] == [sub.id for sub in list_submissions()]
+        first = list_submissions()[0]
+        for answer in first.scores:
+            assert rows[0][answer.question_id] == str(answer.score)
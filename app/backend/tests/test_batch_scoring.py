@@ -0,0 +1,91 @@
+import random
+
+import numpy as np
+
+from app.backend.utils import batch_scoring
+from app.backend.utils.scoring_analysis import (
+    calculate_weighted_section_scores, get_main_section_mapping, get_section_weight_mapping, load_questions_from_csv
+)
+
+
+def reference_weighted_section_scores(submissions, questions):
+    """The original nested-loop scoring, kept as an oracle for the batch engine."""
+    section_weights = get_section_weight_mapping()
+    main_section_mapping = get_main_section_mapping()
+    section_groups = {}
+    for q in questions:
+        section_groups.setdefault(main_section_mapping.get(q['section'], q['section']), []).append(q)
+
+    results = []
+    for submission in submissions:
+        section_scores = {}
+        for main_section, section_questions in section_groups.items():
+            if main_section not in section_weights:
+                continue
+            section_total = section_max = 0
+            for question in section_questions:
+                # The first answer to a question counts
+                section_total += next((s['score'] for s in submission.get('scores', [])
+                                       if s['question_id'] == question['id']), 0)
+                section_max += question['max_score']
+            if section_max > 0:
+                weight = section_weights[main_section]['weight']
+                section_scores[main_section] = {
+                    'score': section_total / section_max,
+                    'weight': weight,
+                    'weighted_score': section_total / section_max * weight,
+                    'questions_count': len(section_questions),
+                    'raw_total': section_total,
+                    'raw_max': section_max,
+                    'display_name': section_weights[main_section]['display_name']
+                }
+        total_weighted_score = sum(s['weighted_score'] for s in section_scores.values())
+        total_weight = sum(s['weight'] for s in section_scores.values())
+        results.append({
+            'submission_id': submission.get('id'),
+            'section_scores': section_scores,
+            'overall_score': total_weighted_score / total_weight if total_weight > 0 else 0,
+            'total_weighted_score': total_weighted_score,
+            'total_weight_used': total_weight
+        })
+    return results
+
+
+def _submissions(questions, count, seed=7):
+    rng = random.Random(seed)
+    ids = [q['id'] for q in questions] + ['Q_UNKNOWN']
+    submissions = []
+    for i in range(count):
+        answered = rng.sample(ids, rng.randint(0, len(ids)))
+        scores = [{'question_id': q, 'score': rng.randint(0, 5)} for q in answered]
+        # Repeated answers: only the first one counts
+        scores += [{'question_id': q, 'score': 5} for q in answered[:3]]
+        submissions.append({'id': i + 1, 'scores': scores})
+    return submissions
+
+
+def test_batch_engine_matches_loop():
+    questions, _ = load_questions_from_csv()
+    submissions = _submissions(questions, 200)
+
+    batch = calculate_weighted_section_scores(submissions, questions)
+    loop = reference_weighted_section_scores(submissions, questions)
+
+    assert batch == loop
+    assert [type(s['raw_total']) for s in batch[0]['section_scores'].values()] == \
+        [type(s['raw_total']) for s in loop[0]['section_scores'].values()]
+    assert calculate_weighted_section_scores([], questions) == {}
+
+
+def test_score_matrix_ignores_unanswered_cells():
+    questions, _ = load_questions_from_csv()
+    matrix = batch_scoring.SectionScoringMatrix(questions, get_section_weight_mapping(), get_main_section_mapping())
+    scores, answered = matrix.pack(_submissions(questions, 50))
+
+    # Cells outside the mask are ignored whatever they hold (e.g. -1 sentinels)
+    noisy = np.where(answered, scores, -1)
+    expected = matrix.score_matrix(scores, answered)
+    result = matrix.score_matrix(noisy, answered)
+    for key in expected:
+        assert np.array_equal(expected[key], result[key])
+    assert result['raw_total'].shape == (50, len(matrix.sections))
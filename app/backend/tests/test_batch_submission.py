@@ -0,0 +1,48 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.services import survey_service
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_each_item_and_stores_valid_ones_together(any_store, monkeypatch, payload):
+    writes = []
+    add_many = any_store.add_many
+    monkeypatch.setattr(any_store, "add_many", lambda *args: writes.append(1) or add_many(*args))
+
+    batch = [
+        payload(shopper_id="S1"),
+        payload(scores=[{"question_id": "Q999", "score": 4}]),  # unknown question
+        payload(score=9),                                       # schema violation
+        payload(channel="ON_SITE", shopper_id="S2"),
+    ]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/survey/submit/batch", json={"submissions": batch})
+        assert r.status_code == 200
+        body = r.json()
+        assert (body["accepted"], body["rejected"]) == (2, 2)
+        assert [item["status"] for item in body["results"]] == ["created", "error", "error", "created"]
+        assert body["results"][1]["error"] == "Invalid question id: Q999"
+        assert body["results"][2]["error"].startswith("scores.0.score:")
+        assert [body["results"][i]["submission"]["id"] for i in (0, 3)] == [1, 2]
+        assert body["results"][3]["submission"]["shopper_id"] == "S2"
+        assert writes == [1]
+
+        metrics = (await ac.get("/admin/metrics", headers=ADMIN_HEADERS)).json()
+        assert metrics["total_submissions"] == 2
+        listing = (await ac.get("/admin/submissions?sort=id", headers=ADMIN_HEADERS)).json()
+        assert [s["shopper_id"] for s in listing["items"]] == ["S1", "S2"]
+
+
+@pytest.mark.asyncio
+async def test_batch_size_is_limited(memory_store, monkeypatch, payload):
+    monkeypatch.setattr(survey_service, "MAX_BATCH_SIZE", 2)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/survey/submit/batch", json={"submissions": [payload()] * 3})
+        assert r.status_code == 413
+        r = await ac.post("/survey/submit/batch", json={"submissions": []})
+        assert r.status_code == 422
+    assert memory_store.count() == 0
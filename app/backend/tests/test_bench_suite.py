@@ -0,0 +1,39 @@
+import json
+
+from app.backend.tests.benchmarks import bench_suite
+
+
+def test_suite_runs_every_benchmark_on_a_small_dataset():
+    current = bench_suite.run([50], items=20, repeat=2, singles=5, answers=10)
+    names = {(r["name"], r["size"]) for r in current["results"]}
+    assert names == {
+        ("validate", None), ("calculate_section_scores", None), ("parse_questions_from_csv", None),
+        ("ingest", 50), ("basic_metrics", 50), ("basic_metrics_cold", 50),
+        ("admin_list", 50), ("admin_list_filtered", 50), ("save_submission", 50),
+    }
+    ingest = next(r for r in current["results"] if r["name"] == "ingest")
+    assert ingest["ops"] == 50 and ingest["rounds"] == 1
+    assert all(r["per_op_us"] > 0 for r in current["results"])
+    # Machine-readable as written
+    assert json.loads(json.dumps(current))["meta"]["store"] == "memory"
+
+
+def test_compare_flags_regressions_against_the_baseline(tmp_path):
+    def results(**per_op):
+        return {"meta": {}, "results": [
+            {"name": name, "size": 1000, "ops": 1, "rounds": 1, "min_s": 0, "median_s": 0,
+             "per_op_us": us, "ops_per_s": None}
+            for name, us in per_op.items()
+        ]}
+
+    baseline = results(ingest=100.0, basic_metrics=10.0, admin_list=50.0)
+    current = results(ingest=130.0, basic_metrics=5.0, admin_list=55.0, save_submission=20.0)
+    statuses = {r["name"]: r["status"] for r in bench_suite.compare(current, baseline, threshold=0.25)}
+    assert statuses == {"ingest": "regression", "basic_metrics": "improvement", "admin_list": "ok",
+                        "save_submission": "new"}
+
+    (tmp_path / "current.json").write_text(json.dumps(current))
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline))
+    args = ["--input", str(tmp_path / "current.json"), "--compare", str(tmp_path / "baseline.json")]
+    assert bench_suite.main(args) == 1
+    assert bench_suite.main(args + ["--threshold", "0.5"]) == 0
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.backend.db.journal import JournalSubmissionRepository
+from app.backend.db.locks import ReadWriteLock
+from app.backend.db.repository import check_shared_store
+from app.backend.db.query import SubmissionQuery
+from app.backend.schemas.survey import SurveySubmissionIn
+from app.backend.services.survey_service import calculate_section_scores
+from app.backend.services import survey_service
+
+THREADS = 8
+ROUNDS = 25
+BATCH = 3
+
+
+def test_concurrent_submissions_get_unique_consecutive_ids(any_store, payload):
+    done = threading.Event()
+    read_errors = []
+
+    def submit(worker):
+        ids = []
+        for n in range(ROUNDS):
+            ids.append(survey_service.save_submission(SurveySubmissionIn(**payload(shopper_id=f"S{worker}-{n}"))).id)
+            batch = survey_service.save_submissions([SurveySubmissionIn(**payload(shopper_id=f"B{worker}-{n}-{i}"))
+                                                     for i in range(BATCH)])
+            ids.extend(submission.id for submission in batch)
+        return ids
+
+    def read():
+        # Dashboard reads racing the writers must see consistent pages
+        while not done.is_set():
+            try:
+                page = any_store.query(SubmissionQuery(limit=50, load_answers=True))
+                assert all(len(s.scores) == 2 for s in page.items)
+                any_store.count()
+            except Exception as e:  # pragma: no cover - reported below
+                read_errors.append(e)
+                return
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            returned = [i for ids in pool.map(submit, range(THREADS)) for i in ids]
+    finally:
+        done.set()
+        reader.join()
+
+    expected = THREADS * ROUNDS * (1 + BATCH)
+    assert not read_errors
+    assert len(returned) == len(set(returned)) == expected
+    assert sorted(returned) == list(range(1, expected + 1))
+    stored = [s.id for s in any_store.list_all()]
+    assert sorted(stored) == sorted(returned)
+    assert survey_service.basic_metrics()["total_submissions"] == expected
+
+    if isinstance(any_store, JournalSubmissionRepository):
+        reopened = JournalSubmissionRepository(any_store.directory, commit_window=0)
+        try:
+            assert sorted(s.id for s in reopened.list_all()) == sorted(returned)
+        finally:
+            reopened.close()
+
+
+def test_read_write_lock_excludes_writers_and_shares_readers():
+    lock = ReadWriteLock()
+    events = []
+    readers_in = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with lock.read():
+            readers_in.wait()  # both readers hold the lock at once
+            time.sleep(0.05)
+            events.append("read")
+
+    def writer():
+        with lock.write():
+            with lock.write(), lock.read():  # reentrant, and may read its own writes
+                events.append("write")
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    time.sleep(0.01)
+    writing = threading.Thread(target=writer)
+    writing.start()
+    for thread in readers + [writing]:
+        thread.join(timeout=5)
+    assert events == ["read", "read", "write"]
+
+
+def test_multiple_workers_require_a_shared_store():
+    check_shared_store(1, backend="memory")
+    check_shared_store(4, backend="sql", url="sqlite:///shared.db")
+    for backend in ("memory", "journal"):
+        with pytest.raises(RuntimeError, match="one process"):
+            check_shared_store(4, backend=backend)
+    with pytest.raises(RuntimeError, match="in-memory SQLite"):
+        check_shared_store(2, backend="sql", url="sqlite://")
+
+
+def test_worker_aggregates_catch_up_with_the_shared_store(sql_store, monkeypatch, payload):
+    monkeypatch.setattr(survey_service, "_SHARED_STORE", True)
+    survey_service.rebuild_metrics()
+
+    def other_worker_submits(shopper_id):
+        submission = SurveySubmissionIn(**payload(shopper_id=shopper_id))
+        score_data = calculate_section_scores(submission)
+        sql_store.add(submission, submission.visit_datetime, score_data, survey_service.SCORING_PLAN.version)
+
+    survey_service.save_submission(SurveySubmissionIn(**payload(shopper_id="mine")))
+    other_worker_submits("theirs-1")
+    other_worker_submits("theirs-2")
+    assert survey_service.basic_metrics()["total_submissions"] == 3
+    assert survey_service.analytics_breakdown("shopper_id")["theirs-2"]["count"] == 1
+
+    # Another worker cleared the store: the aggregates no longer match it and are rebuilt
+    sql_store.clear()
+    other_worker_submits("after-clear")
+    assert survey_service.basic_metrics()["total_submissions"] == 1
@@ -102,7 +102,7 @@ def test_form_submission():
                     # Get admin submissions (need to handle auth)
                     admin_response = requests.get(f"{base_url}/admin/submissions", timeout=10)
                     if admin_response.status_code == 200:
-                        submissions = admin_response.json()
+                        submissions = admin_response.json()["items"]
                         print(f"   ✅ Retrieved {len(submissions)} total submissions")
                         
                         # Find our test submission
@@ -0,0 +1,120 @@
+from datetime import datetime
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.db.journal import JournalSubmissionRepository
+from app.backend.db.repository import DuplicateIdempotencyKey, SqlSubmissionRepository, set_repository
+from app.backend.schemas.survey import SurveySubmissionIn
+from app.backend.services import survey_service
+from app.backend.services.idempotency import IdempotencyConflict
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+
+
+@pytest.mark.asyncio
+async def test_retry_with_same_key_returns_original_submission(any_store, payload):
+    headers = {"Idempotency-Key": "visit-1"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post("/survey/submit", json=payload(), headers=headers)
+        retry = await ac.post("/survey/submit", json=payload(), headers=headers)
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+
+        reused = await ac.post("/survey/submit", json=payload(score=2), headers=headers)
+        assert reused.status_code == 422
+        other = await ac.post("/survey/submit", json=payload(), headers={"Idempotency-Key": "visit-2"})
+        assert other.json()["id"] == first.json()["id"] + 1
+
+        metrics = (await ac.get("/admin/metrics", headers=ADMIN_HEADERS)).json()
+        assert metrics["total_submissions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rejected_submission_does_not_consume_key(memory_store, payload):
+    headers = {"Idempotency-Key": "visit-1"}
+    invalid = payload(scores=[{"question_id": "Q999", "score": 4}])
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.post("/survey/submit", json=invalid, headers=headers)).status_code == 400
+        assert (await ac.post("/survey/submit", json=payload(), headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_batch_items_with_keys(any_store, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post("/survey/submit/batch", json={"submissions": [
+            dict(payload(shopper_id="S1"), idempotency_key="a"),
+            dict(payload(shopper_id="S2"), idempotency_key="b"),
+            dict(payload(shopper_id="S1"), idempotency_key="a"),          # repeated within the batch
+            dict(payload(shopper_id="S3", score=5), idempotency_key="b"),  # same key, different visit
+        ]})
+        body = first.json()
+        assert [item["status"] for item in body["results"]] == ["created", "created", "created", "error"]
+        assert body["results"][2]["submission"] == body["results"][0]["submission"]
+
+        retry = await ac.post("/survey/submit/batch", json={"submissions": [
+            dict(payload(shopper_id="S2"), idempotency_key="b"),
+            dict(payload(shopper_id="S4")),
+        ]})
+        results = retry.json()["results"]
+        assert results[0]["submission"] == body["results"][1]["submission"]
+        assert results[1]["submission"]["id"] == 3
+
+        metrics = (await ac.get("/admin/metrics", headers=ADMIN_HEADERS)).json()
+        assert metrics["total_submissions"] == 3
+
+
+def test_retry_reaching_another_worker_returns_original(tmp_path, monkeypatch, payload):
+    """Two repositories on one database stand in for two server processes."""
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    first_worker, second_worker = SqlSubmissionRepository(url), SqlSubmissionRepository(url)
+    try:
+        set_repository(first_worker)
+        original = survey_service.save_submission(SurveySubmissionIn(**payload()), "visit-1")
+        set_repository(second_worker)
+        retry = survey_service.save_submission(SurveySubmissionIn(**payload()), "visit-1")
+        assert retry.id == original.id
+
+        # Racing the first attempt: the lookup misses, the unique key rejects the insert
+        lookups = []
+        find = second_worker.find_idempotency_keys
+        monkeypatch.setattr(second_worker, "find_idempotency_keys",
+                            lambda keys: lookups.append(keys) or ({} if len(lookups) == 1 else find(keys)))
+        raced = survey_service.save_submission(SurveySubmissionIn(**payload()), "visit-1")
+        assert raced.id == original.id and len(lookups) == 2
+        with pytest.raises(IdempotencyConflict):
+            survey_service.save_submission(SurveySubmissionIn(**payload(score=2)), "visit-1")
+        assert second_worker.count() == 1
+    finally:
+        set_repository(None)
+        first_worker.close()
+        survey_service.clear_submissions()
+
+
+def test_stores_accept_each_key_once(any_store, payload):
+    submission = SurveySubmissionIn(**payload())
+    item = (submission, datetime.utcnow(), survey_service.calculate_section_scores(submission), "v1")
+    stored = any_store.add_many([item], [("k1", "f1")])
+    with pytest.raises(DuplicateIdempotencyKey):
+        any_store.add_many([item, item], [("k2", "f2"), ("k1", "f1")])
+    with pytest.raises(DuplicateIdempotencyKey):
+        any_store.add(*item, ("k1", "f1"))
+    assert any_store.count() == 1
+    assert any_store.find_idempotency_keys(["k1", "k2"]) == {"k1": (stored[0].id, "f1")}
+
+
+def test_journal_keeps_keys_across_restarts(tmp_path, payload):
+    submission = SurveySubmissionIn(**payload())
+    item = (submission, datetime.utcnow(), survey_service.calculate_section_scores(submission), "v1")
+    repository = JournalSubmissionRepository(str(tmp_path), commit_window=0)
+    repository.add(*item, ("journaled", "f1"))
+    repository.add_many([item], [("snapshotted", "f2")])
+    repository.compact()
+    repository.add(*item, ("replayed", "f3"))
+    repository.close()
+
+    reopened = JournalSubmissionRepository(str(tmp_path), commit_window=0)
+    assert reopened.find_idempotency_keys(["journaled", "snapshotted", "replayed"]) == {
+        "journaled": (1, "f1"), "snapshotted": (2, "f2"), "replayed": (3, "f3")
+    }
+    reopened.close()
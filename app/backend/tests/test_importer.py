@@ -0,0 +1,140 @@
+import os
+import csv
+from datetime import datetime
+
+import openpyxl
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.services import importer
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+Q0_TEXT = ("Was the service center location available on the Google map, "
+           "the entity website, or signboards on the roads?")
+HEADER = ["ID", "Completion time", "Visit date", "Location", "Shopper ID", "Channel",
+          "Q1", "Q1 comment", Q0_TEXT, "Q3. Free text after the id", "Notes"]
+
+
+def _rows(count):
+    return [
+        [i, "8/17/25 10:30:00", "8/17/2025 10:15", f"LOC{i % 3}", f"S{i}", "WEB",
+         "4", "fine" if i == 0 else "", "Yes (1)", str(1 + i % 5), "x"]
+        for i in range(count)
+    ]
+
+
+def _write_csv(path, rows, header=HEADER):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_csv_columns_are_mapped_through_the_question_bank(tmp_path, memory_store):
+    rows = _rows(3) + [[], [9, "", "not a date", "LOC1", "S9", "WEB", "4", "", "", "", ""]]
+    summary = importer.import_file(_write_csv(tmp_path / "export.csv", rows), workers=0)
+
+    assert (summary["imported"], summary["rejected"]) == (3, 1)
+    assert summary["errors"][0]["row"] == 6
+    assert summary["errors"][0]["error"].startswith("visit_datetime:")
+    assert summary["mapped_questions"] == 3
+    assert summary["unmapped_columns"] == ["ID", "Notes"]
+
+    first = memory_store.get(1)
+    # Visit date wins over Completion time
+    assert first.visit_datetime == datetime(2025, 8, 17, 10, 15)
+    assert [(s.question_id, s.score, s.comment) for s in first.scores] == [
+        ("Q1", 4, "fine"), ("Q0", 1, None), ("Q3", 1, None)
+    ]
+    assert memory_store.get(3).scores[2].score == 3
+
+
+def test_missing_columns_are_reported(tmp_path, memory_store):
+    path = _write_csv(tmp_path / "export.csv", _rows(1), header=["Q1", "Location", "Shopper ID"])
+    with pytest.raises(ValueError, match="Missing columns: channel, visit_datetime"):
+        importer.import_file(path, workers=0)
+    # A default channel stands in for a channel column
+    with pytest.raises(ValueError, match="Missing columns: visit_datetime$"):
+        importer.import_file(path, workers=0, default_channel="WEB")
+
+
+def test_interrupted_import_resumes_from_checkpoint(tmp_path, memory_store, monkeypatch):
+    path = _write_csv(tmp_path / "export.csv", _rows(7))
+    checkpoint = str(tmp_path / "export.import.json")
+    save_submissions = importer.save_submissions
+    calls = []
+
+    def crash_after_third_chunk(payloads, keys):
+        # Killed after the store committed, before the checkpoint was saved
+        calls.append(len(payloads))
+        results = save_submissions(payloads, keys)
+        if len(calls) == 3:
+            raise RuntimeError("killed")
+        return results
+
+    monkeypatch.setattr(importer, "save_submissions", crash_after_third_chunk)
+    with pytest.raises(RuntimeError):
+        importer.import_file(path, checkpoint_path=checkpoint, workers=0, chunk_rows=2)
+    assert memory_store.count() == 6
+
+    monkeypatch.setattr(importer, "save_submissions", save_submissions)
+    summary = importer.import_file(path, checkpoint_path=checkpoint, workers=0, chunk_rows=2)
+    assert summary["resumed_at_row"] == 6
+    assert (summary["imported"], summary["rejected"]) == (7, 0)
+    # The third chunk is replayed from its row keys, not stored twice
+    assert [s.shopper_id for s in memory_store.list_all()] == [f"S{i}" for i in range(7)]
+
+    # A finished file is not imported twice
+    again = importer.import_file(path, checkpoint_path=checkpoint, workers=0, chunk_rows=2)
+    assert again["already_complete"] and memory_store.count() == 7
+
+
+def test_xlsx_import_validates_in_worker_processes(tmp_path, memory_store):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER)
+    for row in _rows(5):
+        row[2] = datetime(2025, 8, 17, 10, 15)
+        row[6] = 4  # numeric cells come back as ints / floats
+        sheet.append(row)
+    path = str(tmp_path / "export.xlsx")
+    workbook.save(path)
+
+    summary = importer.import_file(path, workers=1, chunk_rows=2)
+    assert (summary["format"], summary["imported"], summary["rejected"]) == ("xlsx", 5, 0)
+    assert memory_store.get(5).visit_datetime == datetime(2025, 8, 17, 10, 15)
+
+
+def test_uploads_validate_in_process_unless_opted_in(monkeypatch):
+    monkeypatch.delenv(importer.WORKERS_ENV, raising=False)
+    assert importer.upload_workers() == 0
+    monkeypatch.setenv(importer.WORKERS_ENV, "64")
+    assert importer.upload_workers() == importer.MAX_UPLOAD_WORKERS
+
+
+@pytest.mark.asyncio
+async def test_import_endpoint(tmp_path, memory_store, monkeypatch):
+    monkeypatch.setenv(importer.IMPORT_DIR_ENV, str(tmp_path / "imports"))
+    with open(_write_csv(tmp_path / "export.csv", _rows(2)), "rb") as f:
+        content = f.read()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/admin/import", headers=ADMIN_HEADERS,
+                          files={"file": ("export.csv", content, "text/csv")})
+        assert r.status_code == 200
+        assert r.json()["imported"] == 2
+
+        # Same upload again: the checkpoint says it is done
+        r = await ac.post("/admin/import", headers=ADMIN_HEADERS,
+                          files={"file": ("export.csv", content, "text/csv")})
+        assert r.json()["already_complete"] is True
+        assert memory_store.count() == 2
+
+        r = await ac.post("/admin/import", headers=ADMIN_HEADERS,
+                          files={"file": ("export.txt", content, "text/plain")})
+        assert r.status_code == 400
+        r = await ac.post("/admin/import", files={"file": ("export.csv", content, "text/csv")})
+        assert r.status_code == 401
+    # Staged uploads are removed, checkpoints kept
+    assert [name.endswith(".json") for name in os.listdir(tmp_path / "imports")] == [True]
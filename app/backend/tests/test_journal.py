@@ -0,0 +1,143 @@
+import os
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.backend.db.journal import JournalSubmissionRepository, encode_entry
+from app.backend.schemas.survey import SurveySubmissionIn
+
+CREATED_AT = datetime(2025, 8, 17, 7, 0, 0, 123456)
+
+
+@pytest.fixture
+def submission(payload):
+    return SurveySubmissionIn(**payload())
+
+
+def _open(directory, **kwargs):
+    kwargs.setdefault("commit_window", 0)
+    return JournalSubmissionRepository(str(directory), **kwargs)
+
+
+def test_journal_replays_after_restart(tmp_path, payload, submission, score_data):
+    repo = _open(tmp_path)
+    first = repo.add(submission, CREATED_AT, score_data, "v1")
+    naive = SurveySubmissionIn(**payload(channel="ON_SITE", visit_datetime="2025-08-18T09:00:00"))
+    repo.add(naive, CREATED_AT, score_data, "v1")
+    repo.update_scores([(first.id, dict(score_data, overall_score=0.75))], "v2")
+    before = [s.model_dump() for s in repo.list_all()]
+    repo.close()
+
+    reopened = _open(tmp_path)
+    assert [s.model_dump() for s in reopened.list_all()] == before
+    assert reopened.get(first.id).overall_score == 0.75
+    assert reopened.get(first.id).scoring_version == "v2"
+    assert reopened.add(submission, CREATED_AT, score_data, "v2").id == 3
+    reopened.close()
+
+
+def test_torn_tail_is_discarded(tmp_path, submission, score_data):
+    repo = _open(tmp_path)
+    repo.add(submission, CREATED_AT, score_data, "v1")
+    repo.add(submission, CREATED_AT, score_data, "v1")
+    repo.close()
+    journal_path = tmp_path / "journal.bin"
+    intact_size = journal_path.stat().st_size
+    # A crash mid-append leaves part of an entry behind
+    with open(journal_path, "ab") as f:
+        f.write(encode_entry({"op": "add", "seq": 3})[:-5])
+
+    reopened = _open(tmp_path)
+    assert reopened.count() == 2
+    assert journal_path.stat().st_size == intact_size
+    reopened.add(submission, CREATED_AT, score_data, "v1")
+    reopened.close()
+    assert _open(tmp_path).count() == 3
+
+
+def test_snapshot_compacts_journal(tmp_path, submission, score_data):
+    repo = _open(tmp_path, snapshot_every=5)
+    for _ in range(12):
+        repo.add(submission, CREATED_AT, score_data, "v1")
+    assert (tmp_path / "snapshot.bin").exists()
+    assert repo._journal.entries < 5
+    before = [s.model_dump() for s in repo.list_all()]
+    repo.close()
+
+    reopened = _open(tmp_path, snapshot_every=5)
+    assert [s.model_dump() for s in reopened.list_all()] == before
+    reopened.close()
+
+
+def test_crash_before_journal_truncation_does_not_duplicate(tmp_path, submission, score_data):
+    repo = _open(tmp_path)
+    for _ in range(3):
+        repo.add(submission, CREATED_AT, score_data, "v1")
+    journal_bytes = (tmp_path / "journal.bin").read_bytes()
+    repo.compact()
+    repo.close()
+    # Snapshot renamed into place, but the journal was never cut
+    (tmp_path / "journal.bin").write_bytes(journal_bytes)
+
+    reopened = _open(tmp_path)
+    assert [s.id for s in reopened.list_all()] == [1, 2, 3]
+    reopened.close()
+
+
+def test_writes_are_not_blocked_while_the_snapshot_is_written(tmp_path, monkeypatch, submission, score_data):
+    repo = _open(tmp_path)
+    for _ in range(3):
+        repo.add(submission, CREATED_AT, score_data, "v1")
+    written = []
+    replace = os.replace
+
+    def replace_after_a_write(source, target):
+        # Snapshot encoded and fsynced but not renamed yet: another thread stores a submission
+        if target == repo.snapshot_path:
+            writer = threading.Thread(target=lambda: written.append(repo.add(submission, CREATED_AT, score_data, "v1")))
+            writer.start()
+            writer.join(5)
+        return replace(source, target)
+
+    monkeypatch.setattr(os, "replace", replace_after_a_write)
+    repo.compact()
+    assert [s.id for s in written] == [4]
+    # The concurrent write is after the snapshot's seq, so it stays in the journal
+    assert repo._journal.entries == 1
+    repo.close()
+
+    reopened = _open(tmp_path)
+    assert [s.id for s in reopened.list_all()] == [1, 2, 3, 4]
+    reopened.close()
+
+
+def test_clear_is_durable(tmp_path, submission, score_data):
+    repo = _open(tmp_path)
+    repo.add(submission, CREATED_AT, score_data, "v1")
+    repo.clear()
+    repo.close()
+    reopened = _open(tmp_path)
+    assert reopened.count() == 0
+    assert reopened.add(submission, CREATED_AT, score_data, "v1").id == 1
+    reopened.close()
+
+
+def test_group_commit_shares_fsyncs(tmp_path, submission, score_data):
+    repo = _open(tmp_path, commit_window=0.05)
+
+    def submit():
+        for _ in range(5):
+            repo.add(submission, CREATED_AT, score_data, "v1")
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert repo.count() == 40
+    assert sorted(s.id for s in repo.list_all()) == list(range(1, 41))
+    assert repo._journal.commits < 40
+    repo.close()
+    assert _open(tmp_path).count() == 40
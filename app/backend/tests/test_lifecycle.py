@@ -0,0 +1,91 @@
+import threading
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app, api_warmup_stages
+from app.backend.db.journal import JournalSubmissionRepository
+from app.backend.db.repository import get_repository
+from app.backend.services import lifecycle
+from app.backend.services.survey_service import save_submission
+from app.backend.schemas.survey import SurveySubmissionIn
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+
+
+@pytest.fixture
+def signals(monkeypatch):
+    """Record shutdown signals instead of sending them to the test process."""
+    sent = []
+    monkeypatch.setattr(lifecycle, "_draining", threading.Event())
+    monkeypatch.setattr(lifecycle, "_signal_shutdown", sent.append)
+    return sent
+
+
+@pytest.fixture
+def cold(monkeypatch):
+    """A process that has not warmed up yet."""
+    monkeypatch.setattr(lifecycle, "_warmed", threading.Event())
+    monkeypatch.setattr(lifecycle, "_draining", threading.Event())
+    monkeypatch.setattr(lifecycle, "_warmup_ms", {})
+
+
+@pytest.mark.asyncio
+async def test_ready_only_after_warmup_and_until_draining(cold, memory_store, monkeypatch):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.get("/healthz")).json() == {"status": "ok"}
+        starting = await ac.get("/readyz")
+        assert starting.status_code == 503
+        assert starting.json()["status"] == "warming_up"
+
+        timings = lifecycle.warm_up(api_warmup_stages())
+        assert list(timings) == ["store", "question_bank", "scoring_plan", "schemas", "aggregates"]
+        ready = await ac.get("/readyz")
+        assert ready.status_code == 200
+        assert ready.json()["warmup_ms"] == timings
+
+        monkeypatch.setattr(lifecycle, "_signal_shutdown", lambda pid: None)
+        lifecycle.request_shutdown()
+        draining = await ac.get("/readyz")
+        assert (draining.status_code, draining.json()["status"]) == (503, "draining")
+
+
+def test_failing_warmup_stage_is_named(cold):
+    def broken():
+        raise ValueError("questions.csv is empty")
+
+    with pytest.raises(RuntimeError, match="Warmup stage 'question_bank' failed: questions.csv is empty"):
+        lifecycle.warm_up([("store", lambda: None), ("question_bank", broken)])
+    assert lifecycle.readiness()["status"] == "warming_up"
+
+
+@pytest.mark.asyncio
+async def test_shutdown_endpoint_signals_the_supervisor_once(signals, monkeypatch):
+    monkeypatch.setenv(lifecycle.SUPERVISOR_PID_ENV, "4242")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.post("/admin/shutdown")).status_code == 401
+        assert signals == []
+
+        first = await ac.post("/admin/shutdown", headers=ADMIN_HEADERS)
+        assert first.status_code == 202
+        assert first.json() == {"status": "draining", "pid": 4242, "already_requested": False}
+        second = await ac.post("/admin/shutdown", headers=ADMIN_HEADERS)
+        assert second.json()["already_requested"] is True
+    assert signals == [4242]
+    assert lifecycle.is_draining()
+
+
+def test_shutdown_closes_the_store(journal_store):
+    payload = SurveySubmissionIn(
+        channel="WEB", location_code="LOC1", shopper_id="S1",
+        visit_datetime="2025-08-17T10:00:00Z", scores=[{"question_id": "Q1", "score": 4}],
+    )
+    save_submission(payload)
+
+    lifecycle.shutdown()
+    assert journal_store._journal._file.closed
+    assert get_repository() is not journal_store
+    reopened = JournalSubmissionRepository(journal_store.directory, commit_window=0)
+    try:
+        assert [s.shopper_id for s in reopened.list_all()] == ["S1"]
+    finally:
+        reopened.close()
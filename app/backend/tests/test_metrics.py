@@ -0,0 +1,56 @@
+import random
+import threading
+import time
+from datetime import datetime
+
+from app.backend.services import survey_service
+from app.backend.services.survey_service import basic_metrics, save_submission, rebuild_metrics
+
+
+def test_incremental_metrics_match_full_rebuild(memory_store, random_payload):
+    assert basic_metrics()["total_submissions"] == 0
+    rng = random.Random(7)
+    for _ in range(40):
+        save_submission(random_payload(rng))
+
+    incremental = basic_metrics()
+    rebuild_metrics()
+    assert incremental == basic_metrics()
+    assert incremental["total_submissions"] == 40
+    assert sum(c["count"] for c in incremental["channel_breakdown"].values()) == 40
+
+
+def test_metrics_built_lazily_from_existing_store(memory_store, random_payload):
+    rng = random.Random(8)
+    for _ in range(5):
+        # Written behind the service's back, with scores from outdated scoring rules
+        memory_store.add(random_payload(rng), datetime.utcnow(), {
+            "section_scores": {}, "overall_score": 0.0, "total_weighted_score": 0.0, "total_weight_used": 0.0
+        }, "outdated")
+    survey_service._METRICS.reset()
+    assert basic_metrics()["total_submissions"] == 5
+    # The rebuild re-stamped the stored breakdowns with the current rules
+    for submission in memory_store.list_all():
+        assert submission.scoring_version == survey_service.SCORING_PLAN.version
+        assert submission.score_data() == survey_service.calculate_section_scores(submission)
+
+
+def test_submission_saved_during_rebuild_is_counted(memory_store, random_payload, monkeypatch):
+    rng = random.Random(9)
+    save_submission(random_payload(rng))
+    saver = threading.Thread(target=save_submission, args=(random_payload(rng),))
+    snapshot = survey_service.list_submissions
+
+    def list_then_save():
+        submissions = snapshot()
+        # Stored after the snapshot, before the rebuilt aggregates are swapped in
+        saver.start()
+        while memory_store.count() < 2:
+            time.sleep(0.001)
+        return submissions
+
+    monkeypatch.setattr(survey_service, "list_submissions", list_then_save)
+    rebuild_metrics()
+    saver.join()
+    assert basic_metrics()["total_submissions"] == 2
+    assert sum(row["count"] for row in survey_service.analytics_breakdown("channel").values()) == 2
@@ -0,0 +1,84 @@
+import asyncio
+import marshal
+import time
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.core.profiling import PROFILER, ProfileSession
+from app.backend.routes import admin
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+
+
+def slow_metrics():
+    time.sleep(0.05)
+    return {"total_submissions": 0}
+
+
+async def _profile_while_calling(ac, params, paths):
+    """Start a profile and, once it is running, call ``paths`` one after another."""
+    async def calls():
+        while PROFILER.session is None:
+            await asyncio.sleep(0.005)
+        for path in paths:
+            await ac.get(path, headers=ADMIN_HEADERS)
+
+    profile, _ = await asyncio.gather(
+        ac.post("/admin/profile", params=params, headers=ADMIN_HEADERS), calls()
+    )
+    return profile
+
+
+@pytest.mark.asyncio
+async def test_sampling_profile_returns_collapsed_stacks_of_selected_routes(memory_store, monkeypatch):
+    monkeypatch.setattr(admin, "basic_metrics", slow_metrics)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.post("/admin/profile")).status_code == 401
+        started = time.perf_counter()
+        response = await _profile_while_calling(
+            ac, {"seconds": 30, "requests": 2, "routes": "/admin/metrics"},
+            ["/admin/submissions", "/admin/metrics", "/admin/metrics"],
+        )
+    # The request budget ends the session long before the time limit
+    assert time.perf_counter() - started < 10
+    assert response.status_code == 200
+    assert response.headers["x-profile-requests"] == "2"
+    assert response.headers["content-disposition"] == 'attachment; filename="profile.folded"'
+    lines = response.text.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("get_metrics (admin.py" in line for line in lines)
+    assert any(line.rsplit(" ", 1)[0].endswith(f"slow_metrics (test_profiling.py:{slow_metrics.__code__.co_firstlineno})")
+               for line in lines)
+    assert PROFILER.session is None
+
+
+@pytest.mark.asyncio
+async def test_cprofile_mode_returns_pstats_data(memory_store):
+    # cProfile covers the event loop thread: an async def route
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await _profile_while_calling(
+            ac, {"seconds": 30, "requests": 1, "routes": "/admin/slow-requests", "mode": "cprofile"},
+            ["/admin/slow-requests"],
+        )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="profile.prof"'
+    stats = marshal.loads(response.content)
+    assert "slow_requests" in {function for _, _, function in stats}
+
+
+@pytest.mark.asyncio
+async def test_one_profiling_session_at_a_time(monkeypatch):
+    monkeypatch.setattr(PROFILER, "session", ProfileSession())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/admin/profile", params={"seconds": 1}, headers=ADMIN_HEADERS)
+        assert response.status_code == 409
+        assert (await ac.post("/admin/profile", params={"mode": "perf"}, headers=ADMIN_HEADERS)).status_code == 422
+
+
+def test_route_selection():
+    session = ProfileSession(routes=["/admin/metrics/", "/survey"])
+    assert session.selects("/admin/metrics") and session.selects("/admin/metrics/rebuild")
+    assert session.selects("/survey/submit")
+    assert not session.selects("/admin/metricsx") and not session.selects("/admin/submissions")
+    assert not ProfileSession().selects("/admin/profile")
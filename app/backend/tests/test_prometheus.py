@@ -0,0 +1,80 @@
+import re
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.core.telemetry import TELEMETRY, Histogram, render
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+PREFIX = "mystery_shopper_"
+
+
+def _samples(text):
+    """{'name{labels}': value} for every sample line of the exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+@pytest.fixture
+def telemetry():
+    TELEMETRY.reset()
+    yield TELEMETRY
+    TELEMETRY.reset()
+
+
+@pytest.mark.asyncio
+async def test_prometheus_endpoint_labels_routes_by_template(telemetry, memory_store, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.get("/admin/prometheus")).status_code == 401
+        submitted = await ac.post("/survey/submit", json=payload())
+        assert (await ac.post("/survey/submit", json=payload(scores=[{"question_id": "Q999", "score": 4}]))).status_code == 400
+        for _ in range(2):
+            await ac.get(f"/admin/submissions/{submitted.json()['id']}", headers=ADMIN_HEADERS)
+        await ac.get("/no/such/path/12345")
+
+        response = await ac.get("/admin/prometheus", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+
+    requests = PREFIX + "http_requests_total"
+    assert samples[f'{requests}{{method="POST",route="/survey/submit",status="200"}}'] == 1
+    assert samples[f'{requests}{{method="POST",route="/survey/submit",status="400"}}'] == 1
+    assert samples[f'{requests}{{method="GET",route="/admin/submissions/{{submission_id}}",status="200"}}'] == 2
+    assert samples[f'{requests}{{method="GET",route="unmatched",status="404"}}'] == 1
+    # Raw ids and paths never become label values
+    assert "12345" not in response.text
+    assert not re.search(r'route="/admin/submissions/\d', response.text)
+
+    assert samples[PREFIX + "submissions_saved_total"] == 1
+    assert samples[PREFIX + "submissions_rejected_total"] == 1
+    assert samples[PREFIX + 'submissions_stored{backend="memory"}'] == 1
+    assert samples[PREFIX + 'scoring_duration_seconds_bucket{le="+Inf"}'] == 1
+    assert samples[PREFIX + 'cache_requests_total{cache="question_bank",result="hit"}'] >= 1
+
+
+@pytest.mark.asyncio
+async def test_journal_gauges_are_exported(telemetry, journal_store, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.post("/survey/submit/batch", json={"submissions": [payload(), payload(scores=[{"question_id": "Q10", "score": 4}])]})
+        response = await ac.get("/admin/prometheus", headers=ADMIN_HEADERS)
+    samples = _samples(response.text)
+    assert samples[PREFIX + 'submissions_stored{backend="journal"}'] == 2
+    assert samples[PREFIX + "journal_pending_entries"] == 0
+    assert samples[PREFIX + "journal_commits_total"] >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    samples = _samples(render([("latency_seconds", "Latency.", "histogram", [((("route", "/x"),), histogram)])]))
+    assert samples[PREFIX + 'latency_seconds_bucket{route="/x",le="0.1"}'] == 2
+    assert samples[PREFIX + 'latency_seconds_bucket{route="/x",le="1"}'] == 3
+    assert samples[PREFIX + 'latency_seconds_bucket{route="/x",le="+Inf"}'] == 4
+    assert samples[PREFIX + 'latency_seconds_count{route="/x"}'] == 4
+    assert samples[PREFIX + 'latency_seconds_sum{route="/x"}'] == pytest.approx(3.65)
@@ -0,0 +1,77 @@
+import os
+import shutil
+
+import pytest
+
+from app.backend.core import questions
+from app.backend.core.questions import QuestionBank, get_question_bank
+
+
+@pytest.fixture
+def csv_copy(tmp_path, monkeypatch):
+    path = tmp_path / "questions.csv"
+    shutil.copyfile(questions.QUESTIONS_CSV, path)
+    monkeypatch.setattr(questions, "QUESTIONS_CSV", str(path))
+    return path
+
+
+def _touch(path, content):
+    path.write_bytes(content)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_bank_indexes_are_consistent():
+    bank = get_question_bank()
+    assert bank is get_question_bank()
+    assert [q['display_number'] for q in bank.questions] == list(range(1, len(bank.questions) + 1))
+    for question in bank.questions:
+        assert bank.get(question['id']) is question
+        assert question in bank.in_category(question['category'])
+    assert {q['id'] for q in bank.for_visit_type('Enquiry')} | {q['id'] for q in bank.for_visit_type('Transaction')} \
+        == {q['id'] for q in bank.questions if q['visit_type']}
+    assert 'Q52' in {q['id'] for q in bank.triggered_by('Q51')}
+    assert all(q['has_conditions'] for q in bank.triggered_by('Q51'))
+
+
+def test_bank_is_read_only_and_copies_are_independent():
+    bank = get_question_bank()
+    with pytest.raises(TypeError):
+        bank.questions[0]['text_en'] = 'changed'
+    with pytest.raises(AttributeError):
+        bank.version = 'other'
+    copies = bank.as_dicts()
+    copies[0]['text_en'] = 'changed'
+    assert bank.questions[0]['text_en'] != 'changed'
+
+
+def test_bank_swapped_only_when_content_changes(csv_copy):
+    first = get_question_bank()
+    assert first.version == QuestionBank.from_csv(str(csv_copy)).version
+
+    # Same bytes, new mtime: the existing bank is kept
+    _touch(csv_copy, csv_copy.read_bytes())
+    assert get_question_bank() is first
+
+    content = csv_copy.read_bytes().replace(b"Were the directions", b"Were the new directions", 1)
+    _touch(csv_copy, content)
+    second = get_question_bank()
+    assert second is not first and second.version != first.version
+    assert any('new directions' in q['text_en'] for q in second.questions)
+
+    # A broken file keeps serving the last good bank
+    _touch(csv_copy, b"\xff\xfe not utf-8")
+    assert get_question_bank() is second
+
+
+def test_service_picks_up_csv_changes(csv_copy):
+    from app.backend.services import survey_service
+
+    survey_service.sync_question_bank()
+    content = csv_copy.read_bytes().replace(b"Were the directions", b"Were the new directions", 1)
+    _touch(csv_copy, content)
+
+    assert survey_service.sync_question_bank() is True
+    assert survey_service.QUESTION_BANK_VERSION == get_question_bank().version
+    assert any('new directions' in text for text in survey_service.QUESTIONS.values())
+    assert survey_service.sync_question_bank() is False
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import text
+
+from app.backend.db.repository import SqlSubmissionRepository, InMemorySubmissionRepository
+from app.backend.schemas.survey import SurveySubmissionIn
+
+def test_sql_repository_round_trip_and_restart(tmp_path, payload, score_data):
+    url = f"sqlite:///{tmp_path / 'store.db'}"
+    repo = SqlSubmissionRepository(url)
+    created_at = datetime(2025, 8, 17, 7, 0, 0)
+    first = repo.add(SurveySubmissionIn(**payload()), created_at, score_data, "v1")
+    naive = SurveySubmissionIn(**payload(channel="ON_SITE", visit_datetime="2025-08-18T09:00:00"))
+    second = repo.add(naive, created_at, score_data, "v1")
+    assert (first.id, second.id) == (1, 2)
+    repo.close()
+
+    # A fresh repository on the same file sees everything written before
+    reopened = SqlSubmissionRepository(url)
+    assert reopened.count() == 2
+    loaded = reopened.get(first.id)
+    assert loaded.model_dump() == first.model_dump()
+    assert loaded.visit_datetime.utcoffset() == timedelta(hours=4)
+    assert reopened.get(second.id).visit_datetime.tzinfo is None
+    assert [s.id for s in reopened.list_all()] == [1, 2]
+    assert reopened.get(99) is None
+    assert loaded.score_data() == score_data and loaded.scoring_version == "v1"
+
+    rescored = dict(score_data, overall_score=0.75)
+    reopened.update_scores([(second.id, rescored)], "v2")
+    assert reopened.get(second.id).overall_score == 0.75
+    assert reopened.get(second.id).scoring_version == "v2"
+    assert reopened.get(first.id).scoring_version == "v1"
+
+    with reopened.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+
+    reopened.clear()
+    assert reopened.count() == 0
+    reopened.close()
+
+
+def test_memory_repository_matches_sql_behaviour(payload, score_data):
+    repo = InMemorySubmissionRepository()
+    stored = repo.add(SurveySubmissionIn(**payload()), datetime.now(timezone.utc), score_data, "v1")
+    assert stored.id == 1
+    assert repo.get(1) == stored
+    assert repo.count() == 1
+    repo.clear()
+    assert repo.list_all() == []
+
+
+def test_submission_record_round_trip(payload, score_data):
+    from app.backend.db.records import SubmissionRecord
+    from app.backend.services.survey_service import SCORING_PLAN
+
+    submission = SurveySubmissionIn(**payload(
+        scores=[{"question_id": "Q1", "score": 4, "comment": "ok"}, {"question_id": "Q3", "score": 2},
+                {"question_id": "Q1", "score": 1}],
+        latency_samples=[{"question_id": "Q1", "ms": 912.3000000119209}, {"question_id": "Q3", "ms": 1200.0}],
+    ))
+    plan_scores = SCORING_PLAN.score(submission.scores)
+    created_at = datetime.now(timezone.utc)
+    record = SubmissionRecord(7, created_at, submission, plan_scores, SCORING_PLAN.version)
+
+    model = record.to_model()
+    assert model.id == 7 and model.created_at == created_at
+    assert model.visit_datetime == submission.visit_datetime
+    assert model.visit_datetime.utcoffset() == timedelta(hours=4)
+    assert [(s.question_id, s.score, s.comment) for s in model.scores] == \
+        [(s.question_id, s.score, s.comment) for s in submission.scores]
+    assert [(ls.question_id, ls.ms) for ls in model.latency_samples] == [("Q1", 912.3), ("Q3", 1200.0)]
+    assert model.score_data() == plan_scores
+    assert SCORING_PLAN.score_answers(record.answers()) == plan_scores
+    assert record.to_model(load_answers=False).scores == []
+
+    record.set_score_data(score_data, "v2")
+    assert record.score_data() == score_data and record.scoring_version == "v2"
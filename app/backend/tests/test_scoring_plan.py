@@ -0,0 +1,50 @@
+import random
+from datetime import datetime
+
+from app.backend.schemas.survey import QuestionScore, SurveySubmissionOut
+from app.backend.services.survey_service import (
+    SECTION_WEIGHTS, QUESTION_SECTIONS, QUESTION_MAX_SCORES, calculate_section_scores
+)
+
+
+def reference_section_scores(submission):
+    """The original nested-loop scoring, kept as an oracle for the compiled plan."""
+    section_scores = {}
+    for main_section, config in SECTION_WEIGHTS.items():
+        question_ids = [q for name in config['sections'] for q, s in QUESTION_SECTIONS.items() if s == name]
+        if not question_ids:
+            continue
+        total = maximum = 0
+        for question_id in question_ids:
+            maximum += QUESTION_MAX_SCORES.get(question_id, 1)
+            total += next((s.score for s in submission.scores if s.question_id == question_id), 0)
+        if maximum > 0:
+            pct = total / maximum
+            section_scores[main_section] = {
+                'score': round(pct, 4), 'weight': config['weight'],
+                'weighted_score': round(pct * config['weight'], 4),
+                'questions_count': len(question_ids), 'raw_total': total, 'raw_max': maximum
+            }
+    weighted = sum(s['weighted_score'] for s in section_scores.values())
+    weight = sum(s['weight'] for s in section_scores.values())
+    return {
+        'section_scores': section_scores,
+        'overall_score': round(weighted / weight if weight > 0 else 0, 4),
+        'total_weighted_score': round(weighted, 4),
+        'total_weight_used': round(weight, 4)
+    }
+
+
+def test_scoring_plan_matches_reference():
+    rng = random.Random(42)
+    question_ids = list(QUESTION_SECTIONS) + ["Q9999"]  # includes an id outside the plan
+    for i in range(50):
+        answered = rng.sample(question_ids, rng.randint(0, len(question_ids)))
+        answered += rng.sample(answered, min(3, len(answered)))  # duplicate answers: first one wins
+        submission = SurveySubmissionOut.model_construct(
+            id=i, created_at=datetime.utcnow(), channel="WEB", location_code="L", shopper_id="S",
+            visit_datetime=datetime.utcnow(), latency_samples=[],
+            scores=[QuestionScore.model_construct(question_id=q, score=rng.randint(1, 5), comment=None)
+                    for q in answered],
+        )
+        assert calculate_section_scores(submission) == reference_section_scores(submission)
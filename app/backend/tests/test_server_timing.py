@@ -0,0 +1,80 @@
+import time
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.main import app
+from app.backend.core.timing import SLOW_REQUESTS, RequestTimings, _current, span
+
+ADMIN_HEADERS = {"X-API-Key": "dev-admin-key"}
+
+
+def _spans(header):
+    """{'name': ms} from a Server-Timing header."""
+    spans = {}
+    for entry in header.split(","):
+        name, duration = entry.strip().split(";dur=")
+        spans[name] = float(duration)
+    return spans
+
+
+@pytest.fixture
+def slow_log(monkeypatch):
+    """Log every request as slow."""
+    SLOW_REQUESTS.clear()
+    monkeypatch.setattr(SLOW_REQUESTS, "threshold_ms", 0.0)
+    yield SLOW_REQUESTS
+    SLOW_REQUESTS.clear()
+
+
+@pytest.mark.asyncio
+async def test_submission_reports_pipeline_spans(memory_store, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        html = [{"question_id": "Q1", "score": 4, "comment": "<b>Friendly</b> staff"}]
+        response = await ac.post("/survey/submit", json=payload(scores=html))
+        batch = await ac.post("/survey/submit/batch", json={"submissions": [payload(shopper_id="S2"),
+                                                                            payload(shopper_id="S3")]})
+        health = await ac.get("/healthz")
+    assert response.status_code == 200
+    spans = _spans(response.headers["server-timing"])
+    assert list(spans) == ["validate", "sanitize", "questions", "score", "store", "aggregate", "total"]
+    # Self times: the parts never add up to more than the request
+    assert sum(ms for name, ms in spans.items() if name != "total") <= spans["total"]
+
+    assert {"questions", "score", "store", "aggregate"} <= set(_spans(batch.headers["server-timing"]))
+    assert list(_spans(health.headers["server-timing"])) == ["total"]
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_are_kept_for_the_admin_api(memory_store, slow_log, payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        submitted = await ac.post("/survey/submit", json=payload())
+        await ac.get(f"/admin/submissions/{submitted.json()['id']}", headers=ADMIN_HEADERS)
+        assert (await ac.get("/admin/slow-requests")).status_code == 401
+        response = await ac.get("/admin/slow-requests", params={"limit": 3}, headers=ADMIN_HEADERS)
+    body = response.json()
+    assert body["threshold_ms"] == 0.0
+    newest, _, submit = body["requests"]
+    assert newest["route"] == "/admin/slow-requests" and newest["status"] == 401
+    assert submit["method"] == "POST" and submit["path"] == "/survey/submit" and submit["status"] == 200
+    assert {"validate", "sanitize", "store"} <= set(submit["spans_ms"])
+    assert submit["duration_ms"] >= sum(submit["spans_ms"].values())
+
+
+def test_spans_record_self_time_and_are_noops_outside_requests():
+    with span("store"):
+        pass  # no request: nothing to record
+
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        with span("validate"):
+            with span("sanitize"):
+                time.sleep(0.02)
+        for _ in range(2):
+            with span("score"):
+                time.sleep(0.005)
+    finally:
+        _current.reset(token)
+    assert timings.spans["sanitize"] >= 20
+    assert timings.spans["validate"] < 20
+    assert timings.spans["score"] >= 10
@@ -0,0 +1,64 @@
+import gzip
+import os
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.frontend.app_frontend_server import frontend, assets, STATIC_DIR
+from app.frontend.assets import IMMUTABLE_CACHE_CONTROL, accepts_gzip
+
+
+def test_manifest_fingerprints_content():
+    asset = assets.assets["style.css"]
+    assert assets.url("style.css") == f"/static/{asset.hashed_path}"
+    assert asset.hashed_path.startswith("style.") and asset.hashed_path.endswith(".css")
+    with open(os.path.join(STATIC_DIR, "style.css"), "rb") as f:
+        assert asset.body == f.read()
+    assert gzip.decompress(asset.gzip_body) == asset.body
+    assert assets.url("missing.js") == "/static/missing.js"
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, *;q=0.5")
+    assert not accepts_gzip("gzip;q=0, br")
+    assert not accepts_gzip("")
+
+
+@pytest.mark.asyncio
+async def test_hashed_assets_are_immutable_and_compressed():
+    async with AsyncClient(transport=ASGITransport(app=frontend), base_url="http://test") as ac:
+        page = await ac.get("/")
+        script_url = assets.url("js/voice/voice-controller.js")
+        assert assets.url("style.css") in page.text and script_url in page.text
+
+        r = await ac.get(script_url, headers={"Accept-Encoding": "gzip"})
+        assert r.status_code == 200
+        assert r.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.content == assets.assets["js/voice/voice-controller.js"].body  # decoded by httpx
+
+        plain = await ac.get(script_url, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.content == r.content
+        # Each encoding has its own strong validator
+        assert r.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+        assert r.headers["vary"] == plain.headers["vary"] == "Accept-Encoding"
+
+        revalidated = await ac.get(script_url, headers={"If-None-Match": r.headers["etag"],
+                                                        "Accept-Encoding": "gzip"})
+        assert revalidated.status_code == 304
+        other_encoding = await ac.get(script_url, headers={"If-None-Match": r.headers["etag"],
+                                                           "Accept-Encoding": "identity"})
+        assert other_encoding.status_code == 200 and other_encoding.content == plain.content
+        for if_none_match in ("W/" + plain.headers["etag"], '"stale", ' + plain.headers["etag"], "*"):
+            weak = await ac.get(script_url, headers={"If-None-Match": if_none_match, "Accept-Encoding": "identity"})
+            assert weak.status_code == 304
+        prefix = await ac.get(script_url, headers={"If-None-Match": plain.headers["etag"][:-1] + 'x"',
+                                                   "Accept-Encoding": "identity"})
+        assert prefix.status_code == 200
+
+        # Unversioned paths still work but are revalidated
+        legacy = await ac.get("/static/style.css")
+        assert legacy.status_code == 200 and legacy.headers["cache-control"] == "no-cache"
+        assert (await ac.get("/static/style.0000000000.css")).status_code == 404
@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.core import questions
+from app.frontend import app_frontend_server
+from app.frontend.app_frontend_server import frontend
+
+
+@pytest.mark.asyncio
+async def test_survey_form_is_rendered_once_and_revalidated():
+    app_frontend_server._FORM_CACHE.clear()
+    async with AsyncClient(transport=ASGITransport(app=frontend), base_url="http://test") as ac:
+        first = await ac.get("/")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "no-cache"
+        assert 'data-q="Q1"' in first.text
+
+        # Served from the cache without rendering the template again
+        render = app_frontend_server.templates.get_template
+        app_frontend_server.templates.get_template = None
+        try:
+            again = await ac.get("/")
+            not_modified = await ac.get("/", headers={"If-None-Match": f'"other", W/{etag}'})
+        finally:
+            app_frontend_server.templates.get_template = render
+        assert again.content == first.content and again.headers["etag"] == etag
+        assert not_modified.status_code == 304 and not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+
+        arabic = await ac.get("/", params={"lang": "ar"})
+        assert '<html lang="ar"' in arabic.text
+        assert arabic.headers["etag"] != etag
+        assert (await ac.get("/", params={"lang": "xx"})).headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_survey_form_follows_question_bank(tmp_path, monkeypatch):
+    path = tmp_path / "questions.csv"
+    shutil.copyfile(questions.QUESTIONS_CSV, path)
+    monkeypatch.setattr(questions, "QUESTIONS_CSV", str(path))
+    async with AsyncClient(transport=ASGITransport(app=frontend), base_url="http://test") as ac:
+        before = await ac.get("/")
+
+        path.write_bytes(path.read_bytes().replace(b"Were the directions", b"Were the new directions", 1))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        after = await ac.get("/", headers={"If-None-Match": before.headers["etag"]})
+        assert after.status_code == 200
+        assert after.headers["etag"] != before.headers["etag"]
+        assert "Were the new directions" in after.text
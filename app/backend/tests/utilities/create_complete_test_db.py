@@ -13,7 +13,7 @@ import os
 # Add the parent directories to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
 
-from app.backend.services.survey_service import save_submission, _DB, _COUNTER
+from app.backend.services.survey_service import save_submission, list_submissions, clear_submissions
 from app.backend.schemas.survey import SurveySubmissionIn, QuestionScore, LatencySample
 
 # Sample data
@@ -114,9 +114,7 @@ def create_comprehensive_database():
     print("=" * 60)
     
     # Clear existing data
-    global _DB, _COUNTER
-    _DB.clear()
-    _COUNTER = 1
+    clear_submissions()
     
     total_created = 0
     
@@ -339,26 +337,27 @@ def create_comprehensive_database():
 
 def print_comprehensive_summary():
     """Print comprehensive database summary"""
-    if not _DB:
+    submissions = list_submissions()
+    if not submissions:
         print("📭 Database is empty")
         return
     
     print(f"\n📊 Comprehensive Database Summary:")
-    print(f"Total Submissions: {len(_DB)}")
+    print(f"Total Submissions: {len(submissions)}")
     
     # Channel distribution
     channel_counts = {}
-    for sub in _DB:
+    for sub in submissions:
         channel_counts[sub.channel] = channel_counts.get(sub.channel, 0) + 1
     
     print(f"\n📱 Channel Distribution:")
     for channel, count in sorted(channel_counts.items()):
-        percentage = (count / len(_DB)) * 100
+        percentage = (count / len(submissions)) * 100
         print(f"  {channel:12}: {count:3} ({percentage:5.1f}%)")
     
     # Top locations
     location_counts = {}
-    for sub in _DB:
+    for sub in submissions:
         location_counts[sub.location_code] = location_counts.get(sub.location_code, 0) + 1
     
     print(f"\n🏢 Top 10 Locations:")
@@ -368,7 +367,7 @@ def print_comprehensive_summary():
     
     # Shopper activity
     shopper_counts = {}
-    for sub in _DB:
+    for sub in submissions:
         shopper_counts[sub.shopper_id] = shopper_counts.get(sub.shopper_id, 0) + 1
     
     print(f"\n👥 Most Active Shoppers:")
@@ -377,7 +376,7 @@ def print_comprehensive_summary():
         print(f"  {shopper:15}: {count:3} submissions")
     
     # Date range
-    dates = [sub.visit_datetime for sub in _DB]
+    dates = [sub.visit_datetime for sub in submissions]
     print(f"\n📅 Date Range:")
     print(f"  From: {min(dates).strftime('%Y-%m-%d %H:%M')}")
     print(f"  To:   {max(dates).strftime('%Y-%m-%d %H:%M')}")
@@ -389,7 +388,7 @@ def print_comprehensive_summary():
     total_voice_latency = 0
     voice_samples_count = 0
     
-    for sub in _DB:
+    for sub in submissions:
         all_scores.extend([score.score for score in sub.scores])
         if sub.latency_samples:
             voice_submissions += 1
@@ -427,10 +426,11 @@ def main():
     
     # Quick test - try to access a few submissions
     print(f"\n🔍 Quick Data Verification:")
-    if len(_DB) >= 3:
-        for i in [0, len(_DB)//2, -1]:
-            sub = _DB[i]
-            print(f"  [{i+1 if i >= 0 else len(_DB)}] {sub.location_code} via {sub.channel} - {len(sub.scores)} answers")
+    submissions = list_submissions()
+    if len(submissions) >= 3:
+        for i in [0, len(submissions)//2, -1]:
+            sub = submissions[i]
+            print(f"  [{i+1 if i >= 0 else len(submissions)}] {sub.location_code} via {sub.channel} - {len(sub.scores)} answers")
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,7 @@ Run from the project root directory: python -m app.backend.utils.cli
 import sys
 import os
 import json
+import argparse
 from pathlib import Path
 
 # Add the project root to Python path
@@ -30,6 +31,34 @@ def print_json(data, title=""):
         print(f"\n=== {title} ===")
     print(json.dumps(data, indent=2, ensure_ascii=False))
 
+def run_import(args):
+    """Import a legacy MS Forms / Excel export into the configured submission store"""
+    from app.backend.db.repository import get_repository
+    from app.backend.services.importer import CHUNK_ROWS, IMPORT_FORMATS, import_file
+
+    parser = argparse.ArgumentParser(prog="python -m app.backend.utils.cli import",
+                                     description="Stream a CSV / XLSX export into the submission store")
+    parser.add_argument("file", help="Export file (.csv or .xlsx)")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Override detection from the file extension")
+    parser.add_argument("--channel", help="Channel for exports without a channel column")
+    parser.add_argument("--workers", type=int, help="Validation processes (default: CPU count; 0 = in-process)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help=f"Rows per chunk (default: {CHUNK_ROWS})")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <file>.import.json)")
+    options = parser.parse_args(args)
+
+    try:
+        return import_file(
+            options.file,
+            options.format,
+            checkpoint_path=options.checkpoint or options.file + ".import.json",
+            default_channel=options.channel,
+            workers=options.workers,
+            chunk_rows=options.chunk_rows
+        )
+    finally:
+        # Flushes the journal store; stop the server first when importing into it
+        get_repository().close()
+
 def main():
     """Main CLI interface"""
     if len(sys.argv) < 2:
@@ -41,6 +70,7 @@ def main():
         print("  structure     - Analyze questions structure")
         print("  q51-deps      - Show Q51 dependencies")
         print("  load-csv      - Load and display CSV data")
+        print("  import FILE   - Import a CSV/XLSX export (import --help for options)")
         return
     
     command = sys.argv[1].lower()
@@ -74,6 +104,10 @@ def main():
                 'sample_questions': questions[:5]
             }
             print_json(data, "CSV Data Sample")
+
+        elif command == 'import':
+            data = run_import(sys.argv[2:])
+            print_json(data, "Import Summary")
             
         else:
             print(f"Unknown command: {command}")
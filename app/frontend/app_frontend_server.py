@@ -1,15 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.backend.main import app as api_app
-from app.backend.core.questions import get_questions
+from starlette.concurrency import run_in_threadpool
+from app.backend.main import app as api_app, api_warmup_stages
+from app.backend.routes import health
+from app.backend.core.questions import get_question_bank
+from app.backend.core.telemetry import TELEMETRY
+from app.backend.services.lifecycle import shutdown, warm_up
+from app.frontend.assets import AssetManifest, HashedStaticFiles, etag_matches
+from typing import Dict, Tuple
+import hashlib
 import os, sys
 
-frontend = FastAPI(title="Mystery Shopper Frontend")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Mounted sub-apps do not get lifespan events, so warm the API state here too
+    warm_up(api_warmup_stages() + [("schemas_frontend", frontend.openapi), ("templates", _warm_templates)])
+    yield
+    shutdown()
+
+frontend = FastAPI(title="Mystery Shopper Frontend", lifespan=lifespan)
 
 frontend.mount("/api", api_app)
+frontend.include_router(health.router, tags=["health"])
 frontend.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -17,44 +32,60 @@ frontend.add_middleware(
     allow_headers=["*"],
 )
 
-# Custom StaticFiles class with cache-busting headers
-class NoCacheStaticFiles(StaticFiles):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-    
-    async def get_response(self, path: str, scope):
-        response = await super().get_response(path, scope)
-        # Add cache-busting headers for CSS and JS files
-        if path.endswith(('.css', '.js')):
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            response.headers["Pragma"] = "no-cache" 
-            response.headers["Expires"] = "0"
-        return response
-
 # Support running when bundled by PyInstaller (resources extracted to _MEIPASS temp dir)
 BASE_DIR = getattr(sys, "_MEIPASS", os.path.abspath("."))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "app", "frontend", "templates")
 STATIC_DIR = os.path.join(BASE_DIR, "app", "frontend", "static")
 
-frontend.mount("/static", NoCacheStaticFiles(directory=STATIC_DIR), name="static")
+# Static files are fingerprinted once at startup and served with long-lived caching
+assets = AssetManifest(STATIC_DIR, url_prefix="/static")
+frontend.mount("/static", HashedStaticFiles(manifest=assets), name="static")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
+templates.env.globals["asset_url"] = assets.url
+
+SURVEY_LANGUAGES = ("en", "ar")
+
+# Rendered survey form per (question bank version, language) -> (HTML, strong ETag)
+_FORM_CACHE: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+
+def _render_survey_form(lang: str) -> Tuple[bytes, str]:
+    bank = get_question_bank()
+    key = (bank.version, lang)
+    cached = _FORM_CACHE.get(key)
+    TELEMETRY.cache("survey_form", hit=cached is not None)
+    if cached is not None:
+        return cached
+    categories = {category: [dict(q) for q in questions] for category, questions in bank.by_category.items()}
+    html = templates.get_template("survey_form.html").render(
+        questions=bank.as_dicts(),
+        categories=categories,
+        lang=lang
+    ).encode("utf-8")
+    rendered = (html, '"' + hashlib.sha1(html).hexdigest() + '"')
+    # Forms rendered for an older question bank are never served again
+    for stale in [k for k in _FORM_CACHE if k[0] != bank.version]:
+        _FORM_CACHE.pop(stale, None)
+    _FORM_CACHE[key] = rendered
+    return rendered
+
+def _warm_templates() -> None:
+    """Compile every template and render the survey form in each language"""
+    for name in templates.env.list_templates(extensions=["html"]):
+        templates.get_template(name)
+    for lang in SURVEY_LANGUAGES:
+        _render_survey_form(lang)
 
 @frontend.get("/", response_class=HTMLResponse)
-async def survey_page(request: Request, response: Response):
-    from ..backend.core.questions import get_questions, get_questions_by_category
-    questions = get_questions()
-    categories = get_questions_by_category()
-    
-    # Add cache-busting headers to prevent browser caching
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
+async def survey_page(request: Request, lang: str = "en"):
+    if lang not in SURVEY_LANGUAGES:
+        lang = "en"
+    html, etag = _render_survey_form(lang)
     
-    return templates.TemplateResponse("survey_form.html", {
-        "request": request, 
-        "questions": questions,
-        "categories": categories
-    })
+    # Browsers revalidate on every load and get a 304 while the questions are unchanged
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=html, headers=headers)
 
 @frontend.get("/simple", response_class=HTMLResponse) 
 async def simple_survey_page(request: Request):
@@ -86,7 +117,7 @@ async def submit_survey_frontend(request: Request):
         
         # Validate and process the submission
         submission_data = SurveySubmissionIn(**body)
-        result = save_submission(submission_data)
+        result = await run_in_threadpool(save_submission, submission_data, request.headers.get("Idempotency-Key"))
         
         return result
         
@@ -0,0 +1,132 @@
+"""Content-hashed static assets.
+
+Every file under ``static/`` is read and hashed once when the frontend starts.
+``style.css`` is then served as ``/static/style.<hash>.css`` with a one-year
+``immutable`` Cache-Control, which is safe because any edit to the file changes
+its URL. Compressible assets also get a gzip variant built once, sent to clients
+that accept it under its own ETag. Templates link assets through ``asset_url()``; the plain paths
+keep working but are revalidated on every use.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".html", ".json", ".txt", ".md")
+# Below this size gzip saves less than the extra header costs
+MIN_GZIP_SIZE = 512
+
+
+@dataclass(frozen=True)
+class Asset:
+    path: str          # e.g. "js/voice/voice-ui.js"
+    hashed_path: str   # e.g. "js/voice/voice-ui.3f2a1b9c0d.js"
+    media_type: str
+    etag: str
+    body: bytes
+    gzip_body: Optional[bytes]
+    # Different bytes, so a different strong validator than ``etag``
+    gzip_etag: Optional[str] = None
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class AssetManifest:
+    """Logical asset path -> fingerprinted :class:`Asset`, built from a directory."""
+
+    def __init__(self, directory: str, url_prefix: str = "/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.assets: Dict[str, Asset] = {}
+        self.hashed: Dict[str, Asset] = {}
+        self.build()
+
+    def build(self) -> None:
+        assets = {}
+        for root, _, files in os.walk(self.directory):
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                digest = hashlib.sha1(body).hexdigest()
+                stem, ext = os.path.splitext(path)
+                gzip_body = None
+                if ext.lower() in COMPRESSIBLE_EXTENSIONS and len(body) >= MIN_GZIP_SIZE:
+                    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+                    if len(compressed) < len(body):
+                        gzip_body = compressed
+                assets[path] = Asset(
+                    path=path,
+                    hashed_path=f"{stem}.{digest[:10]}{ext}",
+                    media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    etag=f'"{digest}"',
+                    body=body,
+                    gzip_body=gzip_body,
+                    gzip_etag=f'"{digest}-gz"' if gzip_body is not None else None,
+                )
+        self.assets = assets
+        self.hashed = {asset.hashed_path: asset for asset in assets.values()}
+
+    def url(self, path: str) -> str:
+        """URL for a static file, fingerprinted when it is in the manifest"""
+        path = path.lstrip("/")
+        asset = self.assets.get(path)
+        return f"{self.url_prefix}/{asset.hashed_path if asset is not None else path}"
+
+
+class HashedStaticFiles(StaticFiles):
+    """Serves manifest assets from memory; other paths fall back to the directory."""
+
+    def __init__(self, *, manifest: AssetManifest, **kwargs):
+        super().__init__(directory=manifest.directory, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.manifest.hashed.get(path.replace(os.sep, "/"))
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            response = await super().get_response(path, scope)
+            # Unversioned URL: allow caching but revalidate (ETag / Last-Modified) on each use
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        request_headers = Headers(scope=scope)
+        use_gzip = asset.gzip_body is not None and accepts_gzip(request_headers.get("accept-encoding", ""))
+        etag = asset.gzip_etag if use_gzip else asset.etag
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request_headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+
+        body = asset.body
+        if use_gzip:
+            body = asset.gzip_body
+            headers["Content-Encoding"] = "gzip"
+        if scope["method"] == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(body, media_type=asset.media_type, headers=headers)
@@ -20,6 +20,7 @@ document.addEventListener('DOMContentLoaded', function() {
     if (resetBtn) {
         resetBtn.addEventListener('click', function() {
             surveyForm.reset();
+            delete surveyForm.dataset.idempotencyKey;
             resultBox.textContent = '';
             console.log('🔄 Form reset');
         });
@@ -36,6 +37,11 @@ async function handleSubmit(event) {
     // Build submission payload
     const payload = buildPayload(formData);
     
+    // One key per visit: retries after a network error cannot store it twice
+    if (!form.dataset.idempotencyKey) {
+        form.dataset.idempotencyKey = newIdempotencyKey();
+    }
+    
     try {
         resultBox.textContent = 'Submitting...';
         
@@ -43,6 +49,7 @@ async function handleSubmit(event) {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Idempotency-Key': form.dataset.idempotencyKey,
             },
             body: JSON.stringify(payload)
         });
@@ -50,6 +57,7 @@ async function handleSubmit(event) {
         const result = await response.json();
         
         if (response.ok) {
+            delete form.dataset.idempotencyKey;
             resultBox.textContent = JSON.stringify(result, null, 2);
             console.log('✅ Survey submitted successfully', result);
         } else {
@@ -61,6 +69,13 @@ async function handleSubmit(event) {
     }
 }
 
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
 function buildPayload(formData) {
     // Get questions from backend injection
     const questions = window.__SURVEY_QUESTIONS || [];
@@ -9,11 +9,19 @@ Usage:
     python run_app.py --port 3000        # Start on a different port
     python run_app.py --dev               # Start in development mode with reload
     python run_app.py --host 0.0.0.0     # Allow external connections
+    python run_app.py --workers 4        # Production: 4 worker processes sharing the SQL store
+
+With --workers every worker process loads its own copy of the question bank
+and dashboard aggregates at startup, and all of them read and write the same
+database (MYSTERY_SHOPPER_STORE=sql), so they see the same data. Workers
+restarted by --max-requests (or all of them, one at a time, on SIGHUP) finish
+their in-flight requests first, for up to --graceful-timeout seconds.
 
 Build executable with:
     pyinstaller --onefile --add-data "app/frontend/templates;app/frontend/templates" --add-data "app/frontend/static;app/frontend/static" --name mysteryshop run_app.py
 """
 import argparse
+import os
 import socket
 import sys
 import webbrowser
@@ -76,6 +84,30 @@ def validate_app_structure():
         sys.exit(1)
 
 
+def validate_workers(args):
+    """Check the multi-worker options and that every worker will see the same data."""
+    if args.workers < 1:
+        print("ERROR: --workers must be at least 1")
+        sys.exit(1)
+    if args.workers > 1 and args.dev:
+        print("ERROR: --dev reloads a single process; drop --workers or --dev")
+        sys.exit(1)
+    # Inherited by the worker processes, which repeat the check at startup
+    os.environ["MYSTERY_SHOPPER_WORKERS"] = str(args.workers)
+    # POST /admin/shutdown signals this process, which drains every worker
+    os.environ["MYSTERY_SHOPPER_SUPERVISOR_PID"] = str(os.getpid())
+    if args.workers > 1:
+        from app.backend.db.repository import check_shared_store, create_repository
+        try:
+            check_shared_store(args.workers)
+        except RuntimeError as e:
+            print(f"ERROR: {e}")
+            print("   - Unset MYSTERY_SHOPPER_STORE (or set it to sql) to use the shared database")
+            sys.exit(1)
+        # Create / upgrade the schema once, before the workers would race to do it
+        create_repository().close()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Start the Mystery Shop web application")
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to (default: 127.0.0.1)")
@@ -83,11 +115,17 @@ def main():
     parser.add_argument("--dev", action="store_true", help="Enable development mode with auto-reload")
     parser.add_argument("--no-browser", action="store_true", help="Don't automatically open browser")
     parser.add_argument("--auto-port", action="store_true", help="Automatically find available port if default is busy")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (production mode, default: 1)")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="Restart a worker after it has served this many requests (default: never)")
+    parser.add_argument("--graceful-timeout", type=float, default=30,
+                        help="Seconds a stopping worker may spend finishing in-flight requests (default: 30)")
     
     args = parser.parse_args()
     
     # Validate application structure
     validate_app_structure()
+    validate_workers(args)
     
     # Handle port conflicts
     if not check_port_available(args.host, args.port):
@@ -117,7 +155,12 @@ def main():
     print(f"   - Server: {server_url}")
     if args.host == "0.0.0.0":
         print(f"   - Local:  {local_url}")
-    print(f"   - Mode:   {'Development (auto-reload)' if args.dev else 'Production'}")
+    if args.dev:
+        print("   - Mode:   Development (auto-reload)")
+    elif args.workers > 1:
+        print(f"   - Mode:   Production ({args.workers} workers)")
+    else:
+        print("   - Mode:   Production")
     print()
     print("How to stop the server:")
     print("   - Press Ctrl+C in this terminal")
@@ -142,6 +185,11 @@ def main():
             host=args.host,
             port=args.port,
             reload=args.dev,
+            # Static files are fingerprinted at startup, so restart when they change
+            reload_includes=["*.py", "*.css", "*.js", "*.html"] if args.dev else None,
+            workers=args.workers if args.workers > 1 else None,
+            limit_max_requests=args.max_requests,
+            timeout_graceful_shutdown=args.graceful_timeout,
             log_level="info" if args.dev else "warning"
         )
     except KeyboardInterrupt:
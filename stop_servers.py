@@ -1,14 +1,31 @@
 """
 Helper script to stop Mystery Shop servers running on common ports.
-This will find and terminate any servers running on ports 8000-8010.
+This will find and stop any servers running on ports 8000-8010.
+
+Servers are drained first: POST /api/admin/shutdown (or SIGTERM, outside
+Windows) makes the server stop accepting requests, finish the ones in flight and flush the
+submission store. The server closes its port as soon as draining starts, so
+the script waits for the server processes themselves to exit; any still
+running after --timeout seconds are killed.
+
+Usage:
+    python stop_servers.py               # Drain, force-kill after 45s
+    python stop_servers.py --timeout 10  # Wait at most 10s before force-killing
+    python stop_servers.py --force       # Kill immediately (may lose in-flight submissions)
 """
+import argparse
+import json
+import os
 import subprocess
 import sys
 import time
+import urllib.error
+import urllib.request
 
 
-def find_process_on_port(port):
-    """Find process ID running on a specific port."""
+def find_processes_on_port(port):
+    """Find the IDs of the processes listening on a port, lowest first (the launcher before its workers)."""
+    pids = set()
     try:
         if sys.platform == "win32":
             # Windows
@@ -19,29 +36,59 @@ def find_process_on_port(port):
                 check=True
             )
             for line in result.stdout.split('\n'):
-                if f':{port}' in line and 'LISTENING' in line:
-                    parts = line.split()
-                    if parts:
-                        return parts[-1]  # Last column is PID
+                parts = line.split()
+                if 'LISTENING' in parts and len(parts) > 1 and parts[1].endswith(f':{port}'):
+                    pids.add(parts[-1])  # Last column is PID
         else:
             # Linux/Mac
             result = subprocess.run(
-                ["lsof", "-ti", f":{port}"], 
+                ["lsof", "-ti", f"tcp:{port}", "-sTCP:LISTEN"], 
                 capture_output=True, 
                 text=True
             )
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip().split('\n')[0]
+            if result.returncode == 0:
+                pids.update(result.stdout.split())
     except Exception:
         pass
-    return None
+    return sorted(pids, key=int)
+
+
+def request_drain(port, api_key):
+    """Ask the server to drain itself through the admin API; True if it accepted."""
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/api/admin/shutdown",
+        method="POST",
+        headers={"X-API-Key": api_key},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status == 202 and json.load(response).get("status") == "draining"
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+
+def terminate_process(pid):
+    """Ask a process to shut down gracefully with SIGTERM; False if that is not possible.
+
+    On Windows a console server only drains on Ctrl+C / Ctrl+Break, which cannot
+    be sent to a process in another console (taskkill without /F posts WM_CLOSE,
+    and a console process has no window to receive it), so there only the admin
+    API drains it.
+    """
+    if sys.platform == "win32":
+        return False
+    try:
+        subprocess.run(["kill", "-TERM", pid], check=True)
+        return True
+    except Exception:
+        return False
 
 
 def kill_process(pid):
     """Kill a process by PID."""
     try:
         if sys.platform == "win32":
-            subprocess.run(["taskkill", "/PID", pid, "/F"], check=True)
+            subprocess.run(["taskkill", "/PID", pid, "/F", "/T"], check=True)
         else:
             subprocess.run(["kill", "-9", pid], check=True)
         return True
@@ -49,17 +96,75 @@ def kill_process(pid):
         return False
 
 
+def process_running(pid):
+    """Whether the process with this PID still exists."""
+    if sys.platform == "win32":
+        result = subprocess.run(
+            ["tasklist", "/FI", f"PID eq {pid}", "/NH"],
+            capture_output=True,
+            text=True
+        )
+        return str(pid) in result.stdout.split()
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def wait_for_exit(pids, timeout):
+    """Wait until every process has exited; False on timeout."""
+    deadline = time.monotonic() + timeout
+    while any(process_running(pid) for pid in pids):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.5)
+    return True
+
+
+def stop_server(port, pids, args):
+    """Drain the server on a port, escalating to a forced kill after the timeout."""
+    if not args.force:
+        if request_drain(port, args.api_key):
+            print(f"   Draining via /api/admin/shutdown (up to {args.timeout:g}s)...")
+            requested = True
+        elif terminate_process(pids[0]):
+            print(f"   Sent shutdown signal to PID {pids[0]} (up to {args.timeout:g}s)...")
+            requested = True
+        else:
+            print("   Could not ask it to drain (check --api-key), forcing it to stop")
+            requested = False
+        # The port closes when draining starts; the processes exit when it is done
+        if requested:
+            if wait_for_exit(pids, args.timeout):
+                return True
+            print(f"   Still running after {args.timeout:g}s, forcing it to stop")
+    for pid in pids:
+        if process_running(pid):
+            kill_process(pid)
+    return wait_for_exit(pids, 5)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Stop Mystery Shop servers on ports 8000-8010")
+    parser.add_argument("--timeout", type=float, default=45,
+                        help="Seconds to wait for a graceful shutdown before killing (default: 45)")
+    parser.add_argument("--force", action="store_true", help="Kill immediately without draining")
+    parser.add_argument("--api-key", default="dev-admin-key", help="Admin API key for the shutdown endpoint")
+    args = parser.parse_args()
+
     print("Searching for Mystery Shop servers on ports 8000-8010...")
     found_servers = False
     
     for port in range(8000, 8011):
-        pid = find_process_on_port(port)
-        if pid:
-            print(f"Found server on port {port} (PID: {pid})")
-            if kill_process(pid):
+        pids = find_processes_on_port(port)
+        if pids:
+            print(f"Found server on port {port} (PID: {', '.join(pids)})")
+            found_servers = True
+            if stop_server(port, pids, args):
                 print(f"Successfully stopped server on port {port}")
-                found_servers = True
             else:
                 print(f"Failed to stop server on port {port}")
         else: